@@ -0,0 +1,140 @@
+import heapq
+import time
+from settings import *
+
+def staggered_delays(count):
+    """Ticks from the start of a level to each of count ghosts' first decision,
+    spread evenly over GHOST_DECISION_INTERVAL ticks"""
+    return [GHOST_DECISION_INTERVAL - 1 - index * GHOST_DECISION_INTERVAL // count for index in range(count)]
+
+class DecisionQueue:
+    """The tick of every ghost's next decision, by ghost index.
+
+    Ghosts are scheduled when they arrive on a tile instead of being polled
+    every tick, so walking and waiting ghosts cost nothing. Scheduling a
+    ghost again replaces its pending decision, the replaced heap entries are
+    dropped when they come up.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.pending = {}
+
+    def schedule(self, index, tick):
+        self.pending[index] = tick
+        heapq.heappush(self.heap, (tick, index))
+
+    def pop_due(self, tick):
+        """Indices of the ghosts due to decide on or before tick, in index order"""
+        heap = self.heap
+        pending = self.pending
+        due = []
+        while heap and heap[0][0] <= tick:
+            due_tick, index = heapq.heappop(heap)
+            if pending.get(index) == due_tick:
+                del pending[index]
+                due.append(index)
+        due.sort()
+        return due
+
+    def next_tick(self):
+        """Tick of the earliest pending decision, None if there is none"""
+        heap = self.heap
+        pending = self.pending
+        while heap and pending.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def clear(self):
+        self.heap.clear()
+        self.pending.clear()
+
+class AIScheduler:
+    """Runs the ghost decisions due in a tick within a time budget.
+
+    Decisions that would take the tick past budget_us microseconds, going
+    by the average decision time of the ghost's personality, wait for the
+    next tick, where they go first. At least one decision is made every
+    tick. A budget of None runs every due decision, which keeps headless
+    games independent of the machine. Decision times are kept per
+    personality.
+    """
+
+    def __init__(self, budget_us=AI_DECISION_BUDGET_US):
+        self.budget_us = budget_us
+        # Ticks each deferred ghost has been waiting, by ghost index
+        self.waiting = {}
+        # Ghost indices to defer this tick whatever the budget, see defer
+        self.forced = set()
+        # Personality -> [decisions, total seconds, slowest seconds]
+        self.stats = {}
+        self.last_tick_us = 0.0
+        self.deferrals = 0
+
+    def defer(self, index):
+        """Hold a ghost's decision back this tick, for replaying a recorded deferral"""
+        self.forced.add(index)
+
+    def run(self, due, decide):
+        """Call decide(index, ghost) for the due (index, ghost) pairs, returns the indices deferred"""
+        waiting = self.waiting
+        if len(due) > 1:
+            due.sort(key=lambda item: (-waiting.get(item[0], 0), item[0]))
+
+        budget = self.budget_us / 1e6 if self.budget_us is not None else None
+        stats = self.stats
+        used = 0.0
+        decided = False
+        deferred = []
+        for index, ghost in due:
+            personality = ghost.personality
+            if index in self.forced:
+                deferred.append(index)
+                continue
+            if budget is not None and decided:
+                record = stats.get(personality)
+                expected = record[1] / record[0] if record else 0.0
+                if used + expected > budget:
+                    deferred.append(index)
+                    continue
+
+            start_time = time.perf_counter()
+            decide(index, ghost)
+            elapsed = time.perf_counter() - start_time
+            used += elapsed
+            decided = True
+            waiting.pop(index, None)
+
+            record = stats.get(personality)
+            if record is None:
+                stats[personality] = [1, elapsed, elapsed]
+            else:
+                record[0] += 1
+                record[1] += elapsed
+                if elapsed > record[2]:
+                    record[2] = elapsed
+
+        for index in deferred:
+            waiting[index] = waiting.get(index, 0) + 1
+        self.deferrals += len(deferred)
+        self.forced.clear()
+        self.last_tick_us = used * 1e6
+        return deferred
+
+    def reset(self):
+        self.waiting.clear()
+        self.forced.clear()
+
+    def average_us(self, personality):
+        record = self.stats.get(personality)
+        return record[1] / record[0] * 1e6 if record else 0.0
+
+    def report(self):
+        """One line per personality: decisions, mean and slowest time"""
+        lines = []
+        for personality, (count, total, slowest) in sorted(self.stats.items()):
+            lines.append(f"{personality:<11}{count:>9,} decisions{total / count * 1e6:>9.1f} us mean"
+                         f"{slowest * 1e6:>10.1f} us max")
+        if self.deferrals:
+            lines.append(f"{self.deferrals:,} decisions deferred to a later tick")
+        return lines
@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+
+# Scheduling priority of worker processes relative to the game, where supported
+WORKER_NICENESS = 10
+
+class AIWorker:
+    """A child process that answers AI requests without blocking the game.
+
+    target(connection) runs in the child and reads messages from the pipe:
+    ('request', request id, ...) for work, anything else for setup, and None
+    to stop. It sends back (request id, ...) tuples in any order, possibly
+    skipping requests that were superseded (see receive_all). request returns
+    at once; replies collects whatever answers have arrived, never waiting.
+    """
+
+    def __init__(self, target):
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=run, args=(target, child_connection), daemon=True)
+        self.process.start()
+        self.request_id = 0
+
+    def send(self, message):
+        self.connection.send(message)
+
+    def request(self, *payload):
+        """Queue a request, returns its id"""
+        self.request_id += 1
+        self.connection.send(('request', self.request_id) + payload)
+        return self.request_id
+
+    def replies(self):
+        """Answers that have arrived since the last call"""
+        replies = []
+        while self.connection.poll():
+            replies.append(self.connection.recv())
+        return replies
+
+    def close(self):
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+def run(target, connection):
+    # The game comes first on machines with few cores: on Linux the worker
+    # only gets CPU time the game leaves over, elsewhere a lower priority
+    try:
+        os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+    except (AttributeError, OSError):
+        if hasattr(os, 'nice'):
+            os.nice(WORKER_NICENESS)
+    target(connection)
+
+def receive_all(connection):
+    """Child side: wait for a message, then take every other one already queued.
+
+    A worker that falls behind works through the newest state only.
+    """
+    messages = [connection.recv()]
+    while connection.poll():
+        messages.append(connection.recv())
+    return messages
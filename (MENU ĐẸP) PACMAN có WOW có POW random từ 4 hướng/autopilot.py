@@ -0,0 +1,65 @@
+from collections import deque
+from settings import *
+
+class PacmanAutopilot:
+    """Simple Pac-Man player for AI-vs-AI games.
+
+    Heads for the nearest dot or power pellet with a BFS, treating tiles next
+    to dangerous ghosts as blocked. The route is only recomputed when Pac-Man
+    enters a new tile or stops, so the cost per tick stays small.
+    """
+
+    def __init__(self, danger_radius=2):
+        self.danger_radius = danger_radius
+        # Tiles within danger_radius steps of a ghost, as offsets from its tile
+        self.danger_offsets = [(dx, dy) for dy in range(-danger_radius, danger_radius + 1)
+                               for dx in range(-danger_radius, danger_radius + 1)
+                               if abs(dx) + abs(dy) <= danger_radius]
+        self.last_tile = None
+        self.desired_direction = None
+
+    def __call__(self, game):
+        pacman = game.pacman
+        tile = (int((pacman.x + TILE_SIZE // 2) // TILE_SIZE),
+                int((pacman.y + TILE_SIZE // 2) // TILE_SIZE))
+
+        if tile != self.last_tile or pacman.direction == 'STOP':
+            self.last_tile = tile
+            self.desired_direction = self.choose_direction(tile, game.map, game.ghosts)
+
+        direction = self.desired_direction
+        if not direction:
+            return
+
+        # Pac-Man only fits into a side corridor once its box lines up with
+        # the tile, so slide along the current axis until it does
+        tile_left = tile[0] * TILE_SIZE
+        tile_top = tile[1] * TILE_SIZE
+        if direction in ('UP', 'DOWN') and not 0 <= pacman.x - tile_left < 1:
+            direction = 'RIGHT' if pacman.x < tile_left else 'LEFT'
+        elif direction in ('LEFT', 'RIGHT') and not 0 <= pacman.y - tile_top < 1:
+            direction = 'DOWN' if pacman.y < tile_top else 'UP'
+
+        pacman.set_direction(direction)
+
+    def choose_direction(self, start, game_map, ghosts):
+        ghost_tiles = {(ghost.tile_x, ghost.tile_y) for ghost in ghosts if ghost.state == 'NORMAL'}
+        blocked = {(tile_x + dx, tile_y + dy) for tile_x, tile_y in ghost_tiles for dx, dy in self.danger_offsets}
+        blocked.discard(start)
+
+        # BFS remembering the first step taken from the start tile
+        first_step = {start: None}
+        queue = deque([start])
+        while queue:
+            x, y = queue.popleft()
+            tile = game_map.get_tile(x, y)
+            if (x, y) != start and (tile == DOT or tile == POWER_PELLET):
+                return first_step[(x, y)]
+
+            for nx, ny, direction in game_map.get_moves(x, y):
+                if (nx, ny) in first_step or (nx, ny) in blocked:
+                    continue
+                first_step[(nx, ny)] = first_step[(x, y)] or direction
+                queue.append((nx, ny))
+
+        return None
@@ -0,0 +1,424 @@
+import argparse
+import time
+import numpy as np
+from map import Map
+from levels import LEVELS
+from ai_scheduler import staggered_delays
+from settings import *
+
+# Direction ids; ghost moves are tried in the same UP, DOWN, LEFT, RIGHT
+# order as Ghost.get_valid_moves so ties resolve the same way
+STOP, UP, DOWN, LEFT, RIGHT = range(5)
+DIRECTION_NAMES = ['STOP', 'UP', 'DOWN', 'LEFT', 'RIGHT']
+DIR_DX = np.array([0, 0, 0, -1, 1])
+DIR_DY = np.array([0, -1, 1, 0, 0])
+MOVE_DX = DIR_DX[1:]
+MOVE_DY = DIR_DY[1:]
+# Index into MOVE_DX/MOVE_DY of the opposite move, by direction id
+REVERSE_MOVE = np.array([-1, 1, 0, 3, 2])
+
+TILE_EMPTY = 0
+TILE_DOT = 1
+TILE_PELLET = 2
+
+OUTCOME_RUNNING = 0
+OUTCOME_WIN = 1
+OUTCOME_GAME_OVER = 2
+
+PATROL_POINTS = np.array([(10, 10), (30, 10), (30, 25), (10, 25)])
+
+class BatchSimulator:
+    """Steps many games of one level at once with struct-of-arrays NumPy state.
+
+    Games are independent copies of Game.update_game: Pacman.move/eat and
+    Ghost.move/decide_next_move/update_movement are reproduced with the same
+    arithmetic, vectorized over the game axis. As in update_game, every ghost
+    moves first and collisions are then resolved one ghost slot after
+    another, so resets happen in the same order. Decisions are never deferred,
+    as in headless games, which have no AIScheduler budget. Only the random
+    numbers differ, because the RANDOM personality draws from a NumPy
+    generator. Ghost follows cached shortest paths, but with a distance
+    table each step of those is the closest move towards the target, so that
+    is what is computed here.
+    """
+
+    def __init__(self, num_games, level_num=1, seed=None, personalities=None, turn_chance=0.02):
+        level_data = LEVELS[level_num]
+        game_map = Map(level_data["map"], render=False)
+        rows = game_map.map_data
+
+        self.num_games = num_games
+        self.level_num = level_num
+        self.height = len(rows)
+        self.width = max(len(row) for row in rows)
+        self.rng = np.random.default_rng(seed)
+        self.turn_chance = turn_chance
+
+        # Walls get a one tile border so neighbour lookups never leave the array
+        self.walls = np.ones((self.height + 2, self.width + 2), dtype=bool)
+        items = np.zeros((self.height, self.width), dtype=np.uint8)
+        for y, row in enumerate(rows):
+            for x, tile in enumerate(row):
+                self.walls[y + 1, x + 1] = tile == WALL
+                if tile == DOT:
+                    items[y, x] = TILE_DOT
+                elif tile == POWER_PELLET:
+                    items[y, x] = TILE_PELLET
+        self.total_dots = int(np.count_nonzero(items == TILE_DOT))
+
+        # Maze distances shared with Ghost, walk_grid numbers the walkable tiles
+        # on the same bordered grid as self.walls
+        self.distance_table = None
+        if game_map.distance_table is not None:
+            self.walk_grid = np.array(game_map.walk_index).reshape(self.height + 2, self.width + 2)
+            self.distance_table = np.asarray(game_map.distance_table)
+
+        # Flee penalties of dead-end pockets, on the same bordered grid as self.walls
+        self.dead_ends = np.array(game_map.get_dead_ends()).reshape(self.height + 2, self.width + 2)
+
+        # Ghosts head for the walkable tile closest to their target, see Map.nearest_open_tile
+        nearest = np.array([game_map.nearest_open_tile(x, y) for y in range(self.height) for x in range(self.width)])
+        self.nearest_open_x = nearest[:, 0].reshape(self.height, self.width)
+        self.nearest_open_y = nearest[:, 1].reshape(self.height, self.width)
+
+        self.pacman_speed = level_data["pacman_speed"]
+        self.ghost_speed = level_data["ghost_speed"]
+        self.pacman_start = game_map.pacman_start
+        self.ghost_starts = np.array(game_map.ghost_starts, dtype=np.int64)
+
+        num_ghosts = len(self.ghost_starts)
+        if personalities is None:
+            personalities = GHOST_PERSONALITIES
+        # One ghost per start, personalities cycled over them as in Game.initialize_level
+        personalities = [personalities[i % len(personalities)] for i in range(num_ghosts)]
+        if 'TEAM' in personalities:
+            # Tree searches do not vectorize over games, play TEAM ghosts with Game
+            raise ValueError("BatchSimulator does not support the TEAM personality")
+        self.personalities = personalities
+
+        n = num_games
+        self.items = np.repeat(items[np.newaxis], n, axis=0)
+        self.dots_left = np.full(n, self.total_dots, dtype=np.int64)
+
+        self.pac_x = np.full(n, float(self.pacman_start[0]))
+        self.pac_y = np.full(n, float(self.pacman_start[1]))
+        self.pac_dir = np.zeros(n, dtype=np.int64)
+        self.pac_next_dir = np.zeros(n, dtype=np.int64)
+
+        shape = (n, num_ghosts)
+        start_tiles = self.ghost_starts // TILE_SIZE
+        self.ghost_tile_x = np.broadcast_to(start_tiles[:, 0], shape).copy()
+        self.ghost_tile_y = np.broadcast_to(start_tiles[:, 1], shape).copy()
+        self.ghost_x = (self.ghost_tile_x * TILE_SIZE).astype(np.float64)
+        self.ghost_y = (self.ghost_tile_y * TILE_SIZE).astype(np.float64)
+        self.ghost_target_x = self.ghost_tile_x.copy()
+        self.ghost_target_y = self.ghost_tile_y.copy()
+        self.ghost_dir = np.full(shape, UP, dtype=np.int64)
+        self.move_progress = np.zeros(shape)
+        self.is_moving = np.zeros(shape, dtype=bool)
+        # Tick of each ghost's next decision, as kept by Game.decisions
+        self.next_decision = np.broadcast_to(np.array(staggered_delays(num_ghosts), dtype=np.int64), shape).copy()
+        self.think_delays = [GHOST_THINK_DELAYS.get(personality, 0) for personality in personalities]
+        self.scared = np.zeros(shape, dtype=bool)
+        self.scared_timer = np.zeros(shape, dtype=np.int64)
+
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lives = np.full(n, 3, dtype=np.int64)
+        self.power_pellet_timer = np.zeros(n, dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.outcome = np.zeros(n, dtype=np.int8)
+
+    def wall_at(self, tile_x, tile_y):
+        """Wall lookup for tile arrays, anything outside the map is a wall"""
+        tile_x = np.clip(tile_x, -1, self.width) + 1
+        tile_y = np.clip(tile_y, -1, self.height) + 1
+        return self.walls[tile_y, tile_x]
+
+    def tile_distance(self, from_x, from_y, to_x, to_y):
+        """Vectorized Map.distance: maze distance, Manhattan off the walkable maze.
+
+        Maps too big for a distance table use Manhattan distance here, unlike
+        Map.distance which searches the junction graph.
+        """
+        manhattan = np.abs(from_x - to_x) + np.abs(from_y - to_y)
+        if self.distance_table is None:
+            return manhattan
+        start = self.walk_grid[np.clip(from_y, -1, self.height).astype(np.int64) + 1,
+                               np.clip(from_x, -1, self.width).astype(np.int64) + 1]
+        end = self.walk_grid[np.clip(to_y, -1, self.height).astype(np.int64) + 1,
+                             np.clip(to_x, -1, self.width).astype(np.int64) + 1]
+        maze = self.distance_table[np.maximum(start, 0), np.maximum(end, 0)]
+        return np.where((start >= 0) & (end >= 0), maze, manhattan)
+
+    def open_target(self, target_x, target_y):
+        """Vectorized Map.nearest_open_tile"""
+        target_x = np.clip(target_x, 0, self.width - 1).astype(np.int64)
+        target_y = np.clip(target_y, 0, self.height - 1).astype(np.int64)
+        return self.nearest_open_x[target_y, target_x], self.nearest_open_y[target_y, target_x]
+
+    def pacman_collision(self, x, y):
+        left = np.floor_divide(x, TILE_SIZE).astype(np.int64)
+        top = np.floor_divide(y, TILE_SIZE).astype(np.int64)
+        right = np.floor_divide(x + TILE_SIZE - 1, TILE_SIZE).astype(np.int64)
+        bottom = np.floor_divide(y + TILE_SIZE - 1, TILE_SIZE).astype(np.int64)
+        return ((x < 0) | (y < 0) |
+                self.wall_at(left, top) | self.wall_at(right, top) |
+                self.wall_at(left, bottom) | self.wall_at(right, bottom))
+
+    def random_pacman_directions(self):
+        """Default Pac-Man policy: keep going, turn at random now and then"""
+        turn = (self.pac_dir == STOP) | (self.rng.random(self.num_games) < self.turn_chance)
+        directions = self.pac_next_dir.copy()
+        directions[turn] = self.rng.integers(UP, RIGHT + 1, int(np.count_nonzero(turn)))
+        return directions
+
+    def step(self, pacman_directions=None):
+        """Advance every running game by one tick"""
+        active = self.outcome == OUTCOME_RUNNING
+        if not active.any():
+            return
+
+        if pacman_directions is None:
+            pacman_directions = self.random_pacman_directions()
+        self.pac_next_dir = np.where(active, pacman_directions, self.pac_next_dir)
+
+        self.move_pacman(active)
+        self.eat(active)
+
+        powered = active & (self.power_pellet_timer > 0)
+        self.power_pellet_timer[powered] -= 1
+
+        for ghost in range(len(self.personalities)):
+            self.move_ghost(ghost, active)
+        for ghost in range(len(self.personalities)):
+            self.resolve_collisions(ghost, active)
+
+        self.outcome[active & (self.dots_left == 0)] = OUTCOME_WIN
+
+        bonus = active & (self.score > 0) & (self.score % SCORE_BONUS_LIFE == 0)
+        self.lives[bonus] += 1
+        self.ticks[active] += 1
+
+    def move_pacman(self, active):
+        speed = self.pacman_speed
+
+        # Try to change direction if a new direction was requested
+        wants_turn = active & (self.pac_next_dir != STOP)
+        turn_x = self.pac_x + DIR_DX[self.pac_next_dir] * speed
+        turn_y = self.pac_y + DIR_DY[self.pac_next_dir] * speed
+        turns = wants_turn & ~self.pacman_collision(turn_x, turn_y)
+        self.pac_dir[turns] = self.pac_next_dir[turns]
+        self.pac_next_dir[turns] = STOP
+
+        # Move in current direction
+        new_x = self.pac_x + DIR_DX[self.pac_dir] * speed
+        new_y = self.pac_y + DIR_DY[self.pac_dir] * speed
+        blocked = self.pacman_collision(new_x, new_y)
+        moves = active & ~blocked
+        self.pac_x = np.where(moves, np.clip(new_x, 0, self.width * TILE_SIZE - TILE_SIZE), self.pac_x)
+        self.pac_y = np.where(moves, np.clip(new_y, 0, self.height * TILE_SIZE - TILE_SIZE), self.pac_y)
+        self.pac_dir[active & blocked] = STOP
+
+    def eat(self, active):
+        map_x = np.floor_divide(self.pac_x + TILE_SIZE // 2, TILE_SIZE).astype(np.int64)
+        map_y = np.floor_divide(self.pac_y + TILE_SIZE // 2, TILE_SIZE).astype(np.int64)
+        inside = active & (map_x >= 0) & (map_x < self.width) & (map_y >= 0) & (map_y < self.height)
+
+        games = np.nonzero(inside)[0]
+        tiles = self.items[games, map_y[games], map_x[games]]
+        self.items[games, map_y[games], map_x[games]] = TILE_EMPTY
+
+        ate_dot = games[tiles == TILE_DOT]
+        self.score[ate_dot] += SCORE_DOT
+        self.dots_left[ate_dot] -= 1
+
+        ate_pellet = games[tiles == TILE_PELLET]
+        self.score[ate_pellet] += SCORE_POWER_PELLET
+        self.power_pellet_timer[ate_pellet] = POWER_PELLET_DURATION
+        self.scared[ate_pellet] = True
+        self.scared_timer[ate_pellet] = POWER_PELLET_DURATION
+
+    def move_ghost(self, ghost, active):
+        scared = active & self.scared[:, ghost]
+        self.scared_timer[scared, ghost] -= 1
+        self.scared[scared & (self.scared_timer[:, ghost] <= 0), ghost] = False
+
+        deciding = active & ~self.is_moving[:, ghost] & (self.ticks >= self.next_decision[:, ghost])
+        if deciding.any():
+            self.decide_next_move(ghost, deciding)
+            # Ghosts with nowhere to go look again later
+            stuck = deciding & ~self.is_moving[:, ghost]
+            self.next_decision[stuck, ghost] = self.ticks[stuck] + GHOST_DECISION_INTERVAL
+
+        moving = active & self.is_moving[:, ghost]
+        if moving.any():
+            arrived = self.update_movement(ghost, moving)
+            self.next_decision[arrived, ghost] = self.ticks[arrived] + 1 + self.think_delays[ghost]
+
+    def decide_next_move(self, ghost, deciding):
+        tile_x = self.ghost_tile_x[:, ghost]
+        tile_y = self.ghost_tile_y[:, ghost]
+        move_x = tile_x[:, np.newaxis] + MOVE_DX
+        move_y = tile_y[:, np.newaxis] + MOVE_DY
+        valid = ~self.wall_at(move_x, move_y)
+
+        pacman_tile_x = np.floor_divide(self.pac_x, TILE_SIZE)
+        pacman_tile_y = np.floor_divide(self.pac_y, TILE_SIZE)
+
+        choice = self.closest_move(move_x, move_y, valid, pacman_tile_x, pacman_tile_y)
+        has_move = valid.any(axis=1)
+
+        personality = self.personalities[ghost]
+        distance_to_pacman = self.tile_distance(tile_x, tile_y, pacman_tile_x, pacman_tile_y)
+        if personality == 'AMBUSH':
+            target_x = np.where(pacman_tile_x > tile_x, pacman_tile_x + 3, pacman_tile_x - 3)
+            target_y = np.where(pacman_tile_y > tile_y, pacman_tile_y + 3, pacman_tile_y - 3)
+            target_x, target_y = self.open_target(target_x, target_y)
+            ambush = self.closest_move(move_x, move_y, valid, target_x, target_y)
+            choice = np.where(distance_to_pacman < 8, choice, ambush)
+        elif personality == 'PATROL':
+            patrol_distance = self.tile_distance(tile_x[:, np.newaxis], tile_y[:, np.newaxis],
+                                                 PATROL_POINTS[:, 0], PATROL_POINTS[:, 1])
+            closest_patrol = PATROL_POINTS[np.argmin(patrol_distance, axis=1)]
+            target_x, target_y = self.open_target(closest_patrol[:, 0], closest_patrol[:, 1])
+            patrol = self.closest_move(move_x, move_y, valid, target_x, target_y)
+            choice = np.where(distance_to_pacman < 10, choice, patrol)
+        elif personality == 'RANDOM':
+            keys = np.where(valid, self.rng.random(valid.shape), -1.0)
+            wander = np.argmax(keys, axis=1)
+            choice = np.where(self.rng.random(self.num_games) < 0.4, choice, wander)
+
+        # Scared ghosts take the first move to the safest tile: furthest from
+        # Pac-Man less the dead-end penalty, as in Ghost.choose_flee_move
+        flee_distance = self.tile_distance(move_x, move_y, pacman_tile_x[:, np.newaxis], pacman_tile_y[:, np.newaxis])
+        safety = flee_distance - self.dead_ends[np.clip(move_y, -1, self.height) + 1, np.clip(move_x, -1, self.width) + 1]
+        flee = np.argmax(np.where(valid, safety, -np.inf), axis=1)
+        choice = np.where(self.scared[:, ghost], flee, choice)
+
+        # Ghosts on a corridor tile keep going the way they came, as in Map.corridor_move
+        reverse = REVERSE_MOVE[self.ghost_dir[:, ghost]]
+        came_back = valid[np.arange(self.num_games), reverse] & (reverse >= 0)
+        corridor = ~self.wall_at(tile_x, tile_y) & (valid.sum(axis=1) == 2) & came_back
+        pocket = self.dead_ends[np.clip(tile_y, -1, self.height) + 1, np.clip(tile_x, -1, self.width) + 1] > 0
+        corridor &= ~(self.scared[:, ghost] & pocket)
+        forward = np.argmax(valid & (np.arange(4) != reverse[:, np.newaxis]), axis=1)
+        choice = np.where(corridor, forward, choice)
+        has_move = has_move | corridor
+
+        starts = np.nonzero(deciding & has_move)[0]
+        picked = choice[starts]
+        self.ghost_target_x[starts, ghost] = move_x[starts, picked]
+        self.ghost_target_y[starts, ghost] = move_y[starts, picked]
+        self.ghost_dir[starts, ghost] = picked + 1
+        self.is_moving[starts, ghost] = True
+        self.move_progress[starts, ghost] = 0
+
+    def closest_move(self, move_x, move_y, valid, target_x, target_y):
+        distance = self.tile_distance(move_x, move_y, target_x[:, np.newaxis], target_y[:, np.newaxis])
+        return np.argmin(np.where(valid, distance, np.inf), axis=1)
+
+    def update_movement(self, ghost, moving):
+        progress = self.move_progress[:, ghost] + self.ghost_speed
+        arrived = moving & (progress >= TILE_SIZE)
+        sliding = moving & ~arrived
+
+        tile_x = self.ghost_tile_x[:, ghost]
+        tile_y = self.ghost_tile_y[:, ghost]
+        target_x = self.ghost_target_x[:, ghost]
+        target_y = self.ghost_target_y[:, ghost]
+
+        ratio = progress / TILE_SIZE
+        start_x = tile_x * TILE_SIZE
+        start_y = tile_y * TILE_SIZE
+        slide_x = start_x + (target_x * TILE_SIZE - start_x) * ratio
+        slide_y = start_y + (target_y * TILE_SIZE - start_y) * ratio
+
+        self.ghost_x[:, ghost] = np.where(arrived, target_x * TILE_SIZE,
+                                          np.where(sliding, slide_x, self.ghost_x[:, ghost]))
+        self.ghost_y[:, ghost] = np.where(arrived, target_y * TILE_SIZE,
+                                          np.where(sliding, slide_y, self.ghost_y[:, ghost]))
+        self.ghost_tile_x[arrived, ghost] = target_x[arrived]
+        self.ghost_tile_y[arrived, ghost] = target_y[arrived]
+        self.is_moving[arrived, ghost] = False
+        self.move_progress[:, ghost] = np.where(arrived, 0, np.where(sliding, progress, self.move_progress[:, ghost]))
+        return arrived
+
+    def resolve_collisions(self, ghost, active):
+        # Same test as Rect.colliderect on Rect(x, y, TILE_SIZE, TILE_SIZE)
+        hit = (active &
+               (np.abs(np.trunc(self.ghost_x[:, ghost]) - np.trunc(self.pac_x)) < TILE_SIZE) &
+               (np.abs(np.trunc(self.ghost_y[:, ghost]) - np.trunc(self.pac_y)) < TILE_SIZE))
+        if not hit.any():
+            return
+
+        caught = hit & ~self.scared[:, ghost]
+        if caught.any():
+            self.lives[caught] -= 1
+            self.reset_positions(caught)
+            self.outcome[caught & (self.lives <= 0)] = OUTCOME_GAME_OVER
+
+        eaten = np.nonzero(hit & self.scared[:, ghost])[0]
+        if len(eaten):
+            start_x, start_y = self.ghost_starts[0]
+            self.score[eaten] += SCORE_GHOST
+            self.ghost_x[eaten, ghost] = start_x
+            self.ghost_y[eaten, ghost] = start_y
+            self.ghost_tile_x[eaten, ghost] = start_x // TILE_SIZE
+            self.ghost_tile_y[eaten, ghost] = start_y // TILE_SIZE
+            self.scared[eaten, ghost] = False
+
+    def reset_positions(self, games):
+        self.pac_x[games] = self.pacman_start[0]
+        self.pac_y[games] = self.pacman_start[1]
+        self.pac_dir[games] = STOP
+        self.pac_next_dir[games] = STOP
+        self.power_pellet_timer[games] = 0
+
+        self.ghost_x[games] = self.ghost_starts[:, 0]
+        self.ghost_y[games] = self.ghost_starts[:, 1]
+        self.ghost_tile_x[games] = self.ghost_starts[:, 0] // TILE_SIZE
+        self.ghost_tile_y[games] = self.ghost_starts[:, 1] // TILE_SIZE
+        self.scared[games] = False
+
+    def run(self, max_ticks=HEADLESS_MAX_TICKS):
+        """Step until every game has ended or max_ticks passed, return a summary"""
+        start_time = time.perf_counter()
+        for _ in range(max_ticks):
+            if not (self.outcome == OUTCOME_RUNNING).any():
+                break
+            self.step()
+        elapsed = time.perf_counter() - start_time
+
+        game_ticks = int(self.ticks.sum())
+        return {
+            'games': self.num_games,
+            'wins': int(np.count_nonzero(self.outcome == OUTCOME_WIN)),
+            'game_overs': int(np.count_nonzero(self.outcome == OUTCOME_GAME_OVER)),
+            'mean_score': float(self.score.mean()),
+            'mean_ticks': float(self.ticks.mean()),
+            'mean_dots_eaten': float((self.total_dots - self.dots_left).mean()),
+            'game_ticks': game_ticks,
+            'elapsed': elapsed,
+            'ticks_per_second': game_ticks / elapsed if elapsed > 0 else 0.0
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Step many Pac-Man games at once with NumPy")
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--max-ticks', type=int, default=HEADLESS_MAX_TICKS)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    simulator = BatchSimulator(args.games, args.level, seed=args.seed)
+    summary = simulator.run(args.max_ticks)
+
+    print(f"Level {args.level}: {summary['games']} games, {summary['wins']} cleared, "
+          f"{summary['game_overs']} game over")
+    print(f"Mean score {summary['mean_score']:.0f}, mean ticks {summary['mean_ticks']:.0f}, "
+          f"mean dots eaten {summary['mean_dots_eaten']:.0f}")
+    print(f"{summary['game_ticks']:,} game-ticks in {summary['elapsed']:.2f}s: "
+          f"{summary['ticks_per_second']:,.0f} game-ticks/s")
+
+if __name__ == '__main__':
+    main()
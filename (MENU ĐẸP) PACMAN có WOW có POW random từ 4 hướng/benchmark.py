@@ -0,0 +1,504 @@
+import argparse
+import math
+import random
+import time
+from collections import deque
+import pygame
+from ghost import Ghost
+from map import Map
+from levels import LEVELS
+from settings import *
+from wall_cache import wall_surfaces
+from junctions import EXIT_COUNTS, JunctionGraph
+from spatial_hash import SpatialHash
+from camera import Camera
+from maze_gen import generate_maze
+from flow_field import FlowField, SafetyField
+from ai_scheduler import AIScheduler, DecisionQueue, staggered_delays
+from team_planner import TeamPlanner
+
+class LegacyMoveGhost(Ghost):
+    """Ghost using the original per-decision move generation, for comparison"""
+
+    def __init__(self, start_pos, personality, rows):
+        super().__init__(start_pos, personality=personality)
+        self.rows = rows
+
+    def get_valid_moves(self, game_map):
+        moves = []
+        directions = [
+            (0, -1, 'UP'),
+            (0, 1, 'DOWN'),
+            (-1, 0, 'LEFT'),
+            (1, 0, 'RIGHT')
+        ]
+
+        for dx, dy, direction in directions:
+            new_tile_x = self.tile_x + dx
+            new_tile_y = self.tile_y + dy
+
+            if self.is_legacy_valid_tile(new_tile_x, new_tile_y):
+                moves.append((new_tile_x, new_tile_y, direction))
+
+        return moves
+
+    def is_legacy_valid_tile(self, tile_x, tile_y):
+        if tile_y < 0 or tile_y >= len(self.rows):
+            return False
+        if tile_x < 0 or tile_x >= len(self.rows[tile_y]):
+            return False
+
+        return self.rows[tile_y][tile_x] != WALL
+
+def time_decisions(ghosts, tiles, game_map, pacman_pos, repeat):
+    start_time = time.perf_counter()
+    decisions = 0
+    for _ in range(repeat):
+        for ghost in ghosts:
+            for tile_x, tile_y in tiles:
+                ghost.tile_x = tile_x
+                ghost.tile_y = tile_y
+                ghost.decide_next_move(pacman_pos, game_map)
+                decisions += 1
+    return decisions / (time.perf_counter() - start_time)
+
+def bench_decisions(repeat):
+    """Ghost decisions per second with the original and the precomputed move lists"""
+    print(f"{'level':<8}{'before':>14}{'after':>14}{'speedup':>10}")
+    for level_num, level_data in sorted(LEVELS.items()):
+        game_map = Map(level_data["map"], render=False)
+        rows = list(game_map.map_data)
+        tiles = [(x, y) for y in range(game_map.height) for x in range(game_map.width)
+                 if not game_map.is_wall(x, y)]
+        # Deterministic personalities only, so both runs do the same work
+        personalities = ['AGGRESSIVE', 'AMBUSH', 'PATROL']
+        pacman_pos = game_map.pacman_start
+
+        before = time_decisions([LegacyMoveGhost((0, 0), personality, rows) for personality in personalities],
+                                tiles, game_map, pacman_pos, repeat)
+        after = time_decisions([Ghost((0, 0), personality=personality) for personality in personalities],
+                               tiles, game_map, pacman_pos, repeat)
+        print(f"{level_num:<8}{before:>14,.0f}{after:>14,.0f}{after / before:>9.2f}x")
+
+def legacy_wall_surface(game_map):
+    """The original Map.create_wall_surface, one surface for the whole map"""
+    wall_surface = pygame.Surface((game_map.width * TILE_SIZE, game_map.height * TILE_SIZE))
+    wall_surface.fill(BLACK)
+
+    for y, row in enumerate(game_map.map_data):
+        for x, tile in enumerate(row):
+            if tile == WALL:
+                wall_rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                pygame.draw.rect(wall_surface, WALL_COLOR, wall_rect)
+                pygame.draw.line(wall_surface, WALL_HIGHLIGHT,
+                                 (wall_rect.left, wall_rect.top), (wall_rect.right-1, wall_rect.top), 2)
+                pygame.draw.line(wall_surface, WALL_HIGHLIGHT,
+                                 (wall_rect.left, wall_rect.top), (wall_rect.left, wall_rect.bottom-1), 2)
+                pygame.draw.line(wall_surface, WALL_SHADOW,
+                                 (wall_rect.left+1, wall_rect.bottom-1), (wall_rect.right-1, wall_rect.bottom-1), 2)
+                pygame.draw.line(wall_surface, WALL_SHADOW,
+                                 (wall_rect.right-1, wall_rect.top+1), (wall_rect.right-1, wall_rect.bottom-1), 2)
+    return wall_surface
+
+def legacy_map_draw(game_map, screen, wall_surface):
+    """The original Map.draw, redrawing every dot and pellet from the tile grid"""
+    screen.blit(wall_surface, (0, 0))
+
+    for y, row in enumerate(game_map.map_data):
+        for x, tile in enumerate(row):
+            center_x = x * TILE_SIZE + TILE_SIZE // 2
+            center_y = y * TILE_SIZE + TILE_SIZE // 2
+
+            if tile == DOT:
+                pygame.draw.circle(screen, WHITE, (center_x, center_y), 2)
+                pygame.draw.circle(screen, (255, 255, 100), (center_x, center_y), 1)
+
+            elif tile == POWER_PELLET:
+                pulse = abs(math.sin(pygame.time.get_ticks() * 0.01)) * 2 + 4
+                pygame.draw.circle(screen, WHITE, (center_x, center_y), int(pulse))
+                pygame.draw.circle(screen, YELLOW, (center_x, center_y), int(pulse - 1))
+
+def time_frames(draw, frames):
+    start_time = time.perf_counter()
+    for _ in range(frames):
+        draw()
+    return (time.perf_counter() - start_time) * 1000 / frames
+
+def bench_map_draw(repeat, pellets):
+    """Milliseconds per Map.draw call with the original per-tile loop and the cached layers.
+
+    pellets turns that many dots into power pellets first, like repeated WOW use.
+    """
+    pygame.init()
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    frames = repeat * 10
+    print(f"{'level':<8}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for level_num, level_data in sorted(LEVELS.items()):
+        game_map = Map(level_data["map"])
+        dots = [(x, y) for y in range(game_map.height) for x in range(game_map.width)
+                if game_map.get_tile(x, y) == DOT]
+        for x, y in dots[:pellets]:
+            game_map.set_tile(x, y, POWER_PELLET)
+        wall_surface = legacy_wall_surface(game_map)
+        before = time_frames(lambda: legacy_map_draw(game_map, screen, wall_surface), frames)
+        after = time_frames(lambda: game_map.draw(screen), frames)
+        print(f"{level_num:<8}{before:>12.3f}{after:>12.3f}{before / after:>9.1f}x")
+
+def bench_map_load(repeat):
+    """Milliseconds to build a rendered Map and draw its first frame, as on a
+    level restart, with a cold and a warm wall cache"""
+    pygame.init()
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    print(f"{'level':<8}{'cold ms':>12}{'warm ms':>12}{'speedup':>10}")
+    for level_num, level_data in sorted(LEVELS.items()):
+        cold = 0
+        for _ in range(repeat):
+            wall_surfaces.clear()
+            start_time = time.perf_counter()
+            Map(level_data["map"]).draw(screen)
+            cold += time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            Map(level_data["map"]).draw(screen)
+        warm = time.perf_counter() - start_time
+        print(f"{level_num:<8}{cold * 1000 / repeat:>12.2f}{warm * 1000 / repeat:>12.2f}{cold / warm:>9.1f}x")
+
+def random_maze_rows(size, seed=0):
+    rng = random.Random(seed)
+    inner = [''.join(rng.choice('..o#' if rng.random() < 0.01 else '..#') for _ in range(size - 2))
+             for _ in range(size - 2)]
+    return ['#' * size] + ['#' + row + '#' for row in inner] + ['#' * size]
+
+def bench_viewport(repeat):
+    """Milliseconds per frame drawing the map under a camera that pans across it.
+
+    The first frame builds every visible chunk and is reported on its own.
+    After that chunks are mostly prefetched before they scroll into view.
+    """
+    pygame.init()
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+    frames = repeat * 20
+    print(f"{'map':<12}{'load s':>8}{'first ms':>10}{'frame ms':>10}{'worst ms':>10}{'chunks':>8}")
+    for size in (40, 200, 2000):
+        start_time = time.perf_counter()
+        game_map = Map(random_maze_rows(size))
+        load = time.perf_counter() - start_time
+
+        map_pixels = size * TILE_SIZE
+        total = worst = first = 0
+        for frame in range(frames + 1):
+            # Diagonal pan at 4 pixels per frame, bouncing off the far corner
+            position = (frame * 4) % (2 * map_pixels)
+            position = min(position, 2 * map_pixels - position)
+            camera.follow(position, position, map_pixels, map_pixels)
+            start_time = time.perf_counter()
+            game_map.draw(screen, camera)
+            elapsed = time.perf_counter() - start_time
+            if frame == 0:
+                first = elapsed
+                continue
+            total += elapsed
+            worst = max(worst, elapsed)
+        print(f"{f'{size}x{size}':<12}{load:>8.2f}{first * 1000:>10.2f}{total * 1000 / frames:>10.3f}{worst * 1000:>10.2f}"
+              f"{len(game_map.chunks):>8}")
+
+def tile_bfs(game_map, start_x, start_y):
+    """Plain BFS over every walkable tile, what a search costs without the junction graph"""
+    distances = {(start_x, start_y): 0}
+    queue = deque([(start_x, start_y)])
+    while queue:
+        tile_x, tile_y = queue.popleft()
+        for next_x, next_y, _ in game_map.get_moves(tile_x, tile_y):
+            if (next_x, next_y) not in distances:
+                distances[(next_x, next_y)] = distances[(tile_x, tile_y)] + 1
+                queue.append((next_x, next_y))
+    return distances
+
+def bench_junctions(repeat):
+    """Junction graph size, and the cost of a search over it against a search over all tiles"""
+    print(f"{'level':<8}{'tiles':>7}{'nodes':>7}{'corridor':>10}{'build ms':>10}{'tile ms':>9}{'graph ms':>10}")
+    for level_num, level_data in sorted(LEVELS.items()):
+        game_map = Map(level_data["map"], render=False)
+        tiles = [(x, y) for y in range(game_map.height) for x in range(game_map.width)
+                 if not game_map.is_wall(x, y)]
+        corridor = sum(1 for x, y in tiles if EXIT_COUNTS[game_map.exits[game_map.index(x, y)]] == 2)
+
+        start_time = time.perf_counter()
+        graph = JunctionGraph(game_map, cache_size=0)
+        build = time.perf_counter() - start_time
+
+        targets = tiles[::max(1, len(tiles) // repeat)]
+        start_time = time.perf_counter()
+        for x, y in targets:
+            tile_bfs(game_map, x, y)
+        tile_search = (time.perf_counter() - start_time) / len(targets)
+        start_time = time.perf_counter()
+        for x, y in targets:
+            graph.distances_to(x, y)
+        graph_search = (time.perf_counter() - start_time) / len(targets)
+
+        print(f"{level_num:<8}{len(tiles):>7}{len(graph.nodes):>7}{corridor / len(tiles):>10.0%}"
+              f"{build * 1000:>10.2f}{tile_search * 1000:>9.3f}{graph_search * 1000:>10.3f}")
+
+def bench_collisions(repeat):
+    """Microseconds per tick to find what touches Pac-Man and a number of
+    projectiles, a Rect test per ghost and querier against the spatial hash"""
+    rng = random.Random(0)
+    ticks = repeat * 5
+    print(f"{'ghosts':<8}{'queries':>8}{'rects us':>10}{'hash us':>10}{'speedup':>10}")
+    for count, queries in ((4, 1), (500, 1), (500, 20), (500, 100)):
+        ghosts = [Ghost((rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT))) for _ in range(count)]
+        steps = [(rng.choice((-1, 0, 1)), rng.choice((-1, 0, 1))) for _ in ghosts]
+        queriers = [(rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT)) for _ in range(queries)]
+
+        start_time = time.perf_counter()
+        for _ in range(ticks):
+            for ghost, (dx, dy) in zip(ghosts, steps):
+                ghost.x = (ghost.x + dx) % SCREEN_WIDTH
+                ghost.y = (ghost.y + dy) % SCREEN_HEIGHT
+            for x, y in queriers:
+                querier_rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
+                hits = [ghost for ghost in ghosts if ghost.check_pacman_collision(querier_rect)]
+        rects = (time.perf_counter() - start_time) / ticks
+
+        entities = SpatialHash()
+        start_time = time.perf_counter()
+        for _ in range(ticks):
+            for ghost, (dx, dy) in zip(ghosts, steps):
+                ghost.x = (ghost.x + dx) % SCREEN_WIDTH
+                ghost.y = (ghost.y + dy) % SCREEN_HEIGHT
+                entities.update(ghost)
+            for x, y in queriers:
+                hits = entities.colliding(x, y)
+        spatial = (time.perf_counter() - start_time) / ticks
+        print(f"{count:<8}{queries:>8}{rects * 1e6:>10.1f}{spatial * 1e6:>10.1f}{rects / spatial:>9.2f}x")
+
+def walk_paths(game_map, tiles, steps, cached):
+    """Walk a ghost towards a target that moves every 8 steps, returns seconds per decision"""
+    rng = random.Random(0)
+    ghost = Ghost((tiles[0][0] * TILE_SIZE, tiles[0][1] * TILE_SIZE))
+    target = rng.choice(tiles)
+    start_time = time.perf_counter()
+    for step in range(steps):
+        if step % 8 == 0:
+            target = rng.choice(tiles)
+        if not cached:
+            ghost.path_target = None
+        moves = game_map.get_moves(ghost.tile_x, ghost.tile_y)
+        move = ghost.choose_path_move(moves, target[0], target[1], game_map)
+        ghost.tile_x, ghost.tile_y = move[0], move[1]
+    return (time.perf_counter() - start_time) / steps, ghost
+
+def bench_paths(repeat):
+    """Microseconds per ghost decision following a path, searched every time or kept until the target moves"""
+    print(f"{'map':<10}{'search us':>11}{'cached us':>11}{'speedup':>9}{'hits':>7}")
+    maps = [(f"level {level_num}", level_data["map"]) for level_num, level_data in sorted(LEVELS.items())]
+    maps.append(("200x200", generate_maze(200, 200, 0)))
+    for name, rows in maps:
+        game_map = Map(rows, render=False)
+        tiles = [(x, y) for y in range(game_map.height) for x in range(game_map.width)
+                 if not game_map.is_wall(x, y)]
+        steps = repeat * 50
+        search, _ = walk_paths(game_map, tiles, steps, cached=False)
+        cached, ghost = walk_paths(game_map, tiles, steps, cached=True)
+        hits = ghost.path_hits / (ghost.path_hits + ghost.path_recomputes)
+        print(f"{name:<10}{search * 1e6:>11.1f}{cached * 1e6:>11.1f}{search / cached:>8.1f}x{hits:>7.0%}")
+
+def chase_ticks(game_map, tiles, ghost_count, ticks, shared, scared=False):
+    """Every ghost takes a chase (or flee) step each tick, Pac-Man moves to a random tile every 8 ticks"""
+    rng = random.Random(0)
+    field = FlowField(game_map) if shared else None
+    flee_field = SafetyField(field) if shared else None
+    ghosts = []
+    for _ in range(ghost_count):
+        tile_x, tile_y = rng.choice(tiles)
+        ghost = Ghost((tile_x * TILE_SIZE, tile_y * TILE_SIZE))
+        ghost.chase_field = field
+        ghost.flee_field = flee_field
+        ghosts.append(ghost)
+    choose_move = Ghost.choose_flee_move if scared else Ghost.choose_aggressive_move
+    start_time = time.perf_counter()
+    for tick in range(ticks):
+        if tick % 8 == 0:
+            pacman_x, pacman_y = rng.choice(tiles)
+        if field is not None:
+            field.update(pacman_x, pacman_y)
+        for ghost in ghosts:
+            moves = game_map.get_moves(ghost.tile_x, ghost.tile_y)
+            move = choose_move(ghost, moves, pacman_x, pacman_y, game_map)
+            ghost.tile_x, ghost.tile_y = move[0], move[1]
+    return (time.perf_counter() - start_time) / ticks
+
+def bench_chase(repeat, scared=False):
+    """Milliseconds per tick for all ghosts to chase (or flee from) Pac-Man, each ghost
+    searching itself against one shared flow field"""
+    print(f"{'map':<10}{'ghosts':>7}{'own ms':>10}{'field ms':>10}{'speedup':>9}")
+    for name, rows in (("level 1", LEVELS[1]["map"]), ("200x200", generate_maze(200, 200, 0))):
+        game_map = Map(rows, render=False)
+        tiles = [(x, y) for y in range(game_map.height) for x in range(game_map.width)
+                 if not game_map.is_wall(x, y)]
+        for ghost_count in (4, 50, 500):
+            ticks = max(8, repeat * 40 // ghost_count)
+            own = chase_ticks(game_map, tiles, ghost_count, ticks, False, scared)
+            field = chase_ticks(game_map, tiles, ghost_count, ticks, True, scared)
+            print(f"{name:<10}{ghost_count:>7}{own * 1000:>10.2f}{field * 1000:>10.2f}{own / field:>8.1f}x")
+
+def scheduled_ticks(game_map, tiles, ghost_count, ticks, stagger, budget_us):
+    """Per-tick milliseconds spent on ghost decisions run through an AIScheduler.
+
+    Ghosts have no flow fields here, so every decision is a path search.
+    """
+    rng = random.Random(0)
+    ghosts = []
+    decisions = DecisionQueue()
+    delays = staggered_delays(ghost_count) if stagger else [GHOST_DECISION_INTERVAL - 1] * ghost_count
+    for i in range(ghost_count):
+        tile_x, tile_y = rng.choice(tiles)
+        ghost = Ghost((tile_x * TILE_SIZE, tile_y * TILE_SIZE), personality=GHOST_PERSONALITIES[i % 3], rng=rng)
+        decisions.schedule(i, delays[i])
+        ghosts.append(ghost)
+    scheduler = AIScheduler(budget_us)
+    pacman_pos = (tiles[0][0] * TILE_SIZE, tiles[0][1] * TILE_SIZE)
+    decide = lambda index, ghost: ghost.decide(pacman_pos, game_map)
+    tick_times = []
+    for tick in range(ticks):
+        if tick % 8 == 0:
+            tile_x, tile_y = rng.choice(tiles)
+            pacman_pos = (tile_x * TILE_SIZE, tile_y * TILE_SIZE)
+        for ghost in ghosts:
+            ghost.begin_tick()
+        due = [(i, ghosts[i]) for i in decisions.pop_due(tick)]
+        start_time = time.perf_counter()
+        if due:
+            for i in scheduler.run(due, decide):
+                decisions.schedule(i, tick + 1)
+        tick_times.append(time.perf_counter() - start_time)
+        for i, ghost in enumerate(ghosts):
+            if ghost.continue_move():
+                decisions.schedule(i, tick + 1)
+    tick_times.sort()
+    return (sum(tick_times) / ticks * 1000, tick_times[int(ticks * 0.99)] * 1000, tick_times[-1] * 1000,
+            scheduler.deferrals)
+
+def bench_scheduler(repeat):
+    """Ghost decision time per tick with all ghosts deciding on the same tick, staggered,
+    and staggered under a 1 ms budget"""
+    game_map = Map(generate_maze(151, 151, 0), render=False)
+    # Built on the first distance query, keep that out of the timings
+    game_map.get_junction_graph()
+    tiles = [(x, y) for y in range(game_map.height) for x in range(game_map.width)
+             if not game_map.is_wall(x, y)]
+    ticks = repeat * 30
+    print(f"{'ghosts':<8}{'schedule':<18}{'mean ms':>9}{'p99 ms':>9}{'worst ms':>10}{'deferred':>10}")
+    for ghost_count in (4, 100):
+        for name, stagger, budget_us in (("same tick", False, None), ("staggered", True, None),
+                                         ("staggered+budget", True, 1000)):
+            mean, p99, worst, deferred = scheduled_ticks(game_map, tiles, ghost_count, ticks, stagger, budget_us)
+            print(f"{ghost_count:<8}{name:<18}{mean:>9.3f}{p99:>9.3f}{worst:>10.3f}{deferred:>10}")
+
+def bench_swarm(repeat):
+    """Milliseconds per tick to update the swarm level and to draw its ghosts, with
+    Ghost objects and with a GhostStore"""
+    from game import Game
+    pygame.init()
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    ticks = repeat * 30
+    print(f"{'ghosts':<10}{'update ms':>10}{'draw ms':>10}{'worst ms':>10}")
+    for name, use_store in (("objects", False), ("store", True)):
+        game = Game(headless=True)
+        game.use_ghost_store = use_store
+        game.start_session(SWARM_LEVEL, seed=0, record=False)
+        camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+        map_width = game.map.width * TILE_SIZE
+        map_height = game.map.height * TILE_SIZE
+        update = draw = worst = 0
+        for tick in range(ticks):
+            start_time = time.perf_counter()
+            game.update_game()
+            middle_time = time.perf_counter()
+            camera.follow(game.pacman.x, game.pacman.y, map_width, map_height)
+            if game.ghost_store is not None:
+                game.ghost_store.draw(screen, 0.5, camera)
+            else:
+                for ghost in game.ghosts:
+                    if camera.is_visible(ghost.x, ghost.y):
+                        ghost.draw(screen, 0.5, camera)
+            end_time = time.perf_counter()
+            update += middle_time - start_time
+            draw += end_time - middle_time
+            worst = max(worst, end_time - start_time)
+        print(f"{name:<10}{update * 1000 / ticks:>10.3f}{draw * 1000 / ticks:>10.3f}{worst * 1000:>10.2f}")
+
+def bench_team(repeat):
+    """TEAM planner searching in the game's process and in an AIWorker, normally and with
+    heavy 50 ms searches: rollouts per second, update time per tick with ticks played
+    in real time, ticks over 1/FPS, and the age of the worker's moves"""
+    from game import Game
+    from autopilot import PacmanAutopilot
+    ticks = repeat * 15
+    tick_time = 1.0 / FPS
+    print(f"{'planner':<15}{'rollouts/s':>11}{'tick ms':>9}{'worst ms':>10}{'slow ticks':>11}{'age ticks':>10}{'late':>6}")
+    for name, worker, budget_ms in (("process", False, TEAM_PLANNER_BUDGET_MS), ("process heavy", False, 50),
+                                    ("worker", True, TEAM_PLANNER_WORKER_BUDGET_MS), ("worker heavy", True, 50)):
+        game = Game(headless=True)
+        game.team_planner = TeamPlanner(budget_ms, worker=worker, worker_budget_ms=budget_ms)
+        game.team_planner.attach(game)
+        game.ghost_personalities = ['TEAM'] * 4
+        game.start_session(1, seed=0, record=False)
+        autopilot = PacmanAutopilot()
+        total = worst = 0
+        slow = 0
+        for tick in range(ticks):
+            if game.current_state != 'PLAYING':
+                game.start_session(1, seed=tick, record=False)
+            autopilot(game)
+            start_time = time.perf_counter()
+            game.update_game()
+            elapsed = time.perf_counter() - start_time
+            total += elapsed
+            worst = max(worst, elapsed)
+            if elapsed > tick_time:
+                slow += 1
+            # Play in real time so the worker has the time it would have in a window
+            time.sleep(max(0.0, tick_time - elapsed))
+        planner = game.team_planner
+        print(f"{name:<15}{planner.rollouts_per_second():>11,.0f}{total * 1000 / ticks:>9.3f}{worst * 1000:>10.2f}"
+              f"{slow:>11}{planner.average_staleness():>10.1f}{planner.late:>6}")
+        planner.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the game engine")
+    parser.add_argument('benchmark', choices=['decisions', 'map_draw', 'map_load', 'junctions', 'collisions', 'viewport',
+                                              'paths', 'chase', 'flee', 'scheduler', 'swarm', 'team'])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--pellets', type=int, default=0, help="power pellets to add for map_draw")
+    args = parser.parse_args()
+
+    if args.benchmark == 'decisions':
+        bench_decisions(args.repeat)
+    elif args.benchmark == 'map_draw':
+        bench_map_draw(args.repeat, args.pellets)
+    elif args.benchmark == 'map_load':
+        bench_map_load(args.repeat)
+    elif args.benchmark == 'junctions':
+        bench_junctions(args.repeat)
+    elif args.benchmark == 'collisions':
+        bench_collisions(args.repeat)
+    elif args.benchmark == 'viewport':
+        bench_viewport(args.repeat)
+    elif args.benchmark == 'paths':
+        bench_paths(args.repeat)
+    elif args.benchmark == 'chase':
+        bench_chase(args.repeat)
+    elif args.benchmark == 'flee':
+        bench_chase(args.repeat, scared=True)
+    elif args.benchmark == 'scheduler':
+        bench_scheduler(args.repeat)
+    elif args.benchmark == 'swarm':
+        bench_swarm(args.repeat)
+    elif args.benchmark == 'team':
+        bench_team(args.repeat)
+
+if __name__ == '__main__':
+    main()
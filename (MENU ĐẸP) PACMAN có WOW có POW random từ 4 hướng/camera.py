@@ -0,0 +1,25 @@
+from settings import *
+
+class Camera:
+    """Viewport onto a map bigger than the game area.
+
+    x, y is the map pixel shown at the top-left corner of the view. follow
+    keeps a point in the middle of the view without scrolling past the map
+    edges; maps smaller than the view stay at the top-left corner.
+    """
+
+    def __init__(self, view_width, view_height):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.x = 0
+        self.y = 0
+
+    def follow(self, target_x, target_y, map_width, map_height):
+        center_x = int(target_x) + TILE_SIZE // 2
+        center_y = int(target_y) + TILE_SIZE // 2
+        self.x = max(0, min(center_x - self.view_width // 2, map_width - self.view_width))
+        self.y = max(0, min(center_y - self.view_height // 2, map_height - self.view_height))
+
+    def is_visible(self, x, y, size=TILE_SIZE):
+        return (x + size > self.x and x < self.x + self.view_width and
+                y + size > self.y and y < self.y + self.view_height)
@@ -0,0 +1,82 @@
+import os
+from collections import deque
+import numpy as np
+from settings import *
+
+# Stored for tile pairs with no path between them
+UNREACHABLE = 0xFFFF
+
+def build_walk_index(game_map):
+    """Number the walkable tiles of a map in row-major order.
+
+    Returns a list with one entry per grid cell (see Map.index) holding the
+    tile's number, or -1 for walls and the border.
+    """
+    walk_index = [-1] * len(game_map.tiles)
+    count = 0
+    for tile_y in range(game_map.height):
+        for tile_x in range(game_map.width):
+            if not game_map.is_wall(tile_x, tile_y):
+                walk_index[game_map.index(tile_x, tile_y)] = count
+                count += 1
+    return walk_index, count
+
+def compute_distance_table(game_map, walk_index, count):
+    """BFS from every walkable tile, returns a count x count uint16 matrix"""
+    # Neighbour lists by tile number
+    cells = [0] * count
+    for index, number in enumerate(walk_index):
+        if number >= 0:
+            cells[number] = index
+    stride = game_map.stride
+    neighbours = []
+    for index in cells:
+        neighbours.append([walk_index[other] for other in (index - stride, index + stride, index - 1, index + 1)
+                           if walk_index[other] >= 0])
+
+    table = np.full((count, count), UNREACHABLE, dtype=np.uint16)
+    for source in range(count):
+        distance = [UNREACHABLE] * count
+        distance[source] = 0
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            next_distance = distance[current] + 1
+            for other in neighbours[current]:
+                if distance[other] == UNREACHABLE:
+                    distance[other] = next_distance
+                    queue.append(other)
+        table[source] = distance
+    return table
+
+def load_distance_table(game_map, cache_dir=CACHE_DIR):
+    """Distance table of a map, memory-mapped from the cache or computed and saved.
+
+    The cache file is keyed by the map's content hash. A cache_dir of None
+    computes the table without saving it. Returns the walk index (see
+    build_walk_index) and the table.
+    """
+    walk_index, count = build_walk_index(game_map)
+    if cache_dir is None:
+        return walk_index, compute_distance_table(game_map, walk_index, count)
+    filename = os.path.join(cache_dir, f"distances_{game_map.content_hash}.npy")
+
+    if os.path.exists(filename):
+        try:
+            table = np.load(filename, mmap_mode='r')
+            if table.shape == (count, count) and table.dtype == np.uint16:
+                return walk_index, table
+        except (OSError, ValueError):
+            pass
+
+    table = compute_distance_table(game_map, walk_index, count)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write under a temporary name first, other processes may be loading the same level
+        temp_filename = f"{filename}.{os.getpid()}.tmp"
+        with open(temp_filename, 'wb') as f:
+            np.save(f, table)
+        os.replace(temp_filename, filename)
+    except OSError:
+        pass
+    return walk_index, table
@@ -0,0 +1,153 @@
+from collections import deque
+from settings import *
+try:
+    from distances import UNREACHABLE as TABLE_UNREACHABLE
+except ImportError:  # no numpy, maps have no distance table
+    TABLE_UNREACHABLE = None
+
+# Distance of tiles the search never reached
+UNREACHED = -1
+
+class FlowField:
+    """Maze distance from every tile to one target tile, shared by all ghosts.
+
+    update only notes the target tile. The field is made on the first read
+    after the target moved or a wall changed (see Map.layout_version): on
+    maps with a distance table it is the target's row of the table, on
+    others a breadth-first search from the target over Map.exits, going no
+    further than FLOW_FIELD_RADIUS tiles.
+    Ghosts the field does not reach search themselves. best_move then reads
+    a ghost's next step off the field, so chasing costs the same however
+    many ghosts read it. Grid cells are identified by Map.index.
+    """
+
+    def __init__(self, game_map):
+        self.map = game_map
+        self.target = None
+        # Target and Map.layout_version the current distances were made for
+        self.built = None
+        self.built_version = None
+        # Distances by walkable tile number (see Map.walk_index) when they come
+        # from the distance table, by Map.index otherwise
+        self.distances = None
+        self.walk_index = None
+        self.updates = 0
+        # Map.index offset of the neighbour behind each exit bit
+        stride = game_map.stride
+        self.steps = [(EXIT_BITS[direction], dy * stride + dx) for dx, dy, direction in DIRECTIONS]
+
+    def update(self, tile_x, tile_y):
+        self.target = (tile_x, tile_y)
+
+    def build(self):
+        self.built = self.target
+        self.built_version = self.map.layout_version
+        self.distances = None
+        self.walk_index = None
+        game_map = self.map
+        start = game_map.index(*self.target)
+        if not (0 <= start < len(game_map.tiles)) or game_map.tiles[start] == WALL_CODE:
+            # Target on a wall or off the map, readers fall back to their own search
+            return
+
+        self.updates += 1
+        if game_map.distance_table is not None:
+            number = game_map.walk_index[start]
+            if number >= 0:
+                self.distances = game_map.distance_table[number].tolist()
+                self.walk_index = game_map.walk_index
+            return
+
+        distances = {start: 0}
+        exits = game_map.exits
+        steps = self.steps
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            next_distance = distances[current] + 1
+            if next_distance > FLOW_FIELD_RADIUS:
+                break
+            bits = exits[current]
+            for bit, offset in steps:
+                if bits & bit:
+                    other = current + offset
+                    if other not in distances:
+                        distances[other] = next_distance
+                        queue.append(other)
+        self.distances = distances
+
+    def covers(self, tile_x, tile_y):
+        """Whether the field is for this target tile, making it if need be"""
+        if self.target != (tile_x, tile_y):
+            return False
+        if self.built != self.target or self.built_version != self.map.layout_version:
+            self.build()
+        return self.distances is not None
+
+    def distance_at(self, index):
+        """Distance from a Map.index cell to the target, UNREACHED if the field does not reach it"""
+        if self.walk_index is None:
+            return self.distances.get(index, UNREACHED)
+        number = self.walk_index[index]
+        if number < 0:
+            return UNREACHED
+        distance = self.distances[number]
+        return UNREACHED if distance == TABLE_UNREACHABLE else distance
+
+    def distance(self, tile_x, tile_y):
+        """Maze distance from a tile to the target, None if the field does not reach the tile"""
+        distance = self.distance_at(self.map.index(tile_x, tile_y))
+        return None if distance == UNREACHED else distance
+
+    def best_move(self, tile_x, tile_y):
+        """First move in DIRECTIONS order that gets one tile closer to the target.
+
+        This is the move Ghost.choose_closest_move picks. Returns None on the
+        target itself and on tiles the field does not reach.
+        """
+        game_map = self.map
+        distance = self.distance_at(game_map.index(tile_x, tile_y))
+        if distance <= 0:
+            return None
+        stride = game_map.stride
+        for move in game_map.get_moves(tile_x, tile_y):
+            if self.distance_at((move[1] + 1) * stride + move[0] + 1) == distance - 1:
+                return move
+        return None
+
+class SafetyField:
+    """How safe every tile is from Pac-Man, for scared ghosts.
+
+    Safety is the maze distance from Pac-Man minus the tile's dead-end
+    penalty (see Map.build_dead_ends). The distances are those of the chase
+    FlowField, so both are made together after Pac-Man changes tile. The
+    penalties are kept by the map, which works them out on the first
+    scared decision.
+    """
+
+    def __init__(self, chase_field):
+        self.chase_field = chase_field
+
+    def covers(self, tile_x, tile_y):
+        return self.chase_field.covers(tile_x, tile_y)
+
+    def safest_move(self, moves):
+        """The move to the safest tile, the first in DIRECTIONS order on ties.
+
+        None if one of the moves cannot reach Pac-Man.
+        """
+        distance_at = self.chase_field.distance_at
+        penalties = self.chase_field.map.get_dead_ends()
+        stride = self.chase_field.map.stride
+        best_move = None
+        best_safety = None
+        for move in moves:
+            index = (move[1] + 1) * stride + move[0] + 1
+            distance = distance_at(index)
+            if distance == UNREACHED:
+                return None
+            safety = distance - penalties[index]
+            if best_move is None or safety > best_safety:
+                best_move = move
+                best_safety = safety
+        return best_move
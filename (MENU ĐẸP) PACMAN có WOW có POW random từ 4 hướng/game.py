@@ -3,45 +3,97 @@ from ghost import Ghost
 from map import Map
 from menu import MenuSystem
 from levels import LEVELS
+from replay import InputRecorder
+from spatial_hash import SpatialHash, overlaps
+from camera import Camera
+from flow_field import FlowField, SafetyField
+from ai_scheduler import AIScheduler, DecisionQueue, staggered_delays
+from maze_gen import BackgroundMazeGenerator, generated_level, swarm_level
+from team_planner import TeamPlanner
 from settings import *
+try:
+    from ghost_store import GhostStore
+except ImportError:  # no numpy, every level keeps its ghosts as Ghost objects
+    GhostStore = None
 import pygame
 import sys
 import math
 import random
+import hashlib
+import time
 
 class Game:
-    def __init__(self):
-        pygame.init()
+    def __init__(self, headless=False, seed=None):
+        # Headless games run the simulation only: no window, fonts, menu or clock
+        self.headless = headless
+        
+        # All game randomness comes from this generator so sessions can be replayed
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.recorder = None
         
         self.game_width = 800
         self.game_height = 660
         self.ui_width = 200
         self.total_width = self.game_width + self.ui_width
+        # Scrolls the game area over maps bigger than it
+        self.camera = Camera(self.game_width, self.game_height)
         
-        self.screen = pygame.display.set_mode((self.total_width, self.game_height))
-        pygame.display.set_caption("Pac-Man Game - Smart AI")
-        self.clock = pygame.time.Clock()
+        self.screen = None
+        self.clock = None
+        self.game_surface = None
+        self.ui_surface = None
+        self.menu = None
         
-        self.game_surface = pygame.Surface((self.game_width, self.game_height))
-        self.ui_surface = pygame.Surface((self.ui_width, self.game_height))
+        if not self.headless:
+            pygame.init()
+            
+            self.screen = pygame.display.set_mode((self.total_width, self.game_height))
+            pygame.display.set_caption("Pac-Man Game - Smart AI")
+            self.clock = pygame.time.Clock()
+            
+            self.game_surface = pygame.Surface((self.game_width, self.game_height))
+            self.ui_surface = pygame.Surface((self.ui_width, self.game_height))
+            
+            self.menu = MenuSystem(self.screen)
         
-        self.menu = MenuSystem(self.screen)
         self.current_state = 'MENU'
         self.selected_level = 1
         
         self.map = None
+        self.level_data = None
+        # Levels after the last one in LEVELS are random mazes, the next one is
+        # generated while the current level is played
+        self.maze_generator = BackgroundMazeGenerator()
         self.pacman = None
         self.ghosts = []
+        # Levels with many ghosts keep their state in arrays, ghosts are views into it
+        self.use_ghost_store = GhostStore is not None
+        self.ghost_store = None
+        # Ghosts by tile cell, for collision tests against Pac-Man
+        self.entities = SpatialHash()
+        # Maze distances to Pac-Man's tile and safety from it, see flow_field.py
+        self.chase_field = None
+        self.flee_field = None
+        # Tick of each ghost's next decision, set when it arrives on a tile
+        self.decisions = DecisionQueue()
+        # Spreads ghost decisions over ticks, windowed games give it a time budget
+        self.scheduler = AIScheduler(None if self.headless else AI_DECISION_BUDGET_US)
+        # Plans for TEAM ghosts, timed per tick in windowed games and by rollout count headless
+        self.team_planner = TeamPlanner(None if self.headless else TEAM_PLANNER_BUDGET_MS,
+                                        worker=TEAM_PLANNER_WORKER and not self.headless)
+        self.team_planner.attach(self)
         
         self.score = 0
         self.lives = 3
         self.level = 1
-        self.high_score = self.load_high_score()
+        self.high_score = 0 if self.headless else self.load_high_score()
         self.power_pellet_timer = 0
         
-        self.font_large = pygame.font.Font(None, 36)
-        self.font_medium = pygame.font.Font(None, 28)
-        self.font_small = pygame.font.Font(None, 24)
+        if not self.headless:
+            self.font_large = pygame.font.Font(None, 36)
+            self.font_medium = pygame.font.Font(None, 28)
+            self.font_small = pygame.font.Font(None, 24)
         
         self.pow_button_rect = pygame.Rect(10, 325, 180, 35)
         self.pow_cooldown = 0
@@ -51,35 +103,129 @@ class Game:
         self.wow_button_rect = pygame.Rect(10, 370, 180, 35)
         self.wow_cooldown = 0
         self.wow_max_cooldown = 180  # 3 seconds at 60 FPS
+        
+        # Ghost personality for each start position, repeated if there are more ghosts
+        self.ghost_personalities = list(GHOST_PERSONALITIES)
+        
+        # Headless bookkeeping
+        self.ticks = 0
+        self.deaths = 0
+        self.campaign = True
+        # Headless campaigns carry score and lives across levels
+        self.carry_score = self.headless
 
-    def initialize_level(self, level_num):
+    def initialize_level(self, level_num, keep_score=False):
         self.selected_level = level_num
         self.level = level_num
         
-        level_data = LEVELS[level_num]
+        level_data = self.get_level_data(level_num)
+        self.level_data = level_data
         
-        self.map = Map(level_data["map"])
+        self.map = Map(level_data["map"], render=not self.headless, cache=level_data.get("cache", True))
         
         self.pacman = Pacman(self.map.pacman_start)
         self.pacman.speed = level_data["pacman_speed"]
         
-        ghost_personalities = ['AGGRESSIVE', 'AMBUSH', 'PATROL', 'RANDOM']
+        ghost_personalities = self.ghost_personalities
         ghost_colors = [RED, PINK, CYAN, ORANGE]
         
         self.ghosts = []
+        self.entities.clear()
+        ghost_count = len(self.map.ghost_starts)
+        self.ghost_store = None
+        if self.use_ghost_store and ghost_count >= GHOST_STORE_MIN_GHOSTS:
+            self.ghost_store = GhostStore(ghost_count)
+        # One search from Pac-Man's tile serves every chasing and fleeing ghost
+        self.chase_field = FlowField(self.map)
+        self.flee_field = SafetyField(self.chase_field)
+        if 'TEAM' in ghost_personalities:
+            self.team_planner.update_map()
+        self.scheduler.reset()
+        self.decisions.clear()
+        # Ghosts start out of step so their decisions fall on different ticks
+        first_decisions = staggered_delays(ghost_count)
         for i, pos in enumerate(self.map.ghost_starts):
             personality = ghost_personalities[i % len(ghost_personalities)]
             color = ghost_colors[i % len(ghost_colors)]
-            ghost = Ghost(pos, color, personality)
+            if self.ghost_store is not None:
+                ghost = self.ghost_store.add(pos, color, personality, self.rng)
+            else:
+                ghost = Ghost(pos, color, personality, self.rng)
+                self.entities.update(ghost)
             ghost.set_speed(level_data["ghost_speed"])
+            self.decisions.schedule(i, self.ticks + first_decisions[i])
+            ghost.chase_field = self.chase_field
+            ghost.flee_field = self.flee_field
+            ghost.team_planner = self.team_planner
             self.ghosts.append(ghost)
         
-        self.score = 0
-        self.lives = 3
+        if not keep_score:
+            self.score = 0
+            self.lives = 3
         self.power_pellet_timer = 0
         self.pow_cooldown = 0
         self.wow_cooldown = 0
         self.current_state = 'PLAYING'
+        
+        if self.campaign and level_num != SWARM_LEVEL and level_num + 1 not in LEVELS:
+            self.maze_generator.request(*GENERATED_LEVEL_SIZE, self.maze_seed(level_num + 1))
+
+    def get_level_data(self, level_num):
+        if level_num in LEVELS:
+            return LEVELS[level_num]
+        if level_num == SWARM_LEVEL:
+            return swarm_level(self.maze_seed(level_num))
+        rows = self.maze_generator.take(*GENERATED_LEVEL_SIZE, self.maze_seed(level_num))
+        return generated_level(level_num, rows)
+
+    def maze_seed(self, level_num):
+        """Seed of the generated maze for a level, fixed by the session seed so replays see the same mazes"""
+        return f"{self.seed}:{level_num}"
+
+    def start_session(self, level_num, seed=None, record=RECORD_INPUT):
+        """Start playing from level_num with a freshly seeded RNG.
+
+        A new seed is drawn when none is given. With record=True the player's
+        actions are logged so the session can be replayed later.
+        """
+        self.end_session()
+        
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.rng.seed(seed)
+        self.ticks = 0
+        self.deaths = 0
+        self.recorder = InputRecorder(level_num, seed, self.ghost_personalities) if record else None
+        
+        self.initialize_level(level_num)
+
+    def finish_swarm(self):
+        """Swarm level cleared: the session ends there, back to the menu when playing"""
+        if self.score > self.high_score:
+            self.high_score = self.score
+            self.save_high_score()
+        if self.headless:
+            self.current_state = STATE_WIN
+        else:
+            self.end_session()
+            self.current_state = 'MENU'
+
+    def end_session(self):
+        """Save the input log of the current session, if it is being recorded"""
+        if self.recorder is None:
+            return
+        if self.recorder.events:
+            filename = self.recorder.save(self)
+            print(f"Replay saved to {filename}")
+        self.recorder = None
+
+    def state_checksum(self):
+        """Short hash of the simulation state, used to check that replays are exact"""
+        state = [self.level, self.score, self.lives, self.ticks, self.pacman.x, self.pacman.y]
+        for ghost in self.ghosts:
+            state.extend([ghost.x, ghost.y, ghost.state, ghost.scared_timer])
+        return hashlib.sha1(repr(state).encode() + bytes(self.map.tiles)).hexdigest()[:16]
 
     def find_safe_teleport_positions(self, pacman_pos):
         pacman_tile_x = int(pacman_pos[0] // TILE_SIZE)
@@ -94,7 +240,7 @@ class Game:
             (0, -1, "UP")      # Trên
         ]
         
-        chosen_direction = random.choice(directions)
+        chosen_direction = self.rng.choice(directions)
         dir_x, dir_y, dir_name = chosen_direction
         
         print(f"POW direction chosen: {dir_name}")
@@ -131,8 +277,8 @@ class Game:
         
         # Thêm thêm vị trí ngẫu nhiên trong hướng đã chọn
         for _ in range(50):
-            offset = random.randint(-3, 3)
-            distance = random.randint(min_distance, max_distance)
+            offset = self.rng.randint(-3, 3)
+            distance = self.rng.randint(min_distance, max_distance)
             
             if dir_x != 0:
                 target_x = int(pacman_tile_x + dir_x * distance)
@@ -149,8 +295,8 @@ class Game:
         # Fallback nếu không đủ vị trí
         if len(safe_positions) < 4:
             print(f"Not enough positions in {dir_name} direction, adding more...")
-            for y in range(1, len(self.map.map_data) - 1):
-                for x in range(1, len(self.map.map_data[y]) - 1):
+            for y in range(1, self.map.height - 1):
+                for x in range(1, self.map.width - 1):
                     if self.is_basic_valid_position(x, y):
                         
                         is_in_direction = False
@@ -199,13 +345,11 @@ class Game:
 
     def is_valid_power_pellet_position(self, tile_x, tile_y):
         """Check if a position is valid for spawning a power pellet"""
-        if tile_y < 0 or tile_y >= len(self.map.map_data):
-            return False
-        if tile_x < 0 or tile_x >= len(self.map.map_data[tile_y]):
+        if not self.map.in_bounds(tile_x, tile_y):
             return False
         
         # Must not be a wall
-        return self.map.map_data[tile_y][tile_x] != WALL
+        return not self.map.is_wall(tile_x, tile_y)
 
     def activate_wow(self):
         """Activate WOW ability - spawn power pellets near Pacman"""
@@ -221,13 +365,11 @@ class Game:
             return
         
         # Choose a random position from the available ones
-        chosen_pos = random.choice(possible_positions)
+        chosen_pos = self.rng.choice(possible_positions)
         tile_x, tile_y = chosen_pos
         
         # Place power pellet at chosen position
-        row = self.map.map_data[tile_y]
-        new_row = row[:tile_x] + POWER_PELLET + row[tile_x+1:]
-        self.map.map_data[tile_y] = new_row
+        self.map.set_tile(tile_x, tile_y, POWER_PELLET)
         
         print(f"Power pellet spawned at tile ({tile_x}, {tile_y})")
         
@@ -238,22 +380,18 @@ class Game:
         tile_x = int(tile_x)
         tile_y = int(tile_y)
         
-        if tile_y <= 0 or tile_y >= len(self.map.map_data) - 1:
+        if tile_y <= 0 or tile_y >= self.map.height - 1:
             return False
-        if tile_x <= 0 or tile_x >= len(self.map.map_data[tile_y]) - 1:
+        if tile_x <= 0 or tile_x >= self.map.width - 1:
             return False
         
-        if self.map.map_data[tile_y][tile_x] == WALL:
+        if self.map.is_wall(tile_x, tile_y):
             return False
         
         wall_count = 0
         for dx in [-1, 0, 1]:
             for dy in [-1, 0, 1]:
-                check_x, check_y = int(tile_x + dx), int(tile_y + dy)
-                if (check_y < 0 or check_y >= len(self.map.map_data) or
-                    check_x < 0 or check_x >= len(self.map.map_data[check_y])):
-                    wall_count += 1
-                elif self.map.map_data[check_y][check_x] == WALL:
+                if self.map.is_wall(tile_x + dx, tile_y + dy):
                     wall_count += 1
         
         return wall_count <= 6
@@ -262,12 +400,12 @@ class Game:
         tile_x = int(tile_x)
         tile_y = int(tile_y)
         
-        if tile_y <= 0 or tile_y >= len(self.map.map_data) - 1:
+        if tile_y <= 0 or tile_y >= self.map.height - 1:
             return False
-        if tile_x <= 0 or tile_x >= len(self.map.map_data[tile_y]) - 1:
+        if tile_x <= 0 or tile_x >= self.map.width - 1:
             return False
         
-        return self.map.map_data[tile_y][tile_x] != WALL
+        return not self.map.is_wall(tile_x, tile_y)
 
     def activate_pow(self):
         if self.pow_cooldown > 0 or self.current_state != 'PLAYING':
@@ -288,7 +426,7 @@ class Game:
             return
         
         num_ghosts_to_move = min(len(self.ghosts), len(safe_positions))
-        selected_positions = random.sample(safe_positions, num_ghosts_to_move)
+        selected_positions = self.rng.sample(safe_positions, num_ghosts_to_move)
         
         for i, ghost in enumerate(self.ghosts):
             if i < len(selected_positions):
@@ -300,6 +438,7 @@ class Game:
                 ghost.tile_y = new_y // TILE_SIZE
                 ghost.is_moving = False
                 ghost.move_progress = 0
+                self.decisions.schedule(i, self.ticks)
                 print(f"Ghost {i+1} moved from {old_pos} to ({new_x}, {new_y})")
         
         self.pow_cooldown = self.pow_max_cooldown
@@ -309,9 +448,9 @@ class Game:
     def get_fallback_positions(self):
         fallback_positions = []
         
-        for y in range(2, len(self.map.map_data) - 2, 3):
-            for x in range(2, len(self.map.map_data[y]) - 2, 3):
-                if self.map.map_data[y][x] != WALL:
+        for y in range(2, self.map.height - 2, 3):
+            for x in range(2, self.map.width - 2, 3):
+                if not self.map.is_wall(x, y):
                     fallback_positions.append((x * TILE_SIZE, y * TILE_SIZE))
                     if len(fallback_positions) >= 8:
                         return fallback_positions
@@ -326,6 +465,8 @@ class Game:
             return 0
 
     def save_high_score(self):
+        if self.headless:
+            return
         try:
             with open('highscore.txt', 'w') as f:
                 f.write(str(self.high_score))
@@ -342,26 +483,27 @@ class Game:
                 if result == "quit":
                     return 'QUIT'
                 elif isinstance(result, int):
-                    self.initialize_level(result)
+                    self.start_session(result)
                     
             elif self.current_state == 'PLAYING':
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_UP or event.key == pygame.K_w:
-                        self.pacman.set_direction('UP')
+                        self.apply_action('UP')
                     elif event.key == pygame.K_DOWN or event.key == pygame.K_s:
-                        self.pacman.set_direction('DOWN')
+                        self.apply_action('DOWN')
                     elif event.key == pygame.K_LEFT or event.key == pygame.K_a:
-                        self.pacman.set_direction('LEFT')
+                        self.apply_action('LEFT')
                     elif event.key == pygame.K_RIGHT or event.key == pygame.K_d:
-                        self.pacman.set_direction('RIGHT')
+                        self.apply_action('RIGHT')
                     elif event.key == pygame.K_SPACE:
                         self.current_state = 'PAUSED'
                     elif event.key == pygame.K_ESCAPE:
                         self.current_state = 'MENU'
+                        self.end_session()
                     elif event.key == pygame.K_p:
-                        self.activate_pow()
+                        self.apply_action('POW')
                     elif event.key == pygame.K_o:
-                        self.activate_wow()
+                        self.apply_action('WOW')
                 
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:
@@ -369,9 +511,9 @@ class Game:
                         if mouse_pos[0] >= self.game_width:
                             adjusted_pos = (mouse_pos[0] - self.game_width, mouse_pos[1])
                             if self.pow_button_rect.collidepoint(adjusted_pos):
-                                self.activate_pow()
+                                self.apply_action('POW')
                             elif self.wow_button_rect.collidepoint(adjusted_pos):
-                                self.activate_wow()
+                                self.apply_action('WOW')
                         
             elif self.current_state == 'PAUSED':
                 if event.type == pygame.KEYDOWN:
@@ -379,11 +521,12 @@ class Game:
                         self.current_state = 'PLAYING'
                     elif event.key == pygame.K_ESCAPE:
                         self.current_state = 'MENU'
+                        self.end_session()
                         
             elif self.current_state == 'GAME_OVER':
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r:
-                        self.initialize_level(self.selected_level)
+                        self.start_session(self.selected_level)
                     elif event.key == pygame.K_m or event.key == pygame.K_ESCAPE:
                         self.current_state = 'MENU'
                     elif event.key == pygame.K_q:
@@ -391,6 +534,32 @@ class Game:
         
         return None
 
+    def apply_action(self, action):
+        """Apply one player action during play, logging it when recording.
+
+        'DEFER <ghost index>' replays a ghost decision the AI scheduler held
+        back in the recorded session, 'PLAN <ghost index> <rollouts>' the
+        length of a TEAM ghost's search and 'MOVE <ghost index> <direction>'
+        a TEAM move planned by the AI worker.
+        """
+        if self.recorder is not None:
+            self.recorder.record(self.ticks, action)
+        
+        if action in ('UP', 'DOWN', 'LEFT', 'RIGHT'):
+            self.pacman.set_direction(action)
+        elif action == 'POW':
+            self.activate_pow()
+        elif action == 'WOW':
+            self.activate_wow()
+        elif action.startswith('DEFER '):
+            self.scheduler.defer(int(action.split()[1]))
+        elif action.startswith('PLAN '):
+            _, index, rollouts = action.split()
+            self.team_planner.force(int(index), int(rollouts))
+        elif action.startswith('MOVE '):
+            _, index, direction = action.split()
+            self.team_planner.force_move(int(index), direction)
+
     def update(self):
         if self.current_state == 'MENU':
             self.menu.update()
@@ -404,9 +573,9 @@ class Game:
         if self.wow_cooldown > 0:
             self.wow_cooldown -= 1
             
-        self.pacman.move(self.map.map_data)
+        self.pacman.move(self.map)
         
-        eaten_item = self.pacman.eat(self.map.map_data)
+        eaten_item = self.pacman.eat(self.map)
         if eaten_item == 'DOT':
             self.score += SCORE_DOT
         elif eaten_item == 'POWER_PELLET':
@@ -423,12 +592,46 @@ class Game:
             if self.power_pellet_timer == 0:
                 self.pacman.set_power_mode(False)
 
-        for ghost in self.ghosts:
-            ghost.move(self.pacman.pos, self.map.map_data, self.pacman.direction)
+        self.chase_field.update(int(self.pacman.x) // TILE_SIZE, int(self.pacman.y) // TILE_SIZE)
+        ghosts = self.ghosts
+        store = self.ghost_store
+        if store is not None:
+            store.begin_tick()
+        else:
+            for ghost in ghosts:
+                ghost.begin_tick()
+        self.team_planner.collect()
+        due = [(i, ghosts[i]) for i in self.decisions.pop_due(self.ticks) if not ghosts[i].is_moving]
+        if due:
+            deferred = self.scheduler.run(due, self.decide_ghost_move)
+            for i in deferred:
+                self.decisions.schedule(i, self.ticks + 1)
+            # Deferrals depend on timing, replays need them to come out the same
+            if deferred and self.recorder is not None:
+                for i in deferred:
+                    self.recorder.record(self.ticks, f"DEFER {i}")
+            # So do the rollouts timed TEAM searches got through and the worker's moves
+            planned = self.team_planner.take_planned()
+            if planned and self.recorder is not None:
+                for event in planned:
+                    self.recorder.record(self.ticks, event)
+        # Arrived ghosts decide from the next tick on
+        if store is not None:
+            for i in store.continue_moves():
+                self.decisions.schedule(i, self.ticks + 1 + ghosts[i].think_delay())
+        else:
+            for i, ghost in enumerate(ghosts):
+                if ghost.continue_move():
+                    self.decisions.schedule(i, self.ticks + 1 + ghost.think_delay())
+                self.entities.update(ghost)
 
-            if ghost.check_pacman_collision(self.pacman.get_rect()):
+        # Ghosts touching Pac-Man are handled in ghost order and re-checked, a
+        # death moves everyone back to the start
+        for ghost in self.colliding_ghosts():
+            if overlaps(ghost.x, ghost.y, self.pacman.x, self.pacman.y):
                 if ghost.state == 'NORMAL':
                     self.lives -= 1
+                    self.deaths += 1
                     self.reset_positions()
                     if self.lives <= 0:
                         self.current_state = 'GAME_OVER'
@@ -445,14 +648,88 @@ class Game:
                         ghost.color = ghost.original_color
 
         if self.map.count_remaining_dots() == 0:
-            next_level = self.level + 1
-            if next_level in LEVELS:
-                self.initialize_level(next_level)
+            if self.level == SWARM_LEVEL:
+                self.finish_swarm()
+            elif self.headless and not self.campaign:
+                self.current_state = STATE_WIN
             else:
-                self.current_state = 'MENU'
+                self.initialize_level(self.level + 1, keep_score=self.carry_score)
 
         if self.score > 0 and self.score % SCORE_BONUS_LIFE == 0:
             self.lives += 1
+        
+        self.ticks += 1
+        if self.current_state != 'PLAYING':
+            self.end_session()
+
+    def colliding_ghosts(self):
+        """Ghosts overlapping Pac-Man, in ghost order"""
+        if self.ghost_store is not None:
+            return self.ghost_store.colliding(self.pacman.x, self.pacman.y)
+        # Only ghosts in the cells around Pac-Man can touch it
+        hits = self.entities.colliding(self.pacman.x, self.pacman.y)
+        if len(hits) > 1:
+            hits.sort(key=self.ghosts.index)
+        return hits
+
+    def decide_ghost_move(self, index, ghost):
+        if not ghost.decide(self.pacman.pos, self.map):
+            # Nowhere to go, look again later
+            self.decisions.schedule(index, self.ticks + GHOST_DECISION_INTERVAL)
+        elif ghost.personality == 'TEAM':
+            self.team_planner.prepare(index, ghost)
+
+    def fast_forward(self, max_ticks):
+        """Skip the coming ticks in which only countdowns would run, up to tick max_ticks.
+
+        That is while Pac-Man stands still and every ghost waits for its next
+        decision. The skipped ticks are counted and the timers run down as if
+        they had been played, stopping short of the next ghost decision and
+        of power pellet and scared timers running out. Only for callers that
+        give no input in between. Returns the number of ticks skipped.
+        """
+        pacman = self.pacman
+        if self.current_state != 'PLAYING' or not pacman.is_still(self.map):
+            return 0
+        # Pac-Man's tile has been eaten and made the flow field's target already
+        tile_x = int(pacman.x) // TILE_SIZE
+        tile_y = int(pacman.y) // TILE_SIZE
+        if self.chase_field.target != (tile_x, tile_y):
+            return 0
+        center_x = int((pacman.x + TILE_SIZE // 2) // TILE_SIZE)
+        center_y = int((pacman.y + TILE_SIZE // 2) // TILE_SIZE)
+        if self.map.get_tile(center_x, center_y) in (DOT, POWER_PELLET):
+            return 0
+        
+        skip = max_ticks - self.ticks
+        next_decision = self.decisions.next_tick()
+        if next_decision is not None:
+            skip = min(skip, next_decision - self.ticks)
+        if self.power_pellet_timer > 0:
+            skip = min(skip, self.power_pellet_timer - 1)
+        for ghost in self.ghosts:
+            if ghost.is_moving:
+                return 0
+            if ghost.state == 'SCARED':
+                skip = min(skip, ghost.scared_timer - 1)
+        if skip <= 0:
+            return 0
+        if self.colliding_ghosts():
+            return 0
+        
+        self.pow_cooldown = max(0, self.pow_cooldown - skip)
+        self.wow_cooldown = max(0, self.wow_cooldown - skip)
+        if self.power_pellet_timer > 0:
+            self.power_pellet_timer -= skip
+        pacman.prev_x, pacman.prev_y = pacman.x, pacman.y
+        for ghost in self.ghosts:
+            ghost.prev_x, ghost.prev_y = ghost.x, ghost.y
+            if ghost.state == 'SCARED':
+                ghost.scared_timer -= skip
+        if self.score > 0 and self.score % SCORE_BONUS_LIFE == 0:
+            self.lives += skip
+        self.ticks += skip
+        return skip
 
     def reset_positions(self):
         if self.map and self.map.pacman_start:
@@ -472,14 +749,21 @@ class Game:
                 ghost.path = []
                 ghost.path_index = 0
 
-    def draw_game(self):
+    def draw_game(self, alpha=1.0):
         self.game_surface.fill(BLACK)
         
         if self.map and self.pacman:
-            self.map.draw(self.game_surface)
-            self.pacman.draw(self.game_surface)
-            for ghost in self.ghosts:
-                ghost.draw(self.game_surface)
+            pacman_x, pacman_y = self.pacman.render_pos(alpha)
+            self.camera.follow(pacman_x, pacman_y, self.map.width * TILE_SIZE, self.map.height * TILE_SIZE)
+            
+            self.map.draw(self.game_surface, self.camera)
+            self.pacman.draw(self.game_surface, alpha, self.camera)
+            if self.ghost_store is not None:
+                self.ghost_store.draw(self.game_surface, alpha, self.camera)
+            else:
+                for ghost in self.ghosts:
+                    if self.camera.is_visible(ghost.x, ghost.y):
+                        ghost.draw(self.game_surface, alpha, self.camera)
             
             if self.current_state == 'PAUSED':
                 overlay = pygame.Surface((self.game_width, self.game_height))
@@ -503,7 +787,7 @@ class Game:
         y_pos += 50
         
         if self.current_state in ['PLAYING', 'PAUSED', 'GAME_OVER']:
-            level_name = LEVELS[self.selected_level]["name"]
+            level_name = self.level_data["name"]
             level_text = self.font_medium.render(f"Level {self.level}:", True, WHITE)
             self.ui_surface.blit(level_text, (10, y_pos))
             y_pos += 25
@@ -548,7 +832,7 @@ class Game:
             text_rect = pow_text.get_rect(center=self.pow_button_rect.center)
             self.ui_surface.blit(pow_text, text_rect)
         else:
-            cooldown_seconds = self.pow_cooldown // 60 + 1
+            cooldown_seconds = self.pow_cooldown // FPS + 1
             cooldown_text = self.font_small.render(f"Wait {cooldown_seconds}s", True, WHITE)
             text_rect = cooldown_text.get_rect(center=self.pow_button_rect.center)
             self.ui_surface.blit(cooldown_text, text_rect)
@@ -565,18 +849,31 @@ class Game:
         
         y_pos += 90
         
-        ai_info_text = self.font_small.render("AI STATUS", True, WHITE)
+        ai_info_text = self.font_small.render("AI STATUS (new/hit)", True, WHITE)
         self.ui_surface.blit(ai_info_text, (10, y_pos))
         y_pos += 20
         
         if self.ghosts:
             for i, ghost in enumerate(self.ghosts[:4]):
-                danger_level = ghost.evaluate_danger_level(self.pacman.pos) if hasattr(ghost, 'evaluate_danger_level') else 'LOW'
-                ai_text = f"G{i+1}: {ghost.personality[:3]} ({danger_level[:1]})"
+                # Mean decision time of the personality, then path searches/cache hits
+                decision_us = self.scheduler.average_us(ghost.personality)
+                ai_text = (f"G{i+1}: {ghost.personality[:3]} {decision_us:.0f}us "
+                           f"{ghost.path_recomputes}/{ghost.path_hits}")
                 color = ghost.original_color if ghost.state == 'NORMAL' else (0, 0, 255)
                 ai_surface = self.font_small.render(ai_text, True, color)
                 self.ui_surface.blit(ai_surface, (10, y_pos))
                 y_pos += 16
+            
+            planner_text = None
+            if self.team_planner.worker is not None:
+                # Age in ticks of the worker's moves when used, and the ones it was too late for
+                planner_text = (f"Worker: {self.team_planner.average_staleness():.1f}t old, "
+                                f"{self.team_planner.late} late")
+            elif self.team_planner.searches:
+                planner_text = f"MCTS: {self.team_planner.rollouts_per_second():,.0f} rollouts/s"
+            if planner_text:
+                planner_surface = self.font_small.render(planner_text, True, WHITE)
+                self.ui_surface.blit(planner_surface, (10, y_pos))
         
         y_pos = self.game_height - 140
         controls_title = self.font_medium.render("CONTROLS", True, WHITE)
@@ -616,7 +913,7 @@ class Game:
         text_rect = restart_text.get_rect(center=(self.game_width//2, self.game_height//2 + 80))
         self.game_surface.blit(restart_text, text_rect)
 
-    def draw(self):
+    def draw(self, alpha=1.0):
         self.screen.fill(BLACK)
         
         if self.current_state == 'MENU':
@@ -625,7 +922,7 @@ class Game:
             if self.current_state == 'GAME_OVER':
                 self.draw_game_over()
             else:
-                self.draw_game()
+                self.draw_game(alpha)
             
             self.draw_ui()
             
@@ -635,15 +932,79 @@ class Game:
         pygame.display.flip()
 
     def run(self):
+        # Fixed timestep: the simulation advances in ticks of exactly 1/FPS
+        # seconds however fast frames are drawn, and drawing interpolates
+        # between the last two ticks
+        tick_time = 1.0 / FPS
+        accumulator = 0.0
+        previous_time = time.perf_counter()
+        drawn_state = None
+        
         running = True
         while running:
+            now = time.perf_counter()
+            accumulator += min(now - previous_time, MAX_FRAME_TIME)
+            previous_time = now
+            
             result = self.handle_events()
             if result == 'QUIT':
                 running = False
             
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
+            while accumulator >= tick_time:
+                self.update()
+                accumulator -= tick_time
+            
+            # Paused and game over screens are static, only redraw them when they change
+            static = self.current_state in ('PAUSED', 'GAME_OVER')
+            if not static or self.current_state != drawn_state:
+                self.draw(accumulator / tick_time)
+                drawn_state = self.current_state
+                self.clock.tick(RENDER_FPS_LIMIT)
+            else:
+                pygame.time.wait(int((tick_time - accumulator) * 1000) + 1)
         
+        self.end_session()
+        self.team_planner.close()
         pygame.quit()
-        sys.exit()
\ No newline at end of file
+        sys.exit()
+
+    def run_headless(self, level_num=1, max_ticks=HEADLESS_MAX_TICKS, controller=None, campaign=False,
+                     personalities=None, seed=None):
+        """Play a game without rendering as fast as possible and return its result.
+
+        controller is called once per tick with the game and may steer Pac-Man
+        (see autopilot.PacmanAutopilot). With campaign=True cleared levels
+        advance to the next one, otherwise clearing the level wins the game.
+        personalities overrides the ghost personality mix and seed makes the
+        game reproducible. Without a controller, stretches where nothing
+        moves are skipped over (see fast_forward).
+        """
+        self.campaign = campaign
+        if personalities:
+            self.ghost_personalities = list(personalities)
+        self.start_session(level_num, seed, record=False)
+        
+        while self.current_state == 'PLAYING' and self.ticks < max_ticks:
+            if controller is not None:
+                controller(self)
+            elif self.fast_forward(max_ticks):
+                continue
+            self.update_game()
+        
+        if self.current_state == STATE_WIN:
+            outcome = STATE_WIN
+        elif self.current_state == 'GAME_OVER':
+            outcome = STATE_GAME_OVER
+        else:
+            outcome = 'TIMEOUT'
+        
+        return {
+            'level': self.level,
+            'score': self.score,
+            'lives': self.lives,
+            'ticks': self.ticks,
+            'outcome': outcome,
+            'deaths': self.deaths,
+            'dots_eaten': self.map.total_dots - self.map.count_remaining_dots(),
+            'dots_left': self.map.count_remaining_dots()
+        }
\ No newline at end of file
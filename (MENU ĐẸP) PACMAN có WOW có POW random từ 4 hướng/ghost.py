@@ -4,7 +4,7 @@ from settings import *
 import random
 
 class Ghost:
-    def __init__(self, start_pos, color=RED, personality='AGGRESSIVE'):
+    def __init__(self, start_pos, color=RED, personality='AGGRESSIVE', rng=None):
         self.start_tile_x = start_pos[0] // TILE_SIZE
         self.start_tile_y = start_pos[1] // TILE_SIZE
         
@@ -14,6 +14,10 @@ class Ghost:
         self.x = self.tile_x * TILE_SIZE
         self.y = self.tile_y * TILE_SIZE
         
+        # Position before the last simulation tick, for interpolated drawing
+        self.prev_x = self.x
+        self.prev_y = self.y
+        
         self.speed = 1
         self.state = 'NORMAL'
         self.color = color
@@ -28,145 +32,229 @@ class Ghost:
         self.move_progress = 0
         self.is_moving = False
         
-        self.decision_timer = 0
+        # Cached path to the personality's target tile: the moves still to make
+        # start at path_index, path_start is the tile the path leaves from
+        self.path = []
+        self.path_index = 0
+        self.path_start = None
+        self.path_target = None
+        self.path_recomputes = 0
+        self.path_hits = 0
+        
+        # Flow fields towards and away from Pac-Man's tile shared by all ghosts
+        # of a game, set and kept up to date by Game. Without them every ghost
+        # searches itself.
+        self.chase_field = None
+        self.flee_field = None
+        # TeamPlanner of the game for TEAM ghosts, see team_planner.py
+        self.team_planner = None
+        
+        # Shared seeded generator of the game session, the global one by default
+        self.rng = rng if rng is not None else random
 
     def set_speed(self, speed):
         self.speed = speed
 
-    def move(self, pacman_pos, map_data, pacman_direction='STOP'):
+    def move(self, pacman_pos, game_map, pacman_direction='STOP'):
+        """Step one tick on its own, deciding whenever the ghost stands on a tile"""
+        self.begin_tick()
+        if not self.is_moving:
+            self.decide(pacman_pos, game_map)
+        self.continue_move()
+
+    # move in three steps, Game runs the decisions in between through its
+    # DecisionQueue and AIScheduler
+
+    def begin_tick(self):
+        self.prev_x, self.prev_y = self.x, self.y
+        
         if self.state == 'SCARED':
             self.scared_timer -= 1
             if self.scared_timer <= 0:
                 self.state = 'NORMAL'
                 self.color = self.original_color
-        
-        self.decision_timer += 1
-        
-        if not self.is_moving:
-            if self.decision_timer >= 20:
-                self.decide_next_move(pacman_pos, map_data)
-                self.decision_timer = 0
-        
+
+    def decide(self, pacman_pos, game_map):
+        """Pick the next move, returns whether the ghost set off"""
+        self.decide_next_move(pacman_pos, game_map)
+        return self.is_moving
+
+    def continue_move(self):
+        """Returns True on the tick the ghost arrives at its target tile"""
         if self.is_moving:
-            self.update_movement()
+            return self.update_movement()
+        return False
 
-    def decide_next_move(self, pacman_pos, map_data):
+    def think_delay(self):
+        return GHOST_THINK_DELAYS.get(self.personality, 0)
+
+    def decide_next_move(self, pacman_pos, game_map):
         pacman_tile_x = pacman_pos[0] // TILE_SIZE
         pacman_tile_y = pacman_pos[1] // TILE_SIZE
         
-        possible_moves = self.get_valid_moves(map_data)
+        possible_moves = self.get_valid_moves(game_map)
         
         if not possible_moves:
             return
         
+        # A corridor only goes on one way, decisions are made at junctions.
+        # Scared ghosts in a dead-end pocket may turn back out of it.
+        forward = game_map.corridor_move(self.tile_x, self.tile_y, self.direction)
+        if forward and self.state == 'SCARED' and game_map.dead_end_penalty(self.tile_x, self.tile_y):
+            forward = None
+        if forward:
+            if self.path_index < len(self.path) and self.path[self.path_index] == forward:
+                self.path_index += 1
+            self.start_move_to(forward[0], forward[1], forward[2])
+            return
+        
         if self.state == 'SCARED':
-            best_move = self.choose_flee_move(possible_moves, pacman_tile_x, pacman_tile_y)
+            best_move = self.choose_flee_move(possible_moves, pacman_tile_x, pacman_tile_y, game_map)
         else:
             if self.personality == 'AGGRESSIVE':
-                best_move = self.choose_aggressive_move(possible_moves, pacman_tile_x, pacman_tile_y)
+                best_move = self.choose_aggressive_move(possible_moves, pacman_tile_x, pacman_tile_y, game_map)
             elif self.personality == 'AMBUSH':
-                best_move = self.choose_ambush_move(possible_moves, pacman_tile_x, pacman_tile_y)
+                best_move = self.choose_ambush_move(possible_moves, pacman_tile_x, pacman_tile_y, game_map)
             elif self.personality == 'PATROL':
-                best_move = self.choose_patrol_move(possible_moves, pacman_tile_x, pacman_tile_y)
+                best_move = self.choose_patrol_move(possible_moves, pacman_tile_x, pacman_tile_y, game_map)
+            elif self.personality == 'TEAM':
+                best_move = self.choose_team_move(possible_moves, pacman_tile_x, pacman_tile_y, game_map)
             else:
-                best_move = self.choose_random_move(possible_moves, pacman_tile_x, pacman_tile_y)
+                best_move = self.choose_random_move(possible_moves, pacman_tile_x, pacman_tile_y, game_map)
         
         if best_move:
             self.start_move_to(best_move[0], best_move[1], best_move[2])
 
-    def get_valid_moves(self, map_data):
-        moves = []
-        directions = [
-            (0, -1, 'UP'),
-            (0, 1, 'DOWN'),
-            (-1, 0, 'LEFT'),
-            (1, 0, 'RIGHT')
-        ]
-        
-        for dx, dy, direction in directions:
-            new_tile_x = self.tile_x + dx
-            new_tile_y = self.tile_y + dy
-            
-            if self.is_valid_tile(new_tile_x, new_tile_y, map_data):
-                moves.append((new_tile_x, new_tile_y, direction))
-        
-        return moves
+    def get_valid_moves(self, game_map):
+        # Precomputed by Map.build_exits, shared and read-only
+        return game_map.get_moves(self.tile_x, self.tile_y)
 
-    def is_valid_tile(self, tile_x, tile_y, map_data):
-        if tile_y < 0 or tile_y >= len(map_data):
-            return False
-        if tile_x < 0 or tile_x >= len(map_data[tile_y]):
-            return False
-        
-        return map_data[tile_y][tile_x] != WALL
+    def is_valid_tile(self, tile_x, tile_y, game_map):
+        return game_map.in_bounds(tile_x, tile_y) and not game_map.is_wall(tile_x, tile_y)
+
+    # Distances below are maze distances from Map.distance, which falls back
+    # to Manhattan distance for targets off the walkable maze
 
-    def choose_aggressive_move(self, moves, pacman_tile_x, pacman_tile_y):
+    def choose_closest_move(self, moves, target_x, target_y, game_map):
         best_move = None
         best_distance = float('inf')
         
         for tile_x, tile_y, direction in moves:
-            distance = abs(tile_x - pacman_tile_x) + abs(tile_y - pacman_tile_y)
+            distance = game_map.distance(tile_x, tile_y, target_x, target_y)
             if distance < best_distance:
                 best_distance = distance
                 best_move = (tile_x, tile_y, direction)
         
         return best_move
 
-    def choose_ambush_move(self, moves, pacman_tile_x, pacman_tile_y):
-        distance_to_pacman = abs(self.tile_x - pacman_tile_x) + abs(self.tile_y - pacman_tile_y)
+    def choose_path_move(self, moves, target_x, target_y, game_map):
+        """Next move along a shortest path to the walkable tile closest to the target.
+
+        The path is kept while the target tile stays the same and the ghost
+        is still on it, otherwise it is searched again. Falls back to
+        choose_closest_move when there is no path.
+        """
+        target = game_map.nearest_open_tile(target_x, target_y)
+        if target is None:
+            return self.choose_closest_move(moves, target_x, target_y, game_map)
+        
+        if target == self.path_target and self.is_on_path(game_map):
+            self.path_hits += 1
+        else:
+            self.path_recomputes += 1
+            self.path = game_map.find_path(self.tile_x, self.tile_y, target[0], target[1]) or []
+            self.path_index = 0
+            self.path_start = (self.tile_x, self.tile_y)
+            self.path_target = target
+        
+        if self.path_index < len(self.path):
+            move = self.path[self.path_index]
+            self.path_index += 1
+            return move
+        return self.choose_closest_move(moves, target[0], target[1], game_map)
+
+    def is_on_path(self, game_map):
+        """Whether the cached path still has moves, starting from the ghost's tile, and none into a wall"""
+        if self.path_index >= len(self.path):
+            return False
+        if self.path_index:
+            tile = self.path[self.path_index - 1][:2]
+        else:
+            tile = self.path_start
+        if tile != (self.tile_x, self.tile_y):
+            return False
+        move = self.path[self.path_index]
+        return not game_map.is_wall(move[0], move[1])
+
+    def distance_to_pacman(self, pacman_tile_x, pacman_tile_y, game_map):
+        field = self.chase_field
+        if field is not None and field.covers(pacman_tile_x, pacman_tile_y):
+            distance = field.distance(self.tile_x, self.tile_y)
+            if distance is not None:
+                return distance
+        return game_map.distance(self.tile_x, self.tile_y, pacman_tile_x, pacman_tile_y)
+
+    def choose_aggressive_move(self, moves, pacman_tile_x, pacman_tile_y, game_map):
+        field = self.chase_field
+        if field is not None and field.covers(pacman_tile_x, pacman_tile_y):
+            move = field.best_move(self.tile_x, self.tile_y)
+            if move:
+                return move
+        return self.choose_path_move(moves, pacman_tile_x, pacman_tile_y, game_map)
+
+    def choose_ambush_move(self, moves, pacman_tile_x, pacman_tile_y, game_map):
+        distance_to_pacman = self.distance_to_pacman(pacman_tile_x, pacman_tile_y, game_map)
         
         if distance_to_pacman < 8:
-            return self.choose_aggressive_move(moves, pacman_tile_x, pacman_tile_y)
+            return self.choose_aggressive_move(moves, pacman_tile_x, pacman_tile_y, game_map)
         else:
             target_x = pacman_tile_x + 3 if pacman_tile_x > self.tile_x else pacman_tile_x - 3
             target_y = pacman_tile_y + 3 if pacman_tile_y > self.tile_y else pacman_tile_y - 3
             
-            best_move = None
-            best_distance = float('inf')
-            
-            for tile_x, tile_y, direction in moves:
-                distance = abs(tile_x - target_x) + abs(tile_y - target_y)
-                if distance < best_distance:
-                    best_distance = distance
-                    best_move = (tile_x, tile_y, direction)
-            
-            return best_move
+            return self.choose_path_move(moves, target_x, target_y, game_map)
 
-    def choose_patrol_move(self, moves, pacman_tile_x, pacman_tile_y):
-        distance_to_pacman = abs(self.tile_x - pacman_tile_x) + abs(self.tile_y - pacman_tile_y)
+    def choose_patrol_move(self, moves, pacman_tile_x, pacman_tile_y, game_map):
+        distance_to_pacman = self.distance_to_pacman(pacman_tile_x, pacman_tile_y, game_map)
         
         if distance_to_pacman < 10:
-            return self.choose_aggressive_move(moves, pacman_tile_x, pacman_tile_y)
+            return self.choose_aggressive_move(moves, pacman_tile_x, pacman_tile_y, game_map)
         else:
             patrol_points = [(10, 10), (30, 10), (30, 25), (10, 25)]
             closest_patrol = min(patrol_points, 
-                key=lambda p: abs(p[0] - self.tile_x) + abs(p[1] - self.tile_y))
+                key=lambda p: game_map.distance(self.tile_x, self.tile_y, p[0], p[1]))
             
-            best_move = None
-            best_distance = float('inf')
-            
-            for tile_x, tile_y, direction in moves:
-                distance = abs(tile_x - closest_patrol[0]) + abs(tile_y - closest_patrol[1])
-                if distance < best_distance:
-                    best_distance = distance
-                    best_move = (tile_x, tile_y, direction)
-            
-            return best_move
+            return self.choose_path_move(moves, closest_patrol[0], closest_patrol[1], game_map)
 
-    def choose_random_move(self, moves, pacman_tile_x, pacman_tile_y):
-        if random.random() < 0.4:
-            return self.choose_aggressive_move(moves, pacman_tile_x, pacman_tile_y)
+    def choose_random_move(self, moves, pacman_tile_x, pacman_tile_y, game_map):
+        if self.rng.random() < 0.4:
+            return self.choose_aggressive_move(moves, pacman_tile_x, pacman_tile_y, game_map)
         else:
-            return random.choice(moves) if moves else None
+            return self.rng.choice(moves) if moves else None
+
+    def choose_team_move(self, moves, pacman_tile_x, pacman_tile_y, game_map):
+        # Planned together with the other TEAM ghosts, chasing alone without a planner
+        if self.team_planner is not None:
+            move = self.team_planner.plan(self)
+            if move:
+                return move
+        return self.choose_aggressive_move(moves, pacman_tile_x, pacman_tile_y, game_map)
 
-    def choose_flee_move(self, moves, pacman_tile_x, pacman_tile_y):
+    def choose_flee_move(self, moves, pacman_tile_x, pacman_tile_y, game_map):
+        # Safest = furthest from Pac-Man without running into a dead end
+        field = self.flee_field
+        if field is not None and field.covers(pacman_tile_x, pacman_tile_y):
+            best_move = field.safest_move(moves)
+            if best_move:
+                return best_move
+        
         best_move = None
-        best_distance = 0
+        best_safety = None
         
         for tile_x, tile_y, direction in moves:
-            distance = abs(tile_x - pacman_tile_x) + abs(tile_y - pacman_tile_y)
-            if distance > best_distance:
-                best_distance = distance
+            safety = (game_map.distance(tile_x, tile_y, pacman_tile_x, pacman_tile_y) -
+                      game_map.dead_end_penalty(tile_x, tile_y))
+            if best_move is None or safety > best_safety:
+                best_safety = safety
                 best_move = (tile_x, tile_y, direction)
         
         return best_move
@@ -188,6 +276,7 @@ class Ghost:
             self.y = self.tile_y * TILE_SIZE
             self.is_moving = False
             self.move_progress = 0
+            return True
         else:
             progress_ratio = self.move_progress / TILE_SIZE
             
@@ -198,6 +287,7 @@ class Ghost:
             
             self.x = start_x + (target_x - start_x) * progress_ratio
             self.y = start_y + (target_y - start_y) * progress_ratio
+            return False
 
     def set_scared(self):
         self.state = 'SCARED'
@@ -208,40 +298,55 @@ class Ghost:
         ghost_rect = pygame.Rect(self.x, self.y, TILE_SIZE, TILE_SIZE)
         return ghost_rect.colliderect(pacman_rect)
 
-    def draw(self, screen):
+    def render_pos(self, alpha=1.0):
+        """Position between the last two ticks, alpha is the fraction of a tick elapsed"""
+        # Don't slide across the map after a teleport or reset
+        if abs(self.x - self.prev_x) > TILE_SIZE or abs(self.y - self.prev_y) > TILE_SIZE:
+            return self.x, self.y
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+
+    def draw(self, screen, alpha=1.0, camera=None):
         color = self.color
         
         if self.state == 'SCARED':
             if self.scared_timer < 120 and self.scared_timer % 20 < 10:
                 color = (255, 255, 255)
         
-        body_rect = pygame.Rect(int(self.x), int(self.y), TILE_SIZE, TILE_SIZE)
-        pygame.draw.rect(screen, color, body_rect)
-        
-        eye_size = 3
-        left_eye_x = int(self.x) + 5
-        left_eye_y = int(self.y) + 5
-        right_eye_x = int(self.x) + TILE_SIZE - 5
-        right_eye_y = int(self.y) + 5
-        
-        pygame.draw.circle(screen, WHITE, (left_eye_x, left_eye_y), eye_size)
-        pygame.draw.circle(screen, WHITE, (right_eye_x, right_eye_y), eye_size)
-        
-        if self.state != 'SCARED':
-            pupil_offset = 1
-            pupil_x = pupil_y = 0
-            
-            if self.direction == 'RIGHT':
-                pupil_x = pupil_offset
-            elif self.direction == 'LEFT':
-                pupil_x = -pupil_offset
-            elif self.direction == 'UP':
-                pupil_y = -pupil_offset
-            elif self.direction == 'DOWN':
-                pupil_y = pupil_offset
-            
-            pygame.draw.circle(screen, BLACK, (left_eye_x + pupil_x, left_eye_y + pupil_y), 1)
-            pygame.draw.circle(screen, BLACK, (right_eye_x + pupil_x, right_eye_y + pupil_y), 1)
+        x, y = self.render_pos(alpha)
+        if camera:
+            x, y = x - camera.x, y - camera.y
+        draw_ghost(screen, int(x), int(y), color, self.direction, self.state == 'SCARED')
 
     def get_rect(self):
-        return pygame.Rect(int(self.x), int(self.y), TILE_SIZE, TILE_SIZE)
\ No newline at end of file
+        return pygame.Rect(int(self.x), int(self.y), TILE_SIZE, TILE_SIZE)
+
+def draw_ghost(screen, x, y, color, direction, scared):
+    """Ghost body with its eyes at pixel (x, y), the pupils look the way it moves unless scared"""
+    body_rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
+    pygame.draw.rect(screen, color, body_rect)
+    
+    eye_size = 3
+    left_eye_x = x + 5
+    left_eye_y = y + 5
+    right_eye_x = x + TILE_SIZE - 5
+    right_eye_y = y + 5
+    
+    pygame.draw.circle(screen, WHITE, (left_eye_x, left_eye_y), eye_size)
+    pygame.draw.circle(screen, WHITE, (right_eye_x, right_eye_y), eye_size)
+    
+    if not scared:
+        pupil_offset = 1
+        pupil_x = pupil_y = 0
+        
+        if direction == 'RIGHT':
+            pupil_x = pupil_offset
+        elif direction == 'LEFT':
+            pupil_x = -pupil_offset
+        elif direction == 'UP':
+            pupil_y = -pupil_offset
+        elif direction == 'DOWN':
+            pupil_y = pupil_offset
+        
+        pygame.draw.circle(screen, BLACK, (left_eye_x + pupil_x, left_eye_y + pupil_y), 1)
+        pygame.draw.circle(screen, BLACK, (right_eye_x + pupil_x, right_eye_y + pupil_y), 1)
@@ -0,0 +1,213 @@
+import numpy as np
+import pygame
+from ghost import Ghost, draw_ghost
+from settings import *
+
+STATE_NAMES = ['NORMAL', 'SCARED']
+STATE_IDS = {name: state for state, name in enumerate(STATE_NAMES)}
+NORMAL, SCARED = range(2)
+SCARED_COLOR = (0, 0, 255)
+
+# Ghost sprites by (color, direction, scared), drawn once with draw_ghost
+sprites = {}
+
+def ghost_sprite(color, direction, scared):
+    key = (color, direction, scared)
+    sprite = sprites.get(key)
+    if sprite is None:
+        sprite = pygame.Surface((TILE_SIZE, TILE_SIZE))
+        draw_ghost(sprite, 0, 0, color, direction, scared)
+        sprites[key] = sprite
+    return sprite
+
+def array_property(name):
+    """Ghost attribute kept in the GhostStore array of the same name"""
+    def get(self):
+        return getattr(self.store, name).item(self.index)
+    def set(self, value):
+        getattr(self.store, name)[self.index] = value
+    return property(get, set)
+
+class GhostStore:
+    """Ghost state of a level in parallel NumPy arrays, one slot per ghost.
+
+    Positions, movement, speed, state, scared timer and personality are
+    kept here, so begin_tick, continue_moves and colliding run once over
+    all ghosts instead of once per ghost. add returns a GhostView, which
+    has the whole Ghost API on top of its slot for the per-ghost decisions
+    and drawing. Arithmetic matches Ghost, so ghosts move the same either
+    way.
+    """
+
+    def __init__(self, capacity):
+        self.count = 0
+        self.views = []
+        self.tile_x = np.zeros(capacity, dtype=np.int64)
+        self.tile_y = np.zeros(capacity, dtype=np.int64)
+        self.target_tile_x = np.zeros(capacity, dtype=np.int64)
+        self.target_tile_y = np.zeros(capacity, dtype=np.int64)
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.prev_x = np.zeros(capacity)
+        self.prev_y = np.zeros(capacity)
+        self.move_progress = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.is_moving = np.zeros(capacity, dtype=bool)
+        self.state = np.zeros(capacity, dtype=np.uint8)
+        self.scared_timer = np.zeros(capacity, dtype=np.int64)
+        self.personality_id = np.zeros(capacity, dtype=np.uint8)
+        self.personalities = list(GHOST_PERSONALITIES)
+
+    def add(self, start_pos, color=RED, personality='AGGRESSIVE', rng=None):
+        """New ghost in the next free slot, takes the same arguments as Ghost"""
+        if self.count == len(self.x):
+            raise ValueError(f"GhostStore is full ({self.count} ghosts)")
+        view = GhostView(self, self.count, start_pos, color, personality, rng)
+        self.views.append(view)
+        self.count += 1
+        return view
+
+    def personality_id_of(self, personality):
+        if personality not in self.personalities:
+            self.personalities.append(personality)
+        return self.personalities.index(personality)
+
+    def begin_tick(self):
+        """Ghost.begin_tick for every ghost"""
+        count = self.count
+        self.prev_x[:count] = self.x[:count]
+        self.prev_y[:count] = self.y[:count]
+        scared = self.state[:count] == SCARED
+        if scared.any():
+            timers = self.scared_timer[:count]
+            timers[scared] -= 1
+            self.state[:count][scared & (timers <= 0)] = NORMAL
+
+    def continue_moves(self):
+        """Ghost.continue_move for every ghost, returns the indices of the ghosts that arrived"""
+        moving = np.flatnonzero(self.is_moving[:self.count])
+        if not len(moving):
+            return []
+        progress = self.move_progress[moving] + self.speed[moving]
+        arrived = progress >= TILE_SIZE
+
+        tile_x = self.tile_x[moving]
+        tile_y = self.tile_y[moving]
+        target_x = self.target_tile_x[moving]
+        target_y = self.target_tile_y[moving]
+        start_x = tile_x * TILE_SIZE
+        start_y = tile_y * TILE_SIZE
+        ratio = progress / TILE_SIZE
+        self.x[moving] = np.where(arrived, target_x * TILE_SIZE, start_x + (target_x * TILE_SIZE - start_x) * ratio)
+        self.y[moving] = np.where(arrived, target_y * TILE_SIZE, start_y + (target_y * TILE_SIZE - start_y) * ratio)
+        self.move_progress[moving] = np.where(arrived, 0, progress)
+
+        done = moving[arrived]
+        self.tile_x[done] = target_x[arrived]
+        self.tile_y[done] = target_y[arrived]
+        self.is_moving[done] = False
+        return done.tolist()
+
+    def colliding(self, x, y):
+        """Ghosts overlapping the TILE_SIZE square at (x, y) in index order, see spatial_hash.overlaps"""
+        count = self.count
+        hits = np.flatnonzero((np.abs(np.trunc(self.x[:count]) - int(x)) < TILE_SIZE) &
+                              (np.abs(np.trunc(self.y[:count]) - int(y)) < TILE_SIZE))
+        views = self.views
+        return [views[i] for i in hits.tolist()]
+
+    def visible(self, camera):
+        """Indices of the ghosts inside the camera view, see Camera.is_visible"""
+        count = self.count
+        x = self.x[:count]
+        y = self.y[:count]
+        return np.flatnonzero((x + TILE_SIZE > camera.x) & (x < camera.x + camera.view_width) &
+                              (y + TILE_SIZE > camera.y) & (y < camera.y + camera.view_height)).tolist()
+
+    def draw(self, screen, alpha=1.0, camera=None):
+        """Ghost.draw for every ghost in the camera view, blitting cached sprites in one call"""
+        if camera is not None:
+            indices = np.array(self.visible(camera), dtype=np.int64)
+            offset_x, offset_y = camera.x, camera.y
+        else:
+            indices = np.arange(self.count)
+            offset_x = offset_y = 0
+        if not len(indices):
+            return
+        x = self.x[indices]
+        y = self.y[indices]
+        prev_x = self.prev_x[indices]
+        prev_y = self.prev_y[indices]
+        # Ghost.render_pos: no sliding across the map after a teleport or reset
+        jumped = (np.abs(x - prev_x) > TILE_SIZE) | (np.abs(y - prev_y) > TILE_SIZE)
+        draw_x = np.where(jumped, x, prev_x + (x - prev_x) * alpha) - offset_x
+        draw_y = np.where(jumped, y, prev_y + (y - prev_y) * alpha) - offset_y
+        scared = self.state[indices] == SCARED
+        timers = self.scared_timer[indices]
+        flashing = scared & (timers < 120) & (timers % 20 < 10)
+
+        views = self.views
+        blits = []
+        for i, sprite_x, sprite_y, is_scared, is_flashing in zip(
+                indices.tolist(), np.trunc(draw_x).astype(np.int64).tolist(), np.trunc(draw_y).astype(np.int64).tolist(),
+                scared.tolist(), flashing.tolist()):
+            view = views[i]
+            if is_flashing:
+                color = WHITE
+            elif is_scared:
+                color = SCARED_COLOR
+            else:
+                color = view.original_color
+            blits.append((ghost_sprite(color, view.direction, is_scared), (sprite_x, sprite_y)))
+        screen.blits(blits, False)
+
+class GhostView(Ghost):
+    """A Ghost whose numeric state lives in a slot of a GhostStore.
+
+    Only the attributes the store vectorizes are redirected; paths, shared
+    fields and the RNG stay on the view. Color follows the state: scared
+    ghosts are blue, the others their original color.
+    """
+
+    tile_x = array_property('tile_x')
+    tile_y = array_property('tile_y')
+    target_tile_x = array_property('target_tile_x')
+    target_tile_y = array_property('target_tile_y')
+    x = array_property('x')
+    y = array_property('y')
+    prev_x = array_property('prev_x')
+    prev_y = array_property('prev_y')
+    move_progress = array_property('move_progress')
+    speed = array_property('speed')
+    is_moving = array_property('is_moving')
+    scared_timer = array_property('scared_timer')
+
+    def __init__(self, store, index, start_pos, color=RED, personality='AGGRESSIVE', rng=None):
+        self.store = store
+        self.index = index
+        super().__init__(start_pos, color, personality, rng)
+
+    @property
+    def state(self):
+        return STATE_NAMES[self.store.state.item(self.index)]
+
+    @state.setter
+    def state(self, value):
+        self.store.state[self.index] = STATE_IDS[value]
+
+    @property
+    def personality(self):
+        return self.store.personalities[self.store.personality_id.item(self.index)]
+
+    @personality.setter
+    def personality(self, value):
+        self.store.personality_id[self.index] = self.store.personality_id_of(value)
+
+    @property
+    def color(self):
+        return SCARED_COLOR if self.store.state.item(self.index) == SCARED else self.original_color
+
+    @color.setter
+    def color(self, value):
+        # Derived from the state, see the class docstring
+        pass
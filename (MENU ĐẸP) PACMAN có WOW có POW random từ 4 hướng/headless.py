@@ -0,0 +1,60 @@
+import argparse
+import time
+from game import Game
+from autopilot import PacmanAutopilot
+from ai_scheduler import AIScheduler
+from team_planner import TeamPlanner
+from settings import *
+
+def run_headless_game(level_num=1, max_ticks=HEADLESS_MAX_TICKS, controller=None, campaign=False,
+                      personalities=None, seed=None, scheduler=None, team_planner=None):
+    """Run one game without a window and return its result dictionary.
+
+    Pass an AIScheduler to collect the ghost decision times of several games,
+    and a TeamPlanner for the rollouts of TEAM ghosts.
+    """
+    game = Game(headless=True)
+    if scheduler is not None:
+        game.scheduler = scheduler
+    if team_planner is not None:
+        game.team_planner = team_planner
+        team_planner.attach(game)
+    if controller is None:
+        controller = PacmanAutopilot()
+    return game.run_headless(level_num, max_ticks, controller, campaign, personalities, seed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Pac-Man games without a window")
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--max-ticks', type=int, default=HEADLESS_MAX_TICKS)
+    parser.add_argument('--campaign', action='store_true', help="advance through levels instead of stopping at the first clear")
+    parser.add_argument('--seed', type=int, default=None, help="seed of the first game, the following games use seed + 1, ...")
+    parser.add_argument('--personalities', nargs='+', default=None, choices=GHOST_PERSONALITIES + ['TEAM'],
+                        help="ghost personalities, repeated over the ghosts of the level")
+    parser.add_argument('--ai-report', action='store_true', help="print ghost decision times per personality")
+    args = parser.parse_args()
+
+    scheduler = AIScheduler(None)
+    team_planner = TeamPlanner(None)
+
+    total_ticks = 0
+    start_time = time.perf_counter()
+    for i in range(args.games):
+        seed = None if args.seed is None else args.seed + i
+        result = run_headless_game(args.level, args.max_ticks, campaign=args.campaign, personalities=args.personalities,
+                                   seed=seed, scheduler=scheduler, team_planner=team_planner)
+        total_ticks += result['ticks']
+        print(f"Game {i+1}: {result['outcome']} level={result['level']} score={result['score']} "
+              f"lives={result['lives']} ticks={result['ticks']}")
+    elapsed = time.perf_counter() - start_time
+
+    ticks_per_second = total_ticks / elapsed if elapsed > 0 else 0
+    print(f"{total_ticks} ticks in {elapsed:.2f}s: {ticks_per_second:,.0f} ticks/s "
+          f"({ticks_per_second / FPS:.0f}x real time)")
+    if args.ai_report:
+        for line in scheduler.report() + team_planner.report():
+            print(line)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import heapq
+from collections import OrderedDict
+from settings import *
+
+# Number of open sides for each Map.exits bitmask
+EXIT_COUNTS = [bin(exits).count('1') for exits in range(16)]
+
+class JunctionGraph:
+    """Corridor-compressed graph of a map's walkable tiles.
+
+    Nodes are the junctions (three or four exits) and dead ends (one exit).
+    The tiles with exactly two exits between them form corridor runs, stored
+    once per run with their length, so searches only visit the nodes.
+    Corridor loops without any junction get one of their tiles promoted to a
+    node. Grid cells are identified by Map.index throughout.
+    """
+
+    def __init__(self, game_map, cache_size=JUNCTION_DISTANCE_CACHE_SIZE):
+        self.map = game_map
+        self.node_ids = {}
+        self.nodes = []
+        # Per node: (other node id, length in tiles) for every exit
+        self.edges = []
+        # Per corridor run: (node id at the start, node id at the end, length)
+        self.runs = []
+        # Corridor tile -> (run id, tiles from the start node)
+        self.corridors = {}
+        self.cache_size = cache_size
+        self.distance_cache = OrderedDict()
+        self.build()
+
+    def build(self):
+        game_map = self.map
+        corridor_tiles = []
+        for tile_y in range(game_map.height):
+            for tile_x in range(game_map.width):
+                if game_map.is_wall(tile_x, tile_y):
+                    continue
+                index = game_map.index(tile_x, tile_y)
+                if EXIT_COUNTS[game_map.exits[index]] == 2:
+                    corridor_tiles.append((tile_x, tile_y))
+                else:
+                    self.add_node(index)
+
+        for node in range(len(self.nodes)):
+            self.walk_from(node)
+
+        for tile_x, tile_y in corridor_tiles:
+            index = game_map.index(tile_x, tile_y)
+            if index not in self.corridors and index not in self.node_ids:
+                self.walk_from(self.add_node(index))
+
+    def add_node(self, index):
+        node = len(self.nodes)
+        self.node_ids[index] = node
+        self.nodes.append(index)
+        self.edges.append([])
+        return node
+
+    def walk_from(self, node):
+        """Follow every exit of a node along its corridor to the next node"""
+        game_map = self.map
+        stride = game_map.stride
+        start = self.nodes[node]
+        for next_x, next_y, direction in game_map.get_moves(start % stride - 1, start // stride - 1):
+            previous = start
+            current = game_map.index(next_x, next_y)
+            path = []
+            while current not in self.node_ids:
+                path.append(current)
+                for move_x, move_y, _ in game_map.get_moves(current % stride - 1, current // stride - 1):
+                    following = game_map.index(move_x, move_y)
+                    if following != previous:
+                        break
+                previous, current = current, following
+
+            end = self.node_ids[current]
+            length = len(path) + 1
+            self.edges[node].append((end, length))
+
+            # Each run is walked from both ends, record its tiles the first time
+            if path and path[0] not in self.corridors:
+                run = len(self.runs)
+                self.runs.append((node, end, length))
+                for offset, index in enumerate(path, 1):
+                    self.corridors[index] = (run, offset)
+
+    def is_junction(self, tile_x, tile_y):
+        return self.map.index(tile_x, tile_y) in self.node_ids
+
+    def distances_to(self, tile_x, tile_y):
+        """Distance from every node to a tile (dict by node id), None if the tile is not walkable"""
+        index = self.map.index(tile_x, tile_y)
+        distances = self.distance_cache.get(index)
+        if distances is not None:
+            self.distance_cache.move_to_end(index)
+            return distances
+
+        if index in self.node_ids:
+            queue = [(0, self.node_ids[index])]
+        elif index in self.corridors:
+            run, offset = self.corridors[index]
+            start, end, length = self.runs[run]
+            queue = [(offset, start), (length - offset, end)]
+        else:
+            return None
+
+        # Dijkstra over the nodes, edges are symmetric so this gives the
+        # distance from each node to the tile
+        distances = {}
+        heapq.heapify(queue)
+        while queue:
+            distance, node = heapq.heappop(queue)
+            if node in distances:
+                continue
+            distances[node] = distance
+            for other, length in self.edges[node]:
+                if other not in distances:
+                    heapq.heappush(queue, (distance + length, other))
+
+        self.distance_cache[index] = distances
+        if len(self.distance_cache) > self.cache_size:
+            self.distance_cache.popitem(last=False)
+        return distances
+
+    def distance(self, from_x, from_y, to_x, to_y):
+        """Shortest path length in tiles, None if either tile is not walkable or there is no path"""
+        distances = self.distances_to(to_x, to_y)
+        if distances is None:
+            return None
+
+        index = self.map.index(from_x, from_y)
+        if index in self.node_ids:
+            return distances.get(self.node_ids[index])
+        if index not in self.corridors:
+            return None
+
+        run, offset = self.corridors[index]
+        start, end, length = self.runs[run]
+        best = None
+        if start in distances:
+            best = offset + distances[start]
+        if end in distances and (best is None or length - offset + distances[end] < best):
+            best = length - offset + distances[end]
+
+        # Both tiles on the same corridor, the direct way may be shorter
+        target = self.corridors.get(self.map.index(to_x, to_y))
+        if target is not None and target[0] == run:
+            direct = abs(offset - target[1])
+            if best is None or direct < best:
+                best = direct
+        return best
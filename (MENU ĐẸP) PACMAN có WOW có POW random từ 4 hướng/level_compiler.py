@@ -0,0 +1,112 @@
+import argparse
+import mmap
+import os
+import struct
+from settings import *
+
+# Compiled level file layout, all integers little-endian:
+#   header   magic, version, width, height, Pac-Man start (pixels), number of
+#            ghost starts, dot count, power pellet count, SHA-1 of the source rows
+#   starts   one (x, y) pixel pair per ghost start
+#   tiles    the bordered tile grid of Map.tiles, (width + 2) * (height + 2) bytes
+#   exits    the matching Map.exits bitmasks, same size
+LEVEL_MAGIC = b'PMLV'
+LEVEL_VERSION = 1
+HEADER = struct.Struct('<4sHHHiiHII20s')
+START = struct.Struct('<ii')
+
+class CompiledLevel:
+    """Contents of a compiled level file, see read_level"""
+
+    def __init__(self, width, height, pacman_start, ghost_starts, total_dots, power_pellets,
+                 content_hash, tiles, exits):
+        self.width = width
+        self.height = height
+        self.pacman_start = pacman_start
+        self.ghost_starts = ghost_starts
+        self.total_dots = total_dots
+        self.power_pellets = power_pellets
+        self.content_hash = content_hash
+        self.tiles = tiles
+        self.exits = exits
+
+def compiled_level_path(content_hash, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"level_{content_hash}.lvl")
+
+def is_compiled_level(filename):
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(LEVEL_MAGIC)) == LEVEL_MAGIC
+    except OSError:
+        return False
+
+def write_level(game_map, filename):
+    """Save a parsed Map as a compiled level file"""
+    header = HEADER.pack(LEVEL_MAGIC, LEVEL_VERSION, game_map.width, game_map.height,
+                         game_map.pacman_start[0], game_map.pacman_start[1], len(game_map.ghost_starts),
+                         game_map.total_dots, game_map.remaining_power_pellets,
+                         bytes.fromhex(game_map.content_hash))
+    starts = b''.join(START.pack(x, y) for x, y in game_map.ghost_starts)
+
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    # Write under a temporary name first, other processes may be loading the same level
+    temp_filename = f"{filename}.{os.getpid()}.tmp"
+    with open(temp_filename, 'wb') as f:
+        f.write(header)
+        f.write(starts)
+        f.write(game_map.tiles)
+        f.write(game_map.exits)
+    os.replace(temp_filename, filename)
+
+def read_level(filename):
+    """Memory-map a compiled level file, returns a CompiledLevel or None if the file is not usable"""
+    try:
+        with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if len(data) < HEADER.size:
+                return None
+            (magic, version, width, height, pacman_x, pacman_y, ghost_count,
+             total_dots, power_pellets, digest) = HEADER.unpack_from(data)
+            if magic != LEVEL_MAGIC or version != LEVEL_VERSION:
+                return None
+
+            offset = HEADER.size
+            ghost_starts = []
+            for _ in range(ghost_count):
+                ghost_starts.append(START.unpack_from(data, offset))
+                offset += START.size
+
+            grid_size = (width + 2) * (height + 2)
+            if len(data) != offset + 2 * grid_size:
+                return None
+            # Maps edit their tiles in play, so they get private copies
+            tiles = bytearray(data[offset:offset + grid_size])
+            exits = bytearray(data[offset + grid_size:offset + 2 * grid_size])
+    except (OSError, ValueError):
+        return None
+
+    return CompiledLevel(width, height, (pacman_x, pacman_y), ghost_starts, total_dots, power_pellets,
+                         digest.hex(), tiles, exits)
+
+def main():
+    from map import Map
+    from levels import LEVELS
+
+    parser = argparse.ArgumentParser(description="Compile ASCII level maps into the binary level format")
+    parser.add_argument('maps', nargs='*', help="map text files, compiled next to the source as .lvl "
+                                                "(default: the built-in levels, into the cache)")
+    args = parser.parse_args()
+
+    if args.maps:
+        sources = [(filename, os.path.splitext(filename)[0] + '.lvl') for filename in args.maps]
+    else:
+        sources = [(level_data["map"], None) for _, level_data in sorted(LEVELS.items())]
+
+    for source, filename in sources:
+        game_map = Map(source, render=False)
+        filename = filename or compiled_level_path(game_map.content_hash)
+        write_level(game_map, filename)
+        print(f"{filename}: {game_map.width}x{game_map.height}, {game_map.total_dots} dots, "
+              f"{len(game_map.ghost_starts)} ghost starts")
+
+if __name__ == '__main__':
+    main()
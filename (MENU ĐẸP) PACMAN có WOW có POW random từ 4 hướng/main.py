@@ -1,5 +1,18 @@
+import argparse
 from game import Game
+from team_planner import TeamPlanner
+from settings import *
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pac-Man")
+    parser.add_argument('--team', action='store_true', help="all ghosts plan their moves together (TEAM personality)")
+    parser.add_argument('--planner-worker', action='store_true', help="run TEAM planning in a separate process")
+    args = parser.parse_args()
+
     pacman_game = Game()
-    pacman_game.run()
\ No newline at end of file
+    if args.team:
+        pacman_game.ghost_personalities = ['TEAM'] * 4
+    if args.planner_worker:
+        pacman_game.team_planner = TeamPlanner(TEAM_PLANNER_BUDGET_MS, worker=True)
+        pacman_game.team_planner.attach(pacman_game)
+    pacman_game.run()
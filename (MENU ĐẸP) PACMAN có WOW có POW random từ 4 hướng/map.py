@@ -1,21 +1,117 @@
 import pygame
 import math
+import hashlib
+from collections import OrderedDict, deque
 from settings import *
 
+try:
+    from distances import load_distance_table
+except ImportError:  # numpy is not installed, ghosts use Manhattan distance
+    load_distance_table = None
+from wall_cache import wall_surfaces
+from junctions import JunctionGraph
+from pathfinding import find_path
+from level_compiler import compiled_level_path, is_compiled_level, read_level, write_level
+
+# bytes.translate table mapping wall codes to 0 and every other tile to 1
+OPEN_TILES = bytes(0 if code == WALL_CODE else 1 for code in range(256))
+
+class MapRows:
+    """Legacy list-of-strings view of a Map, rows are built from the grid on access"""
+
+    def __init__(self, game_map):
+        self.map = game_map
+
+    def __len__(self):
+        return self.map.height
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.map.height
+        if not 0 <= y < self.map.height:
+            raise IndexError("map row index out of range")
+        start = self.map.index(0, y)
+        return self.map.tiles[start:start + self.map.width].decode('ascii')
+
+    def __setitem__(self, y, row):
+        for x in range(self.map.width):
+            self.map.set_tile(x, y, row[x] if x < len(row) else WALL)
+
+    def __iter__(self):
+        for y in range(self.map.height):
+            yield self[y]
+
+class MoveTable(dict):
+    """Open neighbours of each grid cell by Map.index, built from Map.exits on first lookup"""
+
+    def __init__(self, game_map):
+        super().__init__()
+        self.map = game_map
+
+    def __missing__(self, index):
+        tile_y, tile_x = divmod(index, self.map.stride)
+        exits = self.map.exits[index]
+        moves = tuple((tile_x - 1 + dx, tile_y - 1 + dy, direction) for dx, dy, direction in DIRECTIONS
+                      if exits & EXIT_BITS[direction])
+        self[index] = moves
+        return moves
+
 class Map:
-    def __init__(self, map_source):
-        if isinstance(map_source, str):
-            self.map_data = self.load_map(map_source)
-        else:
-            self.map_data = map_source.copy()
+    # Verify the live dot counters against a full scan, see count_remaining_dots
+    debug_counters = DEBUG_DOT_COUNTER
+
+    def __init__(self, map_source, render=True, cache=True):
+        # map_source is a list of rows, a map text file or a compiled level
+        # file (see level_compiler.py). Text maps are compiled into the cache
+        # on first use and loaded from there afterwards. Maps that will not
+        # come again, like generated mazes, pass cache=False to keep the
+        # compiled level and distance table out of CACHE_DIR.
+        self.cache = cache
+        level = None
+        if isinstance(map_source, str) and is_compiled_level(map_source):
+            level = read_level(map_source)
+        if level is None:
+            if isinstance(map_source, str):
+                rows = self.load_map(map_source)
+            else:
+                rows = list(map_source)
+            content_hash = hashlib.sha1('\n'.join(rows).encode()).hexdigest()
+            if COMPILE_LEVELS and cache:
+                level = read_level(compiled_level_path(content_hash))
             
         self.pacman_start = None
         self.ghost_starts = []
         self.total_dots = 0
-        self.parse_map()
+        if level is not None:
+            self.load_compiled(level)
+        else:
+            self.content_hash = content_hash
+            self.parse_map(rows)
+            if COMPILE_LEVELS and cache:
+                try:
+                    write_level(self, compiled_level_path(content_hash))
+                except OSError:
+                    pass
         
-        self.wall_surface = None
-        self.create_wall_surface()
+        self.walk_index = None
+        self.distance_table = None
+        self.load_distances()
+        # Counts wall changes, so anything made from the layout can tell it is stale
+        self.layout_version = 0
+        # Built on first use, see get_junction_graph and nearest_open_tile
+        self.junction_graph = None
+        self.nearest_open = None
+        self.dead_ends = None
+        
+        # Headless simulations never draw, so they skip building any surface
+        self.render = render
+        self.wall_key = None
+        # Rendered MAP_CHUNK_TILES square pieces of the map, built as they come
+        # into view, see get_chunk
+        self.chunks = OrderedDict()
+        self.pellet_frames = None
+        if self.render:
+            self.create_pellet_frames()
 
     def load_map(self, filename):
         try:
@@ -61,8 +157,17 @@ class Map:
             "####################################"
         ]
 
-    def parse_map(self):
-        for y, row in enumerate(self.map_data):
+    def parse_map(self, rows):
+        # Tiles live in one bytearray, row by row, surrounded by a border of
+        # walls so neighbour lookups one tile off the map need no bounds checks.
+        # Short rows are padded with walls.
+        self.height = len(rows)
+        self.width = max((len(row) for row in rows), default=0)
+        self.stride = self.width + 2
+        self.tiles = bytearray([WALL_CODE]) * (self.stride * (self.height + 2))
+        self.map_data = MapRows(self)
+        
+        for y, row in enumerate(rows):
             new_row = ""
             for x, tile in enumerate(row):
                 if tile == PACMAN_START:
@@ -76,19 +181,253 @@ class Map:
                     new_row += tile
                 else:
                     new_row += tile
-            self.map_data[y] = new_row
+            start = self.index(0, y)
+            self.tiles[start:start + len(new_row)] = new_row.encode('ascii')
+        
+        # Live counters, kept up to date by set_tile
+        self.remaining_dots = self.tiles.count(DOT_CODE)
+        self.remaining_power_pellets = self.tiles.count(POWER_PELLET_CODE)
+        self.find_power_pellets()
+        self.build_exits()
         
         if self.pacman_start is None:
             self.pacman_start = self.find_safe_start_position()
         
         if not self.ghost_starts:
-            center_x = len(self.map_data[0]) // 2 if self.map_data else 10
-            center_y = len(self.map_data) // 2 if self.map_data else 10
+            center_x = self.width // 2 if self.height else 10
+            center_y = self.height // 2 if self.height else 10
             for i in range(4):
                 ghost_x = (center_x + i) * TILE_SIZE
                 ghost_y = center_y * TILE_SIZE
                 self.ghost_starts.append((ghost_x, ghost_y))
 
+    def load_compiled(self, level):
+        """Take the grid and metadata of a CompiledLevel instead of parsing rows"""
+        self.height = level.height
+        self.width = level.width
+        self.stride = self.width + 2
+        self.tiles = level.tiles
+        self.exits = level.exits
+        self.moves = MoveTable(self)
+        self.map_data = MapRows(self)
+        self.content_hash = level.content_hash
+        
+        self.pacman_start = level.pacman_start
+        self.ghost_starts = list(level.ghost_starts)
+        self.total_dots = level.total_dots
+        self.remaining_dots = level.total_dots
+        self.remaining_power_pellets = level.power_pellets
+        self.find_power_pellets()
+
+    def find_power_pellets(self):
+        # Power pellets pulse, so they are drawn every frame from this set.
+        # chunk_pellets holds their pixel positions by chunk for Map.draw.
+        self.power_pellets = set()
+        self.chunk_pellets = {}
+        index = self.tiles.find(POWER_PELLET_CODE)
+        while index >= 0:
+            tile_y, tile_x = divmod(index, self.stride)
+            self.add_power_pellet(tile_x - 1, tile_y - 1)
+            index = self.tiles.find(POWER_PELLET_CODE, index + 1)
+
+    def add_power_pellet(self, tile_x, tile_y):
+        self.power_pellets.add((tile_x, tile_y))
+        self.chunk_pellets.setdefault(self.chunk_of(tile_x, tile_y), set()).add((tile_x * TILE_SIZE, tile_y * TILE_SIZE))
+
+    def remove_power_pellet(self, tile_x, tile_y):
+        self.power_pellets.discard((tile_x, tile_y))
+        self.chunk_pellets.get(self.chunk_of(tile_x, tile_y), set()).discard((tile_x * TILE_SIZE, tile_y * TILE_SIZE))
+
+    def build_exits(self):
+        """Precompute the open neighbours of every tile.
+
+        exits holds a bitmask of EXIT_BITS per grid cell. Wall tiles get
+        entries too since ghosts may start inside one. moves caches the
+        matching (tile_x, tile_y, direction) tuples, filled in by get_moves.
+        """
+        # The whole grid at once as one big integer with a byte per cell:
+        # shifting it by a row or a cell lines every tile up with a neighbour,
+        # and since cells are 0 or 1 the four directions OR into separate bits
+        size = len(self.tiles)
+        row_bits = 8 * self.stride
+        open_cells = int.from_bytes(self.tiles.translate(OPEN_TILES), 'little')
+        exits = ((open_cells << row_bits) * EXIT_BITS['UP'] |
+                 (open_cells >> row_bits) * EXIT_BITS['DOWN'] |
+                 (open_cells << 8) * EXIT_BITS['LEFT'] |
+                 (open_cells >> 8) * EXIT_BITS['RIGHT'])
+        
+        # Only tiles on the map get exits, the wall border keeps none
+        inner_row = b'\x00' + b'\x0f' * self.width + b'\x00'
+        on_map = bytes(self.stride) + inner_row * self.height + bytes(self.stride)
+        exits &= int.from_bytes(on_map, 'little')
+        
+        self.exits = bytearray(exits.to_bytes(size + self.stride + 1, 'little')[:size])
+        self.moves = MoveTable(self)
+
+    def update_exits(self, tile_x, tile_y):
+        exits = 0
+        for dx, dy, direction in DIRECTIONS:
+            if not self.is_wall(tile_x + dx, tile_y + dy):
+                exits |= EXIT_BITS[direction]
+        index = self.index(tile_x, tile_y)
+        self.exits[index] = exits
+        self.moves.pop(index, None)
+
+    def load_distances(self):
+        """Load the maze distance table of this map, see distances.py"""
+        if load_distance_table is None:
+            return
+        walkable = self.width * self.height - self.tiles.count(WALL_CODE) + 2 * (self.stride + self.height)
+        if walkable > DISTANCE_TABLE_MAX_TILES:
+            return
+        self.walk_index, self.distance_table = load_distance_table(self, CACHE_DIR if self.cache else None)
+
+    def distance(self, from_x, from_y, to_x, to_y):
+        """Shortest path length in tiles between two tiles.
+
+        Uses the distance table, or the junction graph on maps without one.
+        Falls back to Manhattan distance when either tile is a wall or outside
+        the map.
+        """
+        from_x, from_y, to_x, to_y = int(from_x), int(from_y), int(to_x), int(to_y)
+        if (0 <= from_x < self.width and 0 <= from_y < self.height and
+                0 <= to_x < self.width and 0 <= to_y < self.height):
+            if self.distance_table is not None:
+                start = self.walk_index[(from_y + 1) * self.stride + from_x + 1]
+                end = self.walk_index[(to_y + 1) * self.stride + to_x + 1]
+                if start >= 0 and end >= 0:
+                    return int(self.distance_table[start, end])
+            else:
+                distance = self.get_junction_graph().distance(from_x, from_y, to_x, to_y)
+                if distance is not None:
+                    return distance
+        return abs(from_x - to_x) + abs(from_y - to_y)
+
+    def get_junction_graph(self):
+        """Junctions and corridor runs of the map, see junctions.py"""
+        if self.junction_graph is None:
+            self.junction_graph = JunctionGraph(self)
+        return self.junction_graph
+
+    def get_moves(self, tile_x, tile_y):
+        """Open neighbours of a tile as (tile_x, tile_y, direction) tuples, in the order of DIRECTIONS"""
+        return self.moves[(tile_y + 1) * self.stride + tile_x + 1]
+
+    def corridor_move(self, tile_x, tile_y, direction):
+        """The way on for an entity that entered a corridor tile heading in direction.
+
+        None at junctions and dead ends, or when the entity did not come from
+        one of the tile's two neighbours.
+        """
+        moves = self.get_moves(tile_x, tile_y)
+        if len(moves) != 2 or self.is_wall(tile_x, tile_y):
+            return None
+        back = OPPOSITE_DIRECTIONS.get(direction)
+        if moves[0][2] == back:
+            return moves[1]
+        if moves[1][2] == back:
+            return moves[0]
+        return None
+
+    def find_path(self, from_x, from_y, to_x, to_y):
+        """Shortest path between two walkable tiles, see pathfinding.find_path"""
+        return find_path(self, from_x, from_y, to_x, to_y)
+
+    def nearest_open_tile(self, tile_x, tile_y):
+        """The walkable tile closest to a tile, which may be a wall or off the map"""
+        tile_x = min(max(int(tile_x), 0), self.width - 1)
+        tile_y = min(max(int(tile_y), 0), self.height - 1)
+        if self.nearest_open is None:
+            self.nearest_open = self.build_nearest_open()
+        return self.nearest_open[tile_y * self.width + tile_x]
+
+    def build_nearest_open(self):
+        """Closest walkable tile for every tile, by a breadth-first search out of all walkable tiles"""
+        width, height = self.width, self.height
+        nearest = [None] * (width * height)
+        queue = deque()
+        for tile_y in range(height):
+            for tile_x in range(width):
+                if not self.is_wall(tile_x, tile_y):
+                    nearest[tile_y * width + tile_x] = (tile_x, tile_y)
+                    queue.append((tile_x, tile_y))
+        while queue:
+            tile_x, tile_y = queue.popleft()
+            source = nearest[tile_y * width + tile_x]
+            for dx, dy, _ in DIRECTIONS:
+                next_x, next_y = tile_x + dx, tile_y + dy
+                if 0 <= next_x < width and 0 <= next_y < height and nearest[next_y * width + next_x] is None:
+                    nearest[next_y * width + next_x] = source
+                    queue.append((next_x, next_y))
+        return nearest
+
+    def get_dead_ends(self):
+        """Flee penalties by Map.index, see build_dead_ends"""
+        if self.dead_ends is None:
+            self.dead_ends = self.build_dead_ends()
+        return self.dead_ends
+
+    def dead_end_penalty(self, tile_x, tile_y):
+        """How bad a tile is to flee into, 0 outside dead-end pockets"""
+        return self.get_dead_ends()[(tile_y + 1) * self.stride + tile_x + 1]
+
+    def build_dead_ends(self):
+        """Flee penalty by Map.index for every tile in a dead-end pocket.
+
+        Pockets are what is left over after repeatedly removing tiles with a
+        single exit. Their tiles get FLEE_DEAD_END_PENALTY plus twice their
+        depth from the pocket's mouth, so a step deeper in never pays off
+        even though it takes a ghost one tile further from Pac-Man.
+        """
+        # Neighbours straight off the exit bits, see build_exits
+        tiles = self.tiles
+        exits = self.exits
+        steps = [(EXIT_BITS[direction], dy * self.stride + dx) for dx, dy, direction in DIRECTIONS]
+        exit_counts = [bin(bits).count('1') for bits in range(16)]
+        walkable = [index for index, code in enumerate(tiles) if code != WALL_CODE]
+        degrees = [0] * len(tiles)
+        for index in walkable:
+            degrees[index] = exit_counts[exits[index]]
+        queue = deque(index for index in walkable if degrees[index] <= 1)
+        pocket = bytearray(len(tiles))
+        for index in queue:
+            pocket[index] = 1
+        pocket_size = len(queue)
+        while queue:
+            current = queue.popleft()
+            bits = exits[current]
+            for bit, offset in steps:
+                if bits & bit:
+                    other = current + offset
+                    if not pocket[other]:
+                        degrees[other] -= 1
+                        if degrees[other] == 1:
+                            pocket[other] = 1
+                            pocket_size += 1
+                            queue.append(other)
+
+        penalties = [0] * len(tiles)
+        if pocket_size == len(walkable):
+            # The whole maze is a tree, nowhere is safer than anywhere else
+            return penalties
+        # Depth into the pockets, searching out from the tiles left over
+        depths = [-1] * len(tiles)
+        for index in walkable:
+            if not pocket[index]:
+                depths[index] = 0
+                queue.append(index)
+        while queue:
+            current = queue.popleft()
+            bits = exits[current]
+            for bit, offset in steps:
+                if bits & bit:
+                    other = current + offset
+                    if depths[other] < 0:
+                        depths[other] = depths[current] + 1
+                        penalties[other] = FLEE_DEAD_END_PENALTY + 2 * depths[other]
+                        queue.append(other)
+        return penalties
+
     def find_safe_start_position(self):
         for y, row in enumerate(self.map_data):
             for x, tile in enumerate(row):
@@ -96,77 +435,243 @@ class Map:
                     return (x * TILE_SIZE, y * TILE_SIZE)
         return (TILE_SIZE, TILE_SIZE)
 
-    def create_wall_surface(self):
-        if len(self.map_data) == 0:
-            return
-            
-        self.wall_surface = pygame.Surface((len(self.map_data[0]) * TILE_SIZE, 
-                                          len(self.map_data) * TILE_SIZE))
-        self.wall_surface.fill(BLACK)
+    def chunk_of(self, tile_x, tile_y):
+        return tile_x // MAP_CHUNK_TILES, tile_y // MAP_CHUNK_TILES
+
+    def get_wall_key(self):
+        if self.wall_key is None:
+            self.wall_key = wall_surfaces.wall_key(self)
+        return self.wall_key
+
+    def get_chunk(self, chunk_x, chunk_y):
+        """(wall surface, maze surface) of a chunk of the map, built on first use.
+
+        The wall surface comes from the process-wide cache (see wall_cache.py)
+        and is shared. The maze surface is a copy with the remaining dots drawn
+        on, patched by set_tile as dots are eaten or added.
+        """
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
         
-        for y, row in enumerate(self.map_data):
-            for x, tile in enumerate(row):
-                if tile == WALL:
-                    wall_rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+        wall_surface = wall_surfaces.get(f"{self.get_wall_key()}_{chunk_x}_{chunk_y}",
+                                         lambda: self.render_walls(chunk_x, chunk_y))
+        maze_surface = wall_surface.copy()
+        first_x = chunk_x * MAP_CHUNK_TILES
+        first_y = chunk_y * MAP_CHUNK_TILES
+        for tile_y in range(first_y, min(first_y + MAP_CHUNK_TILES, self.height)):
+            for tile_x in range(first_x, min(first_x + MAP_CHUNK_TILES, self.width)):
+                if self.tiles[self.index(tile_x, tile_y)] == DOT_CODE:
+                    self.draw_dot(maze_surface, tile_x - first_x, tile_y - first_y)
+        
+        chunk = (wall_surface, maze_surface)
+        self.chunks[key] = chunk
+        return chunk
+
+    def prefetch_chunk(self, first_x, first_y, last_x, last_y):
+        """Build at most one missing chunk in the given range, so chunks next to
+        the view are usually ready before they scroll in"""
+        last_x = min(last_x, (self.width - 1) // MAP_CHUNK_TILES)
+        last_y = min(last_y, (self.height - 1) // MAP_CHUNK_TILES)
+        for chunk_y in range(max(first_y, 0), last_y + 1):
+            for chunk_x in range(max(first_x, 0), last_x + 1):
+                if (chunk_x, chunk_y) not in self.chunks:
+                    self.get_chunk(chunk_x, chunk_y)
+                    return
+
+    def render_walls(self, chunk_x, chunk_y):
+        first_x = chunk_x * MAP_CHUNK_TILES
+        first_y = chunk_y * MAP_CHUNK_TILES
+        last_x = min(first_x + MAP_CHUNK_TILES, self.width)
+        last_y = min(first_y + MAP_CHUNK_TILES, self.height)
+        # Wall edges reach into the neighbouring tiles, so the walls just
+        # outside the chunk are drawn too, on a margin that is cut off at the
+        # end. Lines starting off the surface would be clipped away entirely.
+        width = (last_x - first_x) * TILE_SIZE
+        height = (last_y - first_y) * TILE_SIZE
+        wall_surface = pygame.Surface((width + 2 * TILE_SIZE, 
+                                       height + 2 * TILE_SIZE))
+        wall_surface.fill(BLACK)
+        
+        for y in range(max(first_y - 1, 0), min(last_y + 1, self.height)):
+            for x in range(max(first_x - 1, 0), min(last_x + 1, self.width)):
+                if self.tiles[self.index(x, y)] == WALL_CODE:
+                    wall_rect = pygame.Rect((x - first_x + 1) * TILE_SIZE, (y - first_y + 1) * TILE_SIZE, TILE_SIZE, TILE_SIZE)
                     
-                    pygame.draw.rect(self.wall_surface, WALL_COLOR, wall_rect)
+                    pygame.draw.rect(wall_surface, WALL_COLOR, wall_rect)
                     
-                    pygame.draw.line(self.wall_surface, WALL_HIGHLIGHT, 
+                    pygame.draw.line(wall_surface, WALL_HIGHLIGHT, 
                                    (wall_rect.left, wall_rect.top), 
                                    (wall_rect.right-1, wall_rect.top), 2)
-                    pygame.draw.line(self.wall_surface, WALL_HIGHLIGHT, 
+                    pygame.draw.line(wall_surface, WALL_HIGHLIGHT, 
                                    (wall_rect.left, wall_rect.top), 
                                    (wall_rect.left, wall_rect.bottom-1), 2)
                     
-                    pygame.draw.line(self.wall_surface, WALL_SHADOW, 
+                    pygame.draw.line(wall_surface, WALL_SHADOW, 
                                    (wall_rect.left+1, wall_rect.bottom-1), 
                                    (wall_rect.right-1, wall_rect.bottom-1), 2)
-                    pygame.draw.line(self.wall_surface, WALL_SHADOW, 
+                    pygame.draw.line(wall_surface, WALL_SHADOW, 
                                    (wall_rect.right-1, wall_rect.top+1), 
                                    (wall_rect.right-1, wall_rect.bottom-1), 2)
+        return wall_surface.subsurface((TILE_SIZE, TILE_SIZE, width, height)).copy()
 
-    def draw(self, screen):
-        if self.wall_surface:
-            screen.blit(self.wall_surface, (0, 0))
+    def draw_dot(self, surface, tile_x, tile_y):
+        center_x = tile_x * TILE_SIZE + TILE_SIZE // 2
+        center_y = tile_y * TILE_SIZE + TILE_SIZE // 2
+        pygame.draw.circle(surface, WHITE, (center_x, center_y), 2)
+        pygame.draw.circle(surface, (255, 255, 100), (center_x, center_y), 1)
+
+    def create_pellet_frames(self):
+        """One tile-sized power pellet sprite per pulse radius"""
+        self.pellet_frames = []
+        center = (TILE_SIZE // 2, TILE_SIZE // 2)
+        for radius in range(PELLET_MIN_RADIUS, PELLET_MAX_RADIUS + 1):
+            frame = pygame.Surface((TILE_SIZE, TILE_SIZE))
+            frame.set_colorkey(BLACK)
+            pygame.draw.circle(frame, WHITE, center, radius)
+            pygame.draw.circle(frame, YELLOW, center, radius - 1)
+            self.pellet_frames.append(frame)
+
+    def draw(self, screen, camera=None):
+        """Draw the part of the map under the camera (the top-left corner without one)"""
+        if not self.render or self.height == 0:
+            return
         
-        for y, row in enumerate(self.map_data):
-            for x, tile in enumerate(row):
-                center_x = x * TILE_SIZE + TILE_SIZE // 2
-                center_y = y * TILE_SIZE + TILE_SIZE // 2
-                
-                if tile == DOT:
-                    pygame.draw.circle(screen, WHITE, (center_x, center_y), 2)
-                    pygame.draw.circle(screen, (255, 255, 100), (center_x, center_y), 1)
-                    
-                elif tile == POWER_PELLET:
-                    pulse = abs(math.sin(pygame.time.get_ticks() * 0.01)) * 2 + 4
-                    pygame.draw.circle(screen, WHITE, (center_x, center_y), int(pulse))
-                    pygame.draw.circle(screen, YELLOW, (center_x, center_y), int(pulse - 1))
+        offset_x, offset_y = (camera.x, camera.y) if camera else (0, 0)
+        view_width, view_height = screen.get_size()
+        chunk_pixels = MAP_CHUNK_TILES * TILE_SIZE
+        first_x, first_y = max(offset_x // chunk_pixels, 0), max(offset_y // chunk_pixels, 0)
+        last_x = min((offset_x + view_width - 1) // chunk_pixels, (self.width - 1) // MAP_CHUNK_TILES)
+        last_y = min((offset_y + view_height - 1) // chunk_pixels, (self.height - 1) // MAP_CHUNK_TILES)
+        
+        pulse = abs(math.sin(pygame.time.get_ticks() * 0.01)) * (PELLET_MAX_RADIUS - PELLET_MIN_RADIUS) + PELLET_MIN_RADIUS
+        frame = self.pellet_frames[int(pulse) - PELLET_MIN_RADIUS]
+        
+        chunk_blits = []
+        pellet_blits = []
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                maze_surface = self.get_chunk(chunk_x, chunk_y)[1]
+                chunk_blits.append((maze_surface, (chunk_x * chunk_pixels - offset_x, chunk_y * chunk_pixels - offset_y)))
+                for x, y in self.chunk_pellets.get((chunk_x, chunk_y), ()):
+                    pellet_blits.append((frame, (x - offset_x, y - offset_y)))
+        screen.blits(chunk_blits, doreturn=False)
+        screen.blits(pellet_blits, doreturn=False)
+        
+        self.prefetch_chunk(first_x - 1, first_y - 1, last_x + 1, last_y + 1)
+        
+        # Chunks that scrolled out of view go first
+        while len(self.chunks) > MAP_CHUNK_CACHE_SIZE:
+            self.chunks.popitem(last=False)
+
+    def index(self, tile_x, tile_y):
+        """Offset of a tile in self.tiles, valid for -1 <= tile_x <= width and -1 <= tile_y <= height"""
+        return (tile_y + 1) * self.stride + tile_x + 1
+
+    def in_bounds(self, tile_x, tile_y):
+        return 0 <= tile_x < self.width and 0 <= tile_y < self.height
+
+    def get_tile(self, tile_x, tile_y):
+        return chr(self.tiles[(tile_y + 1) * self.stride + tile_x + 1])
+
+    def set_tile(self, tile_x, tile_y, tile):
+        index = (tile_y + 1) * self.stride + tile_x + 1
+        old_code = self.tiles[index]
+        new_code = ord(tile)
+        if old_code == new_code:
+            return
+        
+        if old_code == DOT_CODE:
+            self.remaining_dots -= 1
+        elif old_code == POWER_PELLET_CODE:
+            self.remaining_power_pellets -= 1
+        
+        if new_code == DOT_CODE:
+            self.remaining_dots += 1
+        elif new_code == POWER_PELLET_CODE:
+            self.remaining_power_pellets += 1
+        
+        self.tiles[index] = new_code
+        
+        if old_code == POWER_PELLET_CODE:
+            self.remove_power_pellet(tile_x, tile_y)
+        elif new_code == POWER_PELLET_CODE:
+            self.add_power_pellet(tile_x, tile_y)
+        
+        if (old_code == WALL_CODE) != (new_code == WALL_CODE):
+            # Wall edges reach into the neighbouring tiles, which may be in other chunks
+            self.wall_key = None
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    self.chunks.pop(self.chunk_of(tile_x + dx, tile_y + dy), None)
+        elif old_code == DOT_CODE or new_code == DOT_CODE:
+            chunk_x, chunk_y = self.chunk_of(tile_x, tile_y)
+            chunk = self.chunks.get((chunk_x, chunk_y))
+            if chunk is not None:
+                wall_surface, maze_surface = chunk
+                local_x = tile_x - chunk_x * MAP_CHUNK_TILES
+                local_y = tile_y - chunk_y * MAP_CHUNK_TILES
+                if old_code == DOT_CODE:
+                    # Copy the tile back from the wall layer, wall edges reach into neighbouring tiles
+                    tile_rect = (local_x * TILE_SIZE, local_y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                    maze_surface.blit(wall_surface, tile_rect, tile_rect)
+                else:
+                    self.draw_dot(maze_surface, local_x, local_y)
+        
+        # Walls appearing or disappearing change the exits around the tile.
+        # The distance table and the content hash it is cached under no
+        # longer match the maze, distance falls back to the junction graph.
+        if (old_code == WALL_CODE) != (new_code == WALL_CODE):
+            self.layout_version += 1
+            self.walk_index = None
+            self.distance_table = None
+            self.content_hash = None
+            self.cache = False
+            self.junction_graph = None
+            self.nearest_open = None
+            self.dead_ends = None
+            for dx, dy, direction in DIRECTIONS:
+                if self.in_bounds(tile_x + dx, tile_y + dy):
+                    self.update_exits(tile_x + dx, tile_y + dy)
+
+    def is_wall(self, tile_x, tile_y):
+        return self.tiles[(tile_y + 1) * self.stride + tile_x + 1] == WALL_CODE
 
     def is_valid_position(self, x, y):
         map_x = int(x // TILE_SIZE)
         map_y = int(y // TILE_SIZE)
         
-        if (map_y < 0 or map_y >= len(self.map_data) or 
-            map_x < 0 or len(self.map_data) == 0 or
-            map_x >= len(self.map_data[map_y if map_y < len(self.map_data) else 0])):
+        if not self.in_bounds(map_x, map_y):
             return False
             
-        return self.map_data[map_y][map_x] != WALL
+        return not self.is_wall(map_x, map_y)
 
     def get_tile_at(self, x, y):
         map_x = int(x // TILE_SIZE)
         map_y = int(y // TILE_SIZE)
         
-        if (map_y < 0 or map_y >= len(self.map_data) or 
-            map_x < 0 or len(self.map_data) == 0 or
-            map_x >= len(self.map_data[map_y if map_y < len(self.map_data) else 0])):
+        if not self.in_bounds(map_x, map_y):
             return WALL
             
-        return self.map_data[map_y][map_x]
+        return self.get_tile(map_x, map_y)
 
     def count_remaining_dots(self):
-        count = 0
-        for row in self.map_data:
-            count += row.count(DOT)
-        return count
\ No newline at end of file
+        if self.debug_counters:
+            self.check_counters()
+        return self.remaining_dots
+
+    def count_remaining_power_pellets(self):
+        if self.debug_counters:
+            self.check_counters()
+        return self.remaining_power_pellets
+
+    def check_counters(self):
+        """Compare the live counters with a full scan of the grid"""
+        dots = self.tiles.count(DOT_CODE)
+        power_pellets = self.tiles.count(POWER_PELLET_CODE)
+        assert self.remaining_dots == dots, \
+            f"dot counter is {self.remaining_dots} but the map has {dots} dots"
+        assert self.remaining_power_pellets == power_pellets, \
+            f"power pellet counter is {self.remaining_power_pellets} but the map has {power_pellets}"
\ No newline at end of file
@@ -0,0 +1,210 @@
+import argparse
+import random
+import threading
+import time
+from levels import LEVELS
+from settings import *
+
+def generate_maze(width, height, seed=None, braid=MAZE_BRAID_CHANCE, ghosts=4):
+    """Random Pac-Man maze as a list of rows in the format Map accepts.
+
+    Corridors are carved with a randomized depth-first search over the odd
+    tiles, so every open tile is reachable. Dead ends are then opened into a
+    neighbouring corridor with probability braid, giving the loops ghosts
+    need to be escaped. A ghost room in the middle holds the G markers, P
+    starts at the bottom and a power pellet sits in each corner. Every other
+    open tile gets a dot. The same seed always gives the same maze.
+    """
+    if width < 9 or height < 9:
+        raise ValueError("mazes need to be at least 9x9 tiles")
+
+    rng = random.Random(seed)
+    tiles = bytearray([WALL_CODE]) * (width * height)
+    open_code = DOT_CODE
+
+    # Cell (cx, cy) is the tile (2 * cx + 1, 2 * cy + 1), walls sit between cells
+    cells_x = (width - 1) // 2
+    cells_y = (height - 1) // 2
+    visited = bytearray(cells_x * cells_y)
+    # Cell steps as (cell offset, tile offset of the wall in between, tile offset of the next cell)
+    steps = [(-cells_x, -width, -2 * width), (cells_x, width, 2 * width), (-1, -1, -2), (1, 1, 2)]
+
+    start = rng.randrange(cells_x * cells_y)
+    visited[start] = 1
+    tiles[(2 * (start // cells_x) + 1) * width + 2 * (start % cells_x) + 1] = open_code
+    stack = [start]
+    randrange = rng.randrange
+    while stack:
+        cell = stack[-1]
+        cell_x = cell % cells_x
+        tile = (2 * (cell // cells_x) + 1) * width + 2 * cell_x + 1
+        options = []
+        for cell_step, wall_step, tile_step in steps:
+            neighbour = cell + cell_step
+            if cell_step == -1 and cell_x == 0 or cell_step == 1 and cell_x == cells_x - 1:
+                continue
+            if 0 <= neighbour < len(visited) and not visited[neighbour]:
+                options.append((neighbour, tile + wall_step, tile + tile_step))
+        if not options:
+            stack.pop()
+            continue
+        neighbour, wall, next_tile = options[randrange(len(options))] if len(options) > 1 else options[0]
+        visited[neighbour] = 1
+        tiles[wall] = open_code
+        tiles[next_tile] = open_code
+        stack.append(neighbour)
+
+    # Braid: knock a wall out of dead ends, only towards another cell so the
+    # outer border stays closed
+    wall_code = WALL_CODE
+    for cell_y in range(cells_y):
+        for cell_x in range(cells_x):
+            tile = (2 * cell_y + 1) * width + 2 * cell_x + 1
+            walls = [tile + wall_step for _, wall_step, _ in steps
+                     if tiles[tile + wall_step] == wall_code]
+            if len(walls) != 3 or rng.random() >= braid:
+                continue
+            inner = []
+            if cell_y > 0:
+                inner.append(tile - width)
+            if cell_y < cells_y - 1:
+                inner.append(tile + width)
+            if cell_x > 0:
+                inner.append(tile - 1)
+            if cell_x < cells_x - 1:
+                inner.append(tile + 1)
+            inner = [wall for wall in inner if tiles[wall] == wall_code]
+            if inner:
+                tiles[inner[rng.randrange(len(inner))]] = open_code
+
+    # Ghost room: an open box in the middle, joined to the corridors around it
+    empty_code = EMPTY_CODE
+    room_width = max(ghosts, 3) + 2
+    room_left = width // 2 - room_width // 2
+    room_top = height // 2 - 1
+    for y in range(room_top, room_top + 3):
+        for x in range(room_left, room_left + room_width):
+            tiles[y * width + x] = empty_code
+    for i in range(ghosts):
+        tiles[(room_top + 1) * width + room_left + 1 + i % (room_width - 2)] = ord(GHOST_START)
+
+    # Pac-Man starts on the bottom row of cells, near the middle
+    start_x = 2 * (cells_x // 2) + 1
+    start_y = 2 * (cells_y - 1) + 1
+    tiles[start_y * width + start_x] = ord(PACMAN_START)
+
+    for corner_x, corner_y in ((1, 1), (2 * (cells_x - 1) + 1, 1),
+                               (1, 2 * (cells_y - 1) + 1), (2 * (cells_x - 1) + 1, 2 * (cells_y - 1) + 1)):
+        if tiles[corner_y * width + corner_x] == open_code:
+            tiles[corner_y * width + corner_x] = ord(POWER_PELLET)
+
+    text = tiles.decode('ascii')
+    return [text[y * width:(y + 1) * width] for y in range(height)]
+
+def generated_level(level_num, rows):
+    """Level data in the LEVELS format for a generated maze"""
+    return {
+        "name": f"Random maze {level_num - len(LEVELS)}",
+        "map": rows,
+        "ghost_speed": 1.2,
+        "pacman_speed": 1.2,
+        "description": "Randomly generated maze",
+        # Seeded per session, the maze is never loaded again
+        "cache": False
+    }
+
+def scatter_ghosts(rows, count, seed=None, min_distance=SWARM_SAFE_DISTANCE):
+    """Add G markers on random dot tiles until the maze has count ghosts.
+
+    Tiles closer than min_distance tiles (Manhattan) to Pac-Man's start are
+    left alone so the swarm does not catch Pac-Man on the first tick.
+    """
+    rng = random.Random(seed)
+    rows = [list(row) for row in rows]
+    start_x = start_y = 0
+    ghosts = 0
+    candidates = []
+    for y, row in enumerate(rows):
+        for x, tile in enumerate(row):
+            if tile == PACMAN_START:
+                start_x, start_y = x, y
+            elif tile == GHOST_START:
+                ghosts += 1
+    for y, row in enumerate(rows):
+        for x, tile in enumerate(row):
+            if tile == DOT and abs(x - start_x) + abs(y - start_y) >= min_distance:
+                candidates.append((x, y))
+    for x, y in rng.sample(candidates, min(max(count - ghosts, 0), len(candidates))):
+        rows[y][x] = GHOST_START
+    return [''.join(row) for row in rows]
+
+def swarm_level(seed=None):
+    """Level data in the LEVELS format for the swarm level: a big random maze
+    with SWARM_GHOSTS ghosts spread over it"""
+    width, height = SWARM_LEVEL_SIZE
+    rows = scatter_ghosts(generate_maze(width, height, seed), SWARM_GHOSTS, seed)
+    return {
+        "name": f"Swarm of {SWARM_GHOSTS}",
+        "map": rows,
+        "ghost_speed": 1.0,
+        "pacman_speed": 1.2,
+        "description": "Big random maze crawling with ghosts",
+        "cache": False
+    }
+
+class BackgroundMazeGenerator:
+    """Generates the next maze on a worker thread while the current level is played.
+
+    request starts a generation, take returns its result, waiting for the
+    thread if it has not finished yet. take generates in place when nothing
+    matching was requested.
+    """
+
+    def __init__(self):
+        self.thread = None
+        self.params = None
+        self.rows = None
+
+    def request(self, width, height, seed):
+        if self.thread is not None:
+            self.thread.join()
+        self.params = (width, height, seed)
+        self.rows = None
+        self.thread = threading.Thread(target=self.run, args=self.params, daemon=True)
+        self.thread.start()
+
+    def run(self, width, height, seed):
+        self.rows = generate_maze(width, height, seed)
+
+    def take(self, width, height, seed):
+        if self.thread is not None and self.params == (width, height, seed):
+            self.thread.join()
+            self.thread = None
+            if self.rows is not None:
+                return self.rows
+        return generate_maze(width, height, seed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a random Pac-Man maze")
+    parser.add_argument('--width', type=int, default=GENERATED_LEVEL_SIZE[0])
+    parser.add_argument('--height', type=int, default=GENERATED_LEVEL_SIZE[1])
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', help="write the maze to this map file instead of printing it")
+    parser.add_argument('--repeat', type=int, default=1, help="generate several mazes and report the time")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    for i in range(args.repeat):
+        seed = args.seed + i if args.seed is not None else None
+        rows = generate_maze(args.width, args.height, seed)
+    elapsed = time.perf_counter() - start_time
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write('\n'.join(rows) + '\n')
+    else:
+        print('\n'.join(rows))
+    print(f"{args.width}x{args.height}: {elapsed * 1000 / args.repeat:.1f} ms per maze")
+
+if __name__ == '__main__':
+    main()
@@ -56,6 +56,9 @@ class MenuSystem:
             elif event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
                 self.create_start_particles()
                 return self.selected_level
+            elif event.key == pygame.K_x:
+                self.create_start_particles()
+                return SWARM_LEVEL
             elif event.key == pygame.K_ESCAPE:
                 return "quit"
         return None
@@ -352,4 +355,8 @@ class MenuSystem:
         
         # Center the text
         text_x = (SCREEN_WIDTH - text_surface.get_width()) // 2
-        self.screen.blit(text_surface, (text_x, instruction_y))
\ No newline at end of file
+        self.screen.blit(text_surface, (text_x, instruction_y))
+        
+        swarm_surface = small_font.render(f"PRESS X FOR THE SWARM LEVEL WITH {SWARM_GHOSTS} GHOSTS", True, YELLOW)
+        swarm_x = (SCREEN_WIDTH - swarm_surface.get_width()) // 2
+        self.screen.blit(swarm_surface, (swarm_x, instruction_y + 20))
\ No newline at end of file
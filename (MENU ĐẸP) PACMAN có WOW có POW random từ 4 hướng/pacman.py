@@ -16,12 +16,18 @@ class Pacman:
         # For smooth movement
         self.target_x = self.x
         self.target_y = self.y
+        
+        # Position before the last simulation tick, for interpolated drawing
+        self.prev_x = self.x
+        self.prev_y = self.y
 
     def set_power_mode(self, power_mode):
         """Set Pacman's power mode state"""
         self.power_mode = power_mode
 
-    def move(self, map_data):
+    def move(self, game_map):
+        self.prev_x, self.prev_y = self.x, self.y
+        
         # Try to change direction if a new direction was requested
         if self.next_direction != 'STOP':
             new_x, new_y = self.x, self.y
@@ -35,7 +41,7 @@ class Pacman:
                 new_x += self.speed
             
             # Check if we can move in the new direction
-            if not self.is_collision(new_x, new_y, map_data):
+            if not self.is_collision(new_x, new_y, game_map):
                 self.direction = self.next_direction
                 self.next_direction = 'STOP'
 
@@ -51,10 +57,10 @@ class Pacman:
             new_x += self.speed
 
         # Check for collision with walls and ensure we stay within bounds
-        if not self.is_collision(new_x, new_y, map_data):
-            # Additional safety check to ensure we don't go off screen
-            new_x = max(0, min(new_x, SCREEN_WIDTH - TILE_SIZE))
-            new_y = max(0, min(new_y, SCREEN_HEIGHT - TILE_SIZE))
+        if not self.is_collision(new_x, new_y, game_map):
+            # Additional safety check to ensure we don't go off the map
+            new_x = max(0, min(new_x, game_map.width * TILE_SIZE - TILE_SIZE))
+            new_y = max(0, min(new_y, game_map.height * TILE_SIZE - TILE_SIZE))
             self.x, self.y = new_x, new_y
         else:
             self.direction = 'STOP'  # Stop if hitting a wall
@@ -65,66 +71,63 @@ class Pacman:
             if self.animation_frame >= 2 * math.pi:
                 self.animation_frame = 0
 
-    def is_collision(self, x, y, map_data):
+    def is_still(self, game_map):
+        """Whether move would leave Pac-Man where it is: stopped, with no turn it can take"""
+        if self.direction != 'STOP':
+            return False
+        for dx, dy, direction in DIRECTIONS:
+            if direction == self.next_direction:
+                return self.is_collision(self.x + dx * self.speed, self.y + dy * self.speed, game_map)
+        return True
+
+    def is_collision(self, x, y, game_map):
         # Check collision with map bounds first
         if x < 0 or y < 0:
             return True
         
-        # Convert pixel position to tile index
-        # Check all corners of Pacman's bounding box
-        tile_positions = [
-            (int(x // TILE_SIZE), int(y // TILE_SIZE)),  # Top-left
-            (int((x + TILE_SIZE - 1) // TILE_SIZE), int(y // TILE_SIZE)),  # Top-right
-            (int(x // TILE_SIZE), int((y + TILE_SIZE - 1) // TILE_SIZE)),  # Bottom-left
-            (int((x + TILE_SIZE - 1) // TILE_SIZE), int((y + TILE_SIZE - 1) // TILE_SIZE))  # Bottom-right
-        ]
+        # Convert pixel position to tile index and check all corners of
+        # Pacman's bounding box. The wall border around the map grid covers
+        # the tiles just outside it, so no other bounds checks are needed.
+        left = int(x // TILE_SIZE)
+        top = int(y // TILE_SIZE)
+        right = int((x + TILE_SIZE - 1) // TILE_SIZE)
+        bottom = int((y + TILE_SIZE - 1) // TILE_SIZE)
         
-        for map_x, map_y in tile_positions:
-            # Check bounds more carefully
-            if (map_y >= len(map_data) or 
-                map_y < 0 or 
-                map_x < 0 or 
-                len(map_data) == 0 or
-                map_x >= len(map_data[map_y]) or
-                len(map_data[map_y]) == 0):
-                return True
-                
-            # Check if any corner is in a wall
-            if map_data[map_y][map_x] == WALL:
-                return True
-                
-        return False
+        return (game_map.is_wall(left, top) or game_map.is_wall(right, top) or
+                game_map.is_wall(left, bottom) or game_map.is_wall(right, bottom))
 
-    def eat(self, map_data):
+    def eat(self, game_map):
         # Check if Pacman is on a dot or power pellet
         map_x = int((self.x + TILE_SIZE//2) // TILE_SIZE)
         map_y = int((self.y + TILE_SIZE//2) // TILE_SIZE)
         
-        if (0 <= map_y < len(map_data) and 
-            0 <= map_x < len(map_data[map_y]) and 
-            len(map_data[map_y]) > 0):
-            
-            if map_data[map_y][map_x] == DOT:
-                # Create new row with the dot removed
-                row = map_data[map_y]
-                new_row = row[:map_x] + EMPTY + row[map_x+1:]
-                map_data[map_y] = new_row
-                return 'DOT'
-            elif map_data[map_y][map_x] == POWER_PELLET:
-                # Create new row with the power pellet removed
-                row = map_data[map_y]
-                new_row = row[:map_x] + EMPTY + row[map_x+1:]
-                map_data[map_y] = new_row
-                return 'POWER_PELLET'
+        tile = game_map.get_tile(map_x, map_y)
+        if tile == DOT:
+            game_map.set_tile(map_x, map_y, EMPTY)
+            return 'DOT'
+        elif tile == POWER_PELLET:
+            game_map.set_tile(map_x, map_y, EMPTY)
+            return 'POWER_PELLET'
         return None
 
     def set_direction(self, direction):
         """Set the next direction for Pacman"""
         self.next_direction = direction
 
-    def draw(self, screen):
-        center_x = self.x + TILE_SIZE // 2
-        center_y = self.y + TILE_SIZE // 2
+    def render_pos(self, alpha=1.0):
+        """Position between the last two ticks, alpha is the fraction of a tick elapsed"""
+        # Don't slide across the map after a teleport or reset
+        if abs(self.x - self.prev_x) > TILE_SIZE or abs(self.y - self.prev_y) > TILE_SIZE:
+            return self.x, self.y
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+
+    def draw(self, screen, alpha=1.0, camera=None):
+        x, y = self.render_pos(alpha)
+        if camera:
+            x, y = x - camera.x, y - camera.y
+        center_x = x + TILE_SIZE // 2
+        center_y = y + TILE_SIZE // 2
         radius = TILE_SIZE // 2 - 1
         
         # Calculate mouth opening angle based on animation
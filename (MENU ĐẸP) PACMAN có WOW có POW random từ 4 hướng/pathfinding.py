@@ -0,0 +1,76 @@
+import heapq
+from collections import deque
+from settings import *
+
+try:
+    from distances import UNREACHABLE
+except ImportError:  # no numpy, so no distance tables either
+    UNREACHABLE = None
+
+def find_path(game_map, from_x, from_y, to_x, to_y):
+    """Shortest path between two walkable tiles as a list of (tile_x, tile_y, direction) moves.
+
+    The first move leaves the start tile and the last one arrives at the
+    goal, so a path from a tile to itself is empty. Returns None when there
+    is no path. With a distance table the path is read off the table,
+    taking the first move in DIRECTIONS order that gets one tile closer at
+    every step, the same move Ghost.choose_closest_move picks. Maps without
+    a table are searched with A*.
+    """
+    if game_map.is_wall(from_x, from_y) or game_map.is_wall(to_x, to_y):
+        return None
+    if game_map.distance_table is not None:
+        return table_path(game_map, from_x, from_y, to_x, to_y)
+    return astar_path(game_map, from_x, from_y, to_x, to_y)
+
+def table_path(game_map, from_x, from_y, to_x, to_y):
+    walk_index = game_map.walk_index
+    stride = game_map.stride
+    # The table is symmetric, the goal's row holds every tile's distance to it
+    distances = game_map.distance_table[walk_index[(to_y + 1) * stride + to_x + 1]]
+    remaining = int(distances[walk_index[(from_y + 1) * stride + from_x + 1]])
+    if remaining >= UNREACHABLE:
+        return None
+
+    path = []
+    tile_x, tile_y = from_x, from_y
+    while remaining:
+        remaining -= 1
+        for move in game_map.get_moves(tile_x, tile_y):
+            if distances[walk_index[(move[1] + 1) * stride + move[0] + 1]] == remaining:
+                break
+        path.append(move)
+        tile_x, tile_y = move[0], move[1]
+    return path
+
+def astar_path(game_map, from_x, from_y, to_x, to_y):
+    start = game_map.index(from_x, from_y)
+    goal = game_map.index(to_x, to_y)
+    # Per reached cell: the move that got there and the cell it came from
+    came_from = {start: None}
+    cost = {start: 0}
+    # The counter keeps equal entries in insertion order
+    queue = [(abs(from_x - to_x) + abs(from_y - to_y), 0, start)]
+    counter = 0
+    stride = game_map.stride
+    while queue:
+        _, _, current = heapq.heappop(queue)
+        if current == goal:
+            break
+        next_cost = cost[current] + 1
+        for move in game_map.moves[current]:
+            index = (move[1] + 1) * stride + move[0] + 1
+            if next_cost < cost.get(index, next_cost + 1):
+                cost[index] = next_cost
+                came_from[index] = (current, move)
+                counter += 1
+                estimate = next_cost + abs(move[0] - to_x) + abs(move[1] - to_y)
+                heapq.heappush(queue, (estimate, counter, index))
+    else:
+        return None
+
+    path = deque()
+    while came_from[current] is not None:
+        current, move = came_from[current]
+        path.appendleft(move)
+    return list(path)
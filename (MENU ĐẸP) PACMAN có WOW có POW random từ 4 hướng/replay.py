@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import time
+from settings import *
+
+REPLAY_VERSION = 4
+
+class InputRecorder:
+    """Logs the player actions of one session with the tick they were applied on.
+
+    Ghost decisions the AI scheduler deferred for lack of time are logged the
+    same way, as are the rollouts of timed TEAM searches. Together with the
+    level, the ghost personalities and the RNG seed of the session this is
+    all that is needed to re-run the session exactly (see replay_log).
+    """
+
+    def __init__(self, level_num, seed, personalities=GHOST_PERSONALITIES):
+        self.level_num = level_num
+        self.seed = seed
+        self.personalities = list(personalities)
+        self.events = []
+
+    def record(self, tick, action):
+        self.events.append([tick, action])
+
+    def to_log(self, game):
+        return {
+            'version': REPLAY_VERSION,
+            'level': self.level_num,
+            'seed': self.seed,
+            'personalities': self.personalities,
+            'events': self.events,
+            'ticks': game.ticks,
+            'result': {
+                'level': game.level,
+                'score': game.score,
+                'lives': game.lives,
+                'checksum': game.state_checksum()
+            }
+        }
+
+    def save(self, game, directory=REPLAY_DIR):
+        os.makedirs(directory, exist_ok=True)
+        filename = os.path.join(directory, f"replay_{time.strftime('%Y%m%d_%H%M%S')}_{self.seed}.json")
+        with open(filename, 'w') as f:
+            json.dump(self.to_log(game), f)
+        return filename
+
+def load_log(filename):
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+def replay_log(log):
+    """Re-run a recorded session headlessly at full speed, return the finished game"""
+    from game import Game
+
+    game = Game(headless=True)
+    # Follow the windowed game's rules when a level is cleared
+    game.campaign = True
+    game.carry_score = False
+    game.ghost_personalities = list(log.get('personalities', GHOST_PERSONALITIES))
+    game.start_session(log['level'], log['seed'], record=False)
+
+    events = log['events']
+    next_event = 0
+    while game.current_state == 'PLAYING' and game.ticks < log['ticks']:
+        while next_event < len(events) and events[next_event][0] == game.ticks:
+            game.apply_action(events[next_event][1])
+            next_event += 1
+        # Nothing can change before the next input while everyone stands still
+        until = events[next_event][0] if next_event < len(events) else log['ticks']
+        if game.fast_forward(until):
+            continue
+        game.update_game()
+    return game
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run a recorded Pac-Man session without a window")
+    parser.add_argument('replay', help="replay log written by the game")
+    parser.add_argument('--repeat', type=int, default=1, help="run the log several times for benchmarking")
+    args = parser.parse_args()
+
+    log = load_log(args.replay)
+    expected = log['result']
+
+    start_time = time.perf_counter()
+    for _ in range(args.repeat):
+        game = replay_log(log)
+    elapsed = time.perf_counter() - start_time
+
+    result = {
+        'level': game.level,
+        'score': game.score,
+        'lives': game.lives,
+        'checksum': game.state_checksum()
+    }
+    print(f"Replayed {len(log['events'])} inputs over {game.ticks} ticks, score {game.score}, lives {game.lives}")
+
+    total_ticks = game.ticks * args.repeat
+    if elapsed > 0:
+        print(f"{total_ticks:,} ticks in {elapsed:.2f}s: {total_ticks / elapsed:,.0f} ticks/s")
+
+    if result != expected:
+        print(f"MISMATCH: recorded {expected}, replayed {result}")
+        raise SystemExit(1)
+    print("Result matches the recording")
+
+if __name__ == '__main__':
+    main()
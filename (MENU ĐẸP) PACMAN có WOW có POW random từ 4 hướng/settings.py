@@ -1,7 +1,12 @@
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 660
 TILE_SIZE = 20
-FPS = 60
+FPS = 60  # simulation ticks per second
+
+# Rendering runs independently of the simulation, up to this many frames per second
+RENDER_FPS_LIMIT = 144
+# Longest frame the simulation catches up on, so a stall doesn't trigger a burst of ticks
+MAX_FRAME_TIME = 0.25
 
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -31,7 +36,33 @@ EMPTY = ' '
 PACMAN_START = 'P'
 GHOST_START = 'G'
 
+# Neighbour offsets in the order ghosts consider them, with their bit in Map.exits
+DIRECTIONS = [
+    (0, -1, 'UP'),
+    (0, 1, 'DOWN'),
+    (-1, 0, 'LEFT'),
+    (1, 0, 'RIGHT')
+]
+EXIT_BITS = {'UP': 1, 'DOWN': 2, 'LEFT': 4, 'RIGHT': 8}
+OPPOSITE_DIRECTIONS = {'UP': 'DOWN', 'DOWN': 'UP', 'LEFT': 'RIGHT', 'RIGHT': 'LEFT'}
+
+# Byte values of the tiles in Map.tiles
+WALL_CODE = ord(WALL)
+DOT_CODE = ord(DOT)
+POWER_PELLET_CODE = ord(POWER_PELLET)
+EMPTY_CODE = ord(EMPTY)
+
+GHOST_PERSONALITIES = ['AGGRESSIVE', 'AMBUSH', 'PATROL', 'RANDOM']
+
+# Power pellets pulse between these radii (pixels)
+PELLET_MIN_RADIUS = 4
+PELLET_MAX_RADIUS = 6
+
 POWER_PELLET_DURATION = 300
+GHOST_DECISION_INTERVAL = 20  # ticks a ghost with nowhere to go waits before looking again
+# Ticks a ghost of a personality waits on arriving at a tile before it
+# decides where to go next, none for personalities not listed
+GHOST_THINK_DELAYS = {}
 GHOST_SPEED_NORMAL = 1
 GHOST_SPEED_SCARED = 0.5
 PACMAN_SPEED = 2
@@ -48,4 +79,82 @@ STATE_PAUSED = 'PAUSED'
 STATE_QUIT = 'QUIT'
 
 ENABLE_SOUND = True
-SOUND_VOLUME = 0.5
\ No newline at end of file
+SOUND_VOLUME = 0.5
+
+# On-disk caches of precomputed level data
+CACHE_DIR = 'cache'
+
+# Compile text maps into the binary level format in CACHE_DIR on first load,
+# see level_compiler.py
+COMPILE_LEVELS = True
+
+# Maps are drawn from square chunks of this many tiles, built as they come into
+# view. Each map keeps at most MAP_CHUNK_CACHE_SIZE of them.
+MAP_CHUNK_TILES = 16
+MAP_CHUNK_CACHE_SIZE = 48
+
+# Rendered wall chunks kept in memory, optionally also saved as PNG in CACHE_DIR
+WALL_CACHE_SIZE = 256
+WALL_CACHE_PERSIST = False
+
+# Maze distance tables take walkable_tiles^2 * 2 bytes, bigger maps fall back
+# to Manhattan distance
+DISTANCE_TABLE_MAX_TILES = 4096
+
+# Maps without a distance table search the junction graph instead, keeping the
+# results for this many target tiles
+JUNCTION_DISTANCE_CACHE_SIZE = 64
+
+# Random mazes played after the last built-in level, see maze_gen.py. Dead
+# ends are opened into a loop with probability MAZE_BRAID_CHANCE.
+GENERATED_LEVEL_SIZE = (40, 33)
+MAZE_BRAID_CHANCE = 0.75
+
+# Swarm level, started with X in the menu: a random maze with this many
+# ghosts, none starting closer than SWARM_SAFE_DISTANCE tiles to Pac-Man.
+# SWARM_LEVEL is a level number outside the campaign, clearing it ends the
+# session. The maze is big enough to go over DISTANCE_TABLE_MAX_TILES, so
+# it uses the junction graph instead of building a distance table.
+SWARM_LEVEL = -1
+SWARM_LEVEL_SIZE = (101, 101)
+SWARM_GHOSTS = 500
+SWARM_SAFE_DISTANCE = 12
+# Levels with at least this many ghosts keep their state in a GhostStore,
+# see ghost_store.py
+GHOST_STORE_MIN_GHOSTS = 64
+
+# Flow fields on maps without a distance table reach this many tiles from
+# Pac-Man, ghosts further away search themselves (see flow_field.py)
+FLOW_FIELD_RADIUS = 48
+
+# Scared ghosts treat tiles in dead-end pockets as this much closer to
+# Pac-Man, plus two tiles per tile of depth, see Map.build_dead_ends
+FLEE_DEAD_END_PENALTY = 6
+
+# Time per tick windowed games allow for ghost decisions, the rest wait for
+# the next tick (see ai_scheduler.py). Headless games have no budget.
+AI_DECISION_BUDGET_US = 2000
+
+# TEAM ghosts plan their moves together with Monte Carlo tree search, see
+# team_planner.py. Windowed games give the searches of a tick
+# TEAM_PLANNER_BUDGET_MS, headless games TEAM_PLANNER_ROLLOUTS rollouts per
+# search. Rollouts look TEAM_PLANNER_HORIZON moves ahead, with up to
+# TEAM_PLANNER_MAX_GHOSTS ghosts planned at once. TEAM_PLANNER_WORKER runs
+# the searches of windowed games in a separate process, TEAM_PLANNER_WORKER_BUDGET_MS
+# each, without ever waiting for them (see ai_worker.py).
+TEAM_PLANNER_BUDGET_MS = 2
+TEAM_PLANNER_ROLLOUTS = 64
+TEAM_PLANNER_HORIZON = 16
+TEAM_PLANNER_MAX_GHOSTS = 4
+TEAM_PLANNER_WORKER = False
+TEAM_PLANNER_WORKER_BUDGET_MS = 10
+
+# Cross-check Map's live dot counters against a full scan on every query (slow)
+DEBUG_DOT_COUNTER = False
+
+# Headless simulation
+HEADLESS_MAX_TICKS = 60 * 60 * 5  # 5 minutes of game time at 60 FPS
+
+# Input recording for replays
+RECORD_INPUT = True
+REPLAY_DIR = 'replays'
@@ -0,0 +1,61 @@
+from settings import *
+
+class SpatialHash:
+    """Entities bucketed by the grid cell of their top-left corner.
+
+    Every entity is a TILE_SIZE square at (entity.x, entity.y), so with cells
+    at least that big two overlapping entities are always in the same or
+    neighbouring cells and a query only looks at the 3x3 cells around it.
+    Call update after an entity moves; it only touches the buckets when the
+    entity changed cell.
+    """
+
+    def __init__(self, cell_size=TILE_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entity_cells = {}
+
+    def cell_of(self, x, y):
+        return int(x) // self.cell_size, int(y) // self.cell_size
+
+    def update(self, entity):
+        cell_size = self.cell_size
+        cell = (int(entity.x) // cell_size, int(entity.y) // cell_size)
+        old_cell = self.entity_cells.get(entity)
+        if cell == old_cell:
+            return
+        if old_cell is not None:
+            self.cells[old_cell].remove(entity)
+            if not self.cells[old_cell]:
+                del self.cells[old_cell]
+        self.cells.setdefault(cell, []).append(entity)
+        self.entity_cells[entity] = cell
+
+    def remove(self, entity):
+        cell = self.entity_cells.pop(entity, None)
+        if cell is not None:
+            self.cells[cell].remove(entity)
+            if not self.cells[cell]:
+                del self.cells[cell]
+
+    def clear(self):
+        self.cells.clear()
+        self.entity_cells.clear()
+
+    def nearby(self, x, y):
+        """Entities in the cells around the TILE_SIZE square at (x, y)"""
+        cell_x, cell_y = self.cell_of(x, y)
+        cells = self.cells
+        for neighbour_y in (cell_y - 1, cell_y, cell_y + 1):
+            for neighbour_x in (cell_x - 1, cell_x, cell_x + 1):
+                bucket = cells.get((neighbour_x, neighbour_y))
+                if bucket:
+                    yield from bucket
+
+    def colliding(self, x, y):
+        """Entities overlapping the TILE_SIZE square at (x, y)"""
+        return [entity for entity in self.nearby(x, y) if overlaps(entity.x, entity.y, x, y)]
+
+def overlaps(x1, y1, x2, y2):
+    """Rect.colliderect for two TILE_SIZE squares, without building the Rects"""
+    return abs(int(x1) - int(x2)) < TILE_SIZE and abs(int(y1) - int(y2)) < TILE_SIZE
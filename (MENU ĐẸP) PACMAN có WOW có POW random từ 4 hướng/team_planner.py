@@ -0,0 +1,485 @@
+import itertools
+import math
+import random
+import time
+from ai_worker import AIWorker, receive_all
+from settings import *
+
+# Rollout scores: a capture after d of the horizon's steps is worth
+# 1 - CAPTURE_DELAY_WEIGHT * d / horizon, an escape at most ESCAPE_SCORE
+CAPTURE_DELAY_WEIGHT = 0.5
+ESCAPE_SCORE = 0.5
+UCB_EXPLORATION = 0.7
+
+class PlannerMaze:
+    """Walkable tiles of a map with their exits, built from Map.tiles.
+
+    Tiles are Map.index offsets. exits[tile] maps the tile a walker came
+    from to the tiles it may go on to, in DIRECTIONS order: every open
+    neighbour but the one it came from, unless the tile is a dead end. None
+    stands for not coming from a neighbour. Wall tiles have exits too, as in
+    Map.build_exits, since ghosts may start inside one. Plain lists, dicts
+    and tuples only, so the maze pickles cheaply into the worker process.
+    """
+
+    def __init__(self, tiles, stride):
+        self.stride = stride
+        self.tile_x = [index % stride - 1 for index in range(len(tiles))]
+        self.tile_y = [index // stride - 1 for index in range(len(tiles))]
+        self.exits = [None] * len(tiles)
+        rows = len(tiles) // stride
+        for index in range(len(tiles)):
+            # The border around the map only surrounds it, its cells have no exits
+            if not (0 < index % stride < stride - 1 and 0 < index // stride < rows - 1):
+                continue
+            neighbours = tuple(other for other in (index - stride, index + stride, index - 1, index + 1)
+                               if tiles[other] != WALL_CODE)
+            exits = {None: neighbours}
+            for previous in neighbours:
+                # A dead end sends the walker back the way it came
+                forward = tuple(other for other in neighbours if other != previous)
+                exits[previous] = forward or neighbours
+            self.exits[index] = exits
+
+    def distance(self, a, b):
+        """Manhattan distance between two tiles"""
+        return abs(self.tile_x[a] - self.tile_x[b]) + abs(self.tile_y[a] - self.tile_y[b])
+
+    def options(self, tile, previous):
+        exits = self.exits[tile]
+        return exits.get(previous) or exits[None]
+
+class Node:
+    """Open-loop tree node, reached by a sequence of joint ghost moves"""
+    __slots__ = ('children', 'untried', 'visits', 'value')
+
+    def __init__(self, joint_moves):
+        self.children = {}
+        self.untried = joint_moves
+        self.visits = 0
+        self.value = 0.0
+
+def joint_moves(maze, team, previous):
+    return list(itertools.product(*(maze.options(tile, before) for tile, before in zip(team, previous))))
+
+def search(maze, state, rng, rollouts=None, deadline=None, horizon=TEAM_PLANNER_HORIZON):
+    """Monte Carlo tree search over the team's joint moves, returns (tile, rollouts done).
+
+    state is (pacman, pacman previous, team tiles, team previous tiles,
+    other ghost tiles, dot tiles), see TeamPlanner.snapshot; the first team
+    ghost is the one deciding and tile is its best first move. Pac-Man and
+    the other ghosts follow the rollout policies in the tree too, so the
+    tree is open-loop: a node stands for a sequence of team moves. Runs
+    rollouts iterations, or until the perf_counter deadline, at least one.
+    """
+    pacman, pacman_previous, team, team_previous, others, dots = state
+    root = Node(joint_moves(maze, team, team_previous))
+    if not root.untried:
+        return None, 0
+    done = 0
+    while True:
+        reward = simulate(maze, root, pacman, pacman_previous, team, team_previous, others, dots, rng, horizon)
+        root.visits += 1
+        root.value += reward
+        done += 1
+        if rollouts is not None and done >= rollouts:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        if rollouts is None and deadline is None:
+            break
+
+    best = max(root.children.items(), key=lambda item: item[1].visits)[0]
+    return best[0], done
+
+def simulate(maze, root, pacman, pacman_previous, team, team_previous, others, dots, rng, horizon):
+    """One iteration: select and expand down the tree, roll out, back the reward up"""
+    exits = maze.exits
+    tile_x = maze.tile_x
+    tile_y = maze.tile_y
+    random_number = rng.random
+    team_previous = list(team_previous)
+    others_previous = [None] * len(others)
+    eaten = set()
+    path = []
+    node = root
+    expanded = None
+    for step in range(1, horizon + 1):
+        pacman_x = tile_x[pacman]
+        pacman_y = tile_y[pacman]
+        # Tree moves while the tree reaches, the chase rollout policy after it
+        if node is not None:
+            if node.untried:
+                joint = node.untried.pop(rng.randrange(len(node.untried)))
+                child = Node(None)
+                node.children[joint] = child
+                path.append(child)
+                node = None
+                expanded = child
+            else:
+                joint = select(node)
+                node = node.children[joint]
+                path.append(node)
+            next_team = list(joint)
+        else:
+            next_team = chase_moves(exits, tile_x, tile_y, team, team_previous, pacman_x, pacman_y, random_number)
+        next_others = chase_moves(exits, tile_x, tile_y, others, others_previous, pacman_x, pacman_y, random_number)
+
+        ghosts = next_team + next_others
+        next_pacman = pacman_move(maze, pacman, pacman_previous, ghosts, dots, eaten, random_number)
+        caught = False
+        for tile, next_tile in zip(team + others, ghosts):
+            # Same tile, or Pac-Man and a ghost passing each other
+            if next_tile == next_pacman or (tile == next_pacman and next_tile == pacman):
+                caught = True
+                break
+        team_previous = team
+        team = next_team
+        others_previous = others
+        others = next_others
+        pacman_previous, pacman = pacman, next_pacman
+        eaten.add(pacman)
+        if expanded is not None:
+            expanded.untried = joint_moves(maze, team, team_previous)
+            expanded = None
+        if caught:
+            reward = 1.0 - CAPTURE_DELAY_WEIGHT * step / horizon
+            break
+    else:
+        closest = min(maze.distance(tile, pacman) for tile in team)
+        reward = ESCAPE_SCORE / (1 + closest)
+
+    for visited in path:
+        visited.visits += 1
+        visited.value += reward
+    return reward
+
+def select(node):
+    """Child with the best UCB1 score"""
+    log_visits = math.log(node.visits)
+    best_joint = None
+    best_score = -1.0
+    for joint, child in node.children.items():
+        score = child.value / child.visits + UCB_EXPLORATION * math.sqrt(log_visits / child.visits)
+        if score > best_score:
+            best_score = score
+            best_joint = joint
+    return best_joint
+
+def chase_moves(exits, tile_x, tile_y, ghosts, previous, pacman_x, pacman_y, random_number):
+    """Rollout ghosts: mostly the move closest to Pac-Man, now and then a random one"""
+    moves = []
+    for tile, before in zip(ghosts, previous):
+        options = exits[tile].get(before) or exits[tile][None]
+        if len(options) == 1:
+            moves.append(options[0])
+        elif random_number() < 0.25:
+            moves.append(options[int(random_number() * len(options))])
+        else:
+            best_tile = options[0]
+            best_distance = abs(tile_x[best_tile] - pacman_x) + abs(tile_y[best_tile] - pacman_y)
+            for other in options[1:]:
+                distance = abs(tile_x[other] - pacman_x) + abs(tile_y[other] - pacman_y)
+                if distance < best_distance:
+                    best_tile = other
+                    best_distance = distance
+            moves.append(best_tile)
+    return moves
+
+def pacman_move(maze, pacman, previous, ghosts, dots, eaten, random_number):
+    """Rollout Pac-Man: keep clear of the ghosts, take dots on the way, sometimes wander"""
+    options = maze.options(pacman, previous)
+    if len(options) == 1:
+        return options[0]
+    if random_number() < 0.1:
+        return options[int(random_number() * len(options))]
+    tile_x = maze.tile_x
+    tile_y = maze.tile_y
+    best_tile = None
+    best_score = -1.0
+    for other in options:
+        other_x = tile_x[other]
+        other_y = tile_y[other]
+        # Ghosts further away than 4 tiles are no danger yet
+        danger = 4
+        for ghost in ghosts:
+            distance = abs(tile_x[ghost] - other_x) + abs(tile_y[ghost] - other_y)
+            if distance < danger:
+                danger = distance
+        score = 2 * danger + random_number()
+        if other not in eaten and dots[other] in (DOT_CODE, POWER_PELLET_CODE):
+            score += 1
+        if score > best_score:
+            best_score = score
+            best_tile = other
+    return best_tile
+
+def worker_main(connection):
+    """AIWorker target: answers ('request', id, ghost index, state, seed, budget ms) with
+    (id, ghost index, tile, rollouts done, seconds), after a ('maze', tiles, stride) message"""
+    maze = None
+    while True:
+        requests = {}
+        for message in receive_all(connection):
+            if message is None:
+                return
+            if message[0] == 'maze':
+                # Requests queued before a new maze are for the last level
+                maze = PlannerMaze(message[1], message[2])
+                requests.clear()
+            else:
+                # Only the newest request of a ghost is still waited for
+                requests[message[2]] = message
+        for _, request_id, index, state, seed, budget_ms in requests.values():
+            start_time = time.perf_counter()
+            tile, done = search(maze, state, random.Random(seed), None, start_time + budget_ms / 1000)
+            connection.send((request_id, index, tile, done, time.perf_counter() - start_time))
+
+class TeamPlanner:
+    """Plans the moves of TEAM ghosts together with Monte Carlo tree search.
+
+    The deciding ghost and up to TEAM_PLANNER_MAX_GHOSTS - 1 other normal
+    TEAM ghosts closest to Pac-Man are searched jointly on a tile-level copy
+    of the game (see snapshot). All searches of a tick share budget_ms
+    milliseconds; with a budget of None, as in headless games, every search
+    runs a fixed number of rollouts so results do not depend on the machine.
+    Each search is seeded from the game seed, tick and ghost, and the
+    rollouts a timed search managed are kept in planned for replays, which
+    force the same counts (see force). A search gets no time when the
+    tick's budget is used up, the ghost then chases Pac-Man directly.
+
+    With worker=True the searches run in an AIWorker process instead and
+    never hold up the game: a ghost setting off for a junction asks for its
+    move there (see prepare), searched for worker_budget_ms, and picks the
+    answer up on arrival. An answer that is not in by then is late and the
+    ghost keeps going the way it went. Moves made that way depend on
+    timing, planned keeps them for replays too (see force_move).
+    """
+
+    def __init__(self, budget_ms=TEAM_PLANNER_BUDGET_MS, rollouts=TEAM_PLANNER_ROLLOUTS, worker=False,
+                 worker_budget_ms=TEAM_PLANNER_WORKER_BUDGET_MS):
+        self.budget_ms = budget_ms
+        self.rollouts = rollouts
+        self.use_worker = worker
+        self.worker_budget_ms = worker_budget_ms
+        self.worker = None
+        self.game = None
+        self.map = None
+        self.maze = None
+        self.tick = None
+        self.tick_used = 0.0
+        # Ghost index -> rollouts of its next search, see force
+        self.forced = {}
+        # Ghost index -> direction of its next move, see force_move
+        self.forced_moves = {}
+        # Replay events of the plans made since the last take_planned
+        self.planned = []
+        # Worker requests by ghost index: (request id, tile, tick) while
+        # searching, then (tile, best next tile, tick) until the ghost gets there
+        self.waiting = {}
+        self.ready = {}
+        self.searches = 0
+        self.total_rollouts = 0
+        self.total_time = 0.0
+        # Worker answers used, their total age in ticks and the ones that came too late
+        self.answers = 0
+        self.stale_ticks = 0
+        self.late = 0
+
+    def attach(self, game):
+        self.game = game
+        if self.use_worker and self.worker is None:
+            # Started before play, the process takes a moment to come up
+            self.worker = AIWorker(worker_main)
+
+    def force(self, index, rollouts):
+        """Run the ghost's next search for exactly this many rollouts, for replaying a recorded search"""
+        self.forced[index] = rollouts
+
+    def force_move(self, index, direction):
+        """Make the ghost's next planned move in direction, CHASE to chase Pac-Man instead.
+
+        For replaying a move the worker planned.
+        """
+        self.forced_moves[index] = direction
+
+    def take_planned(self):
+        planned = self.planned
+        self.planned = []
+        return planned
+
+    def snapshot(self, index, tile, previous):
+        """Tile-level copy of the game for a search of ghost index from tile, as described in search"""
+        game = self.game
+        game_map = game.map
+        pacman = game.pacman
+        pacman_tile = game_map.index(int((pacman.x + TILE_SIZE // 2) // TILE_SIZE),
+                                     int((pacman.y + TILE_SIZE // 2) // TILE_SIZE))
+        pacman_previous = self.behind(pacman_tile, pacman.direction)
+
+        team = []
+        others = []
+        for other_index, other in enumerate(game.ghosts):
+            if other_index == index or other.state != 'NORMAL':
+                continue
+            # Ghosts on their way count as being on the tile they are heading for
+            other_tile = game_map.index(other.target_tile_x, other.target_tile_y)
+            if other.personality == 'TEAM':
+                other_previous = (game_map.index(other.tile_x, other.tile_y) if other.is_moving
+                                  else self.behind(other_tile, other.direction))
+                team.append((self.maze.distance(other_tile, pacman_tile), other_index, other_tile, other_previous))
+            elif self.maze.distance(other_tile, pacman_tile) <= TEAM_PLANNER_HORIZON:
+                others.append(other_tile)
+        team.sort()
+        team = team[:TEAM_PLANNER_MAX_GHOSTS - 1]
+
+        team_tiles = [tile] + [entry[2] for entry in team]
+        team_previous = [previous] + [entry[3] for entry in team]
+        return (pacman_tile, pacman_previous, team_tiles, team_previous, others, bytes(game_map.tiles))
+
+    def behind(self, tile, direction):
+        """The walkable tile one step against direction, None if there is none"""
+        for dx, dy, name in DIRECTIONS:
+            if name == direction:
+                previous = tile - dx - dy * self.maze.stride
+                return previous if previous in self.maze.exits[tile] else None
+        return None
+
+    def update_map(self):
+        game_map = self.game.map
+        if game_map is self.map:
+            return
+        self.map = game_map
+        self.maze = PlannerMaze(bytes(game_map.tiles), game_map.stride)
+        self.waiting.clear()
+        self.ready.clear()
+        if self.use_worker:
+            if self.worker is None:
+                self.worker = AIWorker(worker_main)
+            self.worker.send(('maze', bytes(game_map.tiles), game_map.stride))
+
+    def plan(self, ghost):
+        """Best move for a TEAM ghost as a (tile_x, tile_y, direction) move, None to fall back"""
+        game = self.game
+        self.update_map()
+        if game.ticks != self.tick:
+            self.tick = game.ticks
+            self.tick_used = 0.0
+
+        index = game.ghosts.index(ghost)
+        if index in self.forced_moves:
+            return self.move_in(ghost, self.forced_moves.pop(index))
+        if self.worker is not None:
+            return self.take_answer(index, ghost)
+
+        rollouts = self.forced.pop(index, None)
+        budget_ms = None
+        if rollouts is None:
+            if self.budget_ms is None:
+                rollouts = self.rollouts
+            else:
+                budget_ms = self.budget_ms - self.tick_used * 1000
+                if budget_ms <= 0:
+                    rollouts = 0
+        if rollouts == 0:
+            self.planned.append(f"PLAN {index} 0")
+            return None
+
+        tile = game.map.index(ghost.tile_x, ghost.tile_y)
+        state = self.snapshot(index, tile, self.behind(tile, ghost.direction))
+        seed = f"{game.seed}:{game.ticks}:{index}"
+        start_time = time.perf_counter()
+        deadline = start_time + budget_ms / 1000 if budget_ms is not None else None
+        best_tile, done = search(self.maze, state, random.Random(seed), rollouts, deadline)
+        elapsed = time.perf_counter() - start_time
+        self.tick_used += elapsed
+        self.searches += 1
+        self.total_rollouts += done
+        self.total_time += elapsed
+        self.planned.append(f"PLAN {index} {done}")
+        return self.move_to(ghost, best_tile)
+
+    def prepare(self, index, ghost):
+        """Ask the worker for the move of a ghost that set off, at the tile it is heading for.
+
+        Only for normal TEAM ghosts heading for a tile where they have a choice.
+        """
+        if not self.use_worker or ghost.personality != 'TEAM' or ghost.state != 'NORMAL' or not ghost.is_moving:
+            return
+        game = self.game
+        game_map = game.map
+        if game_map.corridor_move(ghost.target_tile_x, ghost.target_tile_y, ghost.direction):
+            return
+        self.update_map()
+        tile = game_map.index(ghost.target_tile_x, ghost.target_tile_y)
+        state = self.snapshot(index, tile, game_map.index(ghost.tile_x, ghost.tile_y))
+        seed = f"{game.seed}:{game.ticks}:{index}"
+        request_id = self.worker.request(index, state, seed, self.worker_budget_ms)
+        self.waiting[index] = (request_id, tile, game.ticks)
+        self.ready.pop(index, None)
+
+    def collect(self):
+        """Take in the worker's answers, without waiting for any"""
+        if self.worker is None:
+            return
+        for request_id, index, best_tile, done, elapsed in self.worker.replies():
+            self.searches += 1
+            self.total_rollouts += done
+            self.total_time += elapsed
+            entry = self.waiting.get(index)
+            # Answers to requests the ghost has moved on from are of no use
+            if entry is not None and entry[0] == request_id:
+                del self.waiting[index]
+                self.ready[index] = (entry[1], best_tile, entry[2])
+
+    def take_answer(self, index, ghost):
+        game = self.game
+        tile = game.map.index(ghost.tile_x, ghost.tile_y)
+        answer = self.ready.pop(index, None)
+        move = None
+        if answer is not None and answer[0] == tile:
+            self.answers += 1
+            self.stale_ticks += game.ticks - answer[2]
+            move = self.move_to(ghost, answer[1])
+        else:
+            # Late, keep going the way the last decision sent the ghost
+            self.late += 1
+            move = self.move_in(ghost, ghost.direction)
+        self.planned.append(f"MOVE {index} {move[2] if move else 'CHASE'}")
+        return move
+
+    def move_to(self, ghost, tile):
+        """The ghost's move onto a tile, None if it is not next to the ghost"""
+        game_map = self.game.map
+        for move in game_map.get_moves(ghost.tile_x, ghost.tile_y):
+            if game_map.index(move[0], move[1]) == tile:
+                return move
+        return None
+
+    def move_in(self, ghost, direction):
+        for move in self.game.map.get_moves(ghost.tile_x, ghost.tile_y):
+            if move[2] == direction:
+                return move
+        return None
+
+    def average_staleness(self):
+        """Mean age in ticks of the worker answers used, from the snapshot to the move"""
+        return self.stale_ticks / self.answers if self.answers else 0.0
+
+    def rollouts_per_second(self):
+        return self.total_rollouts / self.total_time if self.total_time > 0 else 0.0
+
+    def report(self):
+        if not self.searches:
+            return []
+        lines = [f"TEAM planner {self.searches:,} searches, {self.total_rollouts / self.searches:.0f} rollouts each, "
+                 f"{self.rollouts_per_second():,.0f} rollouts/s" + (" (worker process)" if self.worker else "")]
+        if self.answers or self.late:
+            lines.append(f"{self.answers:,} worker moves {self.average_staleness():.1f} ticks old on average, "
+                         f"{self.late:,} late")
+        return lines
+
+    def close(self):
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
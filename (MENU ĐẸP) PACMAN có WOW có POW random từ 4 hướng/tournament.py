@@ -0,0 +1,83 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import time
+from headless import run_headless_game
+from levels import LEVELS
+from settings import *
+
+# Ghost personality mixes, one entry per ghost start position
+PERSONALITY_MIXES = {
+    'MIXED': GHOST_PERSONALITIES,
+    'AGGRESSIVE': ['AGGRESSIVE'] * 4,
+    'AMBUSH': ['AMBUSH'] * 4,
+    'PATROL': ['PATROL'] * 4,
+    'RANDOM': ['RANDOM'] * 4,
+    'TEAM': ['TEAM'] * 4
+}
+
+def play_match(job):
+    """Pool worker: play one headless game and return its result with the job fields"""
+    level_num, mix_name, seed, max_ticks = job
+    result = run_headless_game(level_num, max_ticks, personalities=PERSONALITY_MIXES[mix_name], seed=seed)
+    result.update({'level': level_num, 'mix': mix_name, 'seed': seed})
+    return result
+
+def summarize(results, key):
+    groups = {}
+    for result in results:
+        groups.setdefault(key(result), []).append(result)
+
+    rows = []
+    for group, games in sorted(groups.items()):
+        count = len(games)
+        rows.append({
+            'group': group,
+            'games': count,
+            'kill_rate': sum(1 for game in games if game['outcome'] == STATE_GAME_OVER) / count,
+            'deaths': sum(game['deaths'] for game in games) / count,
+            'survival_ticks': sum(game['ticks'] for game in games) / count,
+            'dots_eaten': sum(game['dots_eaten'] for game in games) / count
+        })
+    return rows
+
+def print_summary(title, rows):
+    print(f"\n{title}")
+    print(f"{'':<16}{'games':>7}{'kill rate':>11}{'deaths':>9}{'survival':>10}{'dots':>8}")
+    for row in rows:
+        group = row['group'] if isinstance(row['group'], str) else ' '.join(str(part) for part in row['group'])
+        print(f"{group:<16}{row['games']:>7}{row['kill_rate']:>10.0%}{row['deaths']:>9.2f}"
+              f"{row['survival_ticks']:>10.0f}{row['dots_eaten']:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Play every level, ghost personality mix and seed headlessly")
+    parser.add_argument('--levels', type=int, nargs='+', default=sorted(LEVELS))
+    parser.add_argument('--mixes', nargs='+', default=list(PERSONALITY_MIXES), choices=list(PERSONALITY_MIXES))
+    parser.add_argument('--seeds', type=int, default=10, help="number of seeds per level and mix")
+    parser.add_argument('--max-ticks', type=int, default=HEADLESS_MAX_TICKS)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--output', default='tournament_results.jsonl', help="per-game results, one JSON object per line")
+    args = parser.parse_args()
+
+    jobs = [(level_num, mix_name, seed, args.max_ticks)
+            for level_num, mix_name, seed in itertools.product(args.levels, args.mixes, range(args.seeds))]
+    print(f"Running {len(jobs)} games on {args.workers} workers, writing {args.output}")
+
+    results = []
+    start_time = time.perf_counter()
+    with open(args.output, 'w') as output, multiprocessing.Pool(args.workers) as pool:
+        for result in pool.imap_unordered(play_match, jobs):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            results.append(result)
+    elapsed = time.perf_counter() - start_time
+
+    total_ticks = sum(result['ticks'] for result in results)
+    print(f"{len(results)} games, {total_ticks:,} ticks in {elapsed:.1f}s ({total_ticks / elapsed:,.0f} ticks/s)")
+
+    print_summary("By personality mix", summarize(results, lambda result: result['mix']))
+    print_summary("By level and mix", summarize(results, lambda result: (result['level'], result['mix'])))
+
+if __name__ == '__main__':
+    main()
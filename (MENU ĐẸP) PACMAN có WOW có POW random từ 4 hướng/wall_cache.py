@@ -0,0 +1,88 @@
+import os
+import hashlib
+from collections import OrderedDict
+import pygame
+from settings import *
+
+# bytes.translate table mapping wall codes to 1 and every other tile to 0
+WALL_MASK = bytes(1 if code == WALL_CODE else 0 for code in range(256))
+
+class WallSurfaceCache:
+    """Rendered wall surfaces shared by every Map in the process.
+
+    Surfaces are keyed by the wall layout (see wall_key) and the map chunk
+    they show, and the least recently used one is dropped once more than
+    max_size are held. With a
+    directory set they are also saved as PNG files there and loaded back on
+    a miss, so a new process does not have to redraw them either.
+
+    Cached surfaces are shared, callers must copy them before drawing on them.
+    """
+
+    def __init__(self, max_size=WALL_CACHE_SIZE, directory=None):
+        self.max_size = max_size
+        self.directory = directory
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def wall_key(self, game_map):
+        """Hash of the wall tiles of a map and of everything that changes how they look"""
+        style = repr((game_map.width, game_map.height, TILE_SIZE, MAP_CHUNK_TILES,
+                      WALL_COLOR, WALL_HIGHLIGHT, WALL_SHADOW))
+        digest = hashlib.sha1(style.encode())
+        digest.update(game_map.tiles.translate(WALL_MASK))
+        return digest.hexdigest()
+
+    def get(self, key, build):
+        """Cached surface for key, build() renders it on a miss"""
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.load(key)
+        if surface is None:
+            surface = build()
+            self.save(key, surface)
+
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def filename(self, key):
+        return os.path.join(self.directory, f"walls_{key}.png")
+
+    def load(self, key):
+        if not self.directory:
+            return None
+        filename = self.filename(key)
+        if not os.path.exists(filename):
+            return None
+        try:
+            surface = pygame.image.load(filename)
+        except pygame.error:
+            return None
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+
+    def save(self, key, surface):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write under a temporary name first, other processes may be loading the same level
+            temp_filename = f"{self.filename(key)}.{os.getpid()}.tmp.png"
+            pygame.image.save(surface, temp_filename)
+            os.replace(temp_filename, self.filename(key))
+        except (OSError, pygame.error):
+            pass
+
+    def clear(self):
+        self.surfaces.clear()
+
+wall_surfaces = WallSurfaceCache(WALL_CACHE_SIZE, CACHE_DIR if WALL_CACHE_PERSIST else None)